@@ -1,11 +1,30 @@
 import os
 import json
 import hashlib
+import time
+import threading
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import requests
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_from_directory, Response
 from werkzeug.security import generate_password_hash, check_password_hash
-from app.models.predictor import predict_match_result
+from app.models.predictor import predict_match_result, get_prediction_metrics
+from app.models.scenarios import sweep_match_scenarios, STAT_FEATURES
+from app.models.season_simulator import (season_projections, DEFAULT_SIMULATIONS, MAX_REQUEST_SIMULATIONS,
+                                         REQUEST_WAIT_SECONDS)
+from app.models.prescoring import prediction_store
+from app.models.feature_store import get_feature_store
+from app.models.ratings import get_rating_engine, record_finished_matches
+from app.models.head_to_head import get_head_to_head, record_finished_matches as record_head_to_head_results
+from app.utils.team_logos import team_logo_mapping, get_team_logo
+from app.config import Config
+from app.chat.context import ChatContextBuilder, select_sources
+from app.chat.response_cache import ResponseCache, team_terms
+from app.chat.llm import StubChatModel, response_text
+from app.chat.conversations import ConversationStore, new_conversation_id
+from app.chat.stats_queries import get_stats_engine
+from app.chat.intents import IntentRouter
+from app.chat.jobs import ChatJobQueue
 import json
 import os
 import pickle
@@ -48,27 +67,10 @@ API_HEADERS = {
     'X-Auth-Token': API_KEY
 }
 
-# Load our trained models and encoders
-try:
-    import joblib
-    match_winner_model = joblib.load('match_winner_model.pkl')
-    fthg_model = joblib.load('fthg_model.pkl')
-    ftag_model = joblib.load('ftag_model.pkl')
-    home_team_encoder = joblib.load('home_team_encoder.pkl')
-    away_team_encoder = joblib.load('away_team_encoder.pkl')
-    print("Models and encoders loaded successfully!")
-    models_loaded = True
-except Exception as e:
-    print(f"Error loading models: {e}")
-    import traceback
-    traceback.print_exc()
-    # Continue with the app even if models fail to load
-    match_winner_model = None
-    fthg_model = None
-    ftag_model = None
-    home_team_encoder = None
-    away_team_encoder = None
-    models_loaded = False
+# Our trained models and encoders are loaded once by the predictor module
+# (compact .npz artifacts when available, sklearn pickles otherwise)
+from app.models.predictor import (match_winner_model, fthg_model, ftag_model,
+                                  home_team_encoder, away_team_encoder, models_loaded)
 
 # Import the RapidAPI client dynamically to avoid static import resolution errors
 try:
@@ -87,114 +89,6 @@ except Exception as e:
     get_rapidapi_standings = None
     RAPIDAPI_AVAILABLE = False
 
-# Map team names to their logo filenames
-# This helps us display the correct team logos in the UI
-team_logo_mapping = {
-    'Arsenal': 'Arsenal-Logo.png',
-    'Arsenal FC': 'Arsenal-Logo.png',
-    'Aston Villa': 'Aston Villa.png',
-    'Aston Villa FC': 'Aston Villa.png',
-    'Birmingham': 'Birmingham.png',
-    'Blackburn': 'Blackburn.png',
-    'Blackpool': 'Blackpool.png',
-    'Bolton': 'Bolton.png',
-    'Bournemouth': 'Bournemouth.jpg',
-    'AFC Bournemouth': 'Bournemouth.jpg',
-    'Brighton': 'Brighton.webp',
-    'Brighton & Hove Albion': 'Brighton.webp',
-    'Brighton & Hove Albion FC': 'Brighton.webp',
-    'Burnley': 'Burnley.png',
-    'Burnley FC': 'Burnley.png',
-    'Cardiff': 'Cardiff.jpg',
-    'Chelsea': 'Chelsea.png',
-    'Chelsea FC': 'Chelsea.png',
-    'Crystal Palace': 'Crystal Palace.jpg',
-    'Crystal Palace FC': 'Crystal Palace.jpg',
-    'Everton': 'Everton.png',
-    'Everton FC': 'Everton.png',
-    'Fulham': 'Fulham.png',
-    'Fulham FC': 'Fulham.png',
-    'Hull': 'Hull.jpg',
-    'Huddersfield': 'Hundersfield.png',
-    'Huddersfield Town AFC': 'Hundersfield.png',
-    'Leicester': 'Leicester.png',
-    'Leicester City': 'Leicester.png',
-    'Leicester City FC': 'Leicester.png',
-    'Liverpool': 'Liverpool.png',
-    'Liverpool FC': 'Liverpool.png',
-    'Man City': 'Man City.jpg',
-    'Manchester City': 'Man City.jpg',
-    'Manchester City FC': 'Man City.jpg',
-    'Man United': 'Man United.png',
-    'Manchester United': 'Man United.png',
-    'Manchester United FC': 'Man United.png',
-    'Middlesbrough': 'Middlesbrough.png',
-    'Newcastle': 'Newcastle United.png',
-    'Newcastle United': 'Newcastle United.png',
-    'Newcastle United FC': 'Newcastle United.png',
-    'Norwich': 'Norwich.png',
-    'Norwich City FC': 'Norwich.png',
-    'QPR': 'QPR.png',
-    'Queens Park Rangers FC': 'QPR.png',
-    'Reading': 'Reading.png',
-    'Sheffield United': 'Sheffield United.jpg',
-    'Sheffield United FC': 'Sheffield United.jpg',
-    'Southampton': 'SouthAmpton.jpeg',
-    'Southampton FC': 'SouthAmpton.jpeg',
-    'Stoke': 'Stock.png',
-    'Stoke City FC': 'Stock.png',
-    'Sunderland': 'Sunderland.png',
-    'Sunderland AFC': 'Sunderland.png',
-    'Swansea': 'Swansea.png',
-    'Swansea City AFC': 'Swansea.png',
-    'Tottenham': 'Tottenham.png',
-    'Tottenham Hotspur': 'Tottenham.png',
-    'Tottenham Hotspur FC': 'Tottenham.png',
-    'Watford': 'Watford.png',
-    'Watford FC': 'Watford.png',
-    'West Brom': 'West Brom.jpg',
-    'West Bromwich Albion FC': 'West Brom.jpg',
-    'West Ham': 'West Ham.png',
-    'West Ham United': 'West Ham.png',
-    'West Ham United FC': 'West Ham.png',
-    'Wigan': 'Wigan.png',
-    'Wigan Athletic FC': 'Wigan.png',
-    'Wolves': 'Wolves.png',
-    'Wolverhampton Wanderers': 'Wolves.png',
-    'Wolverhampton Wanderers FC': 'Wolves.png',
-    # Add missing teams from sample data
-    'Leeds United': 'Leeds United.png',
-    'Leeds United FC': 'Leeds United.png',
-    'Brentford': 'Brentford.png',
-    'Brentford FC': 'Brentford.png',
-    'Nottingham Forest': 'Nottingham Forest.png',
-    'Nottingham Forest FC': 'Nottingham Forest.png',
-    'Luton Town': 'Luton Town.png',
-    'Luton Town FC': 'Luton Town.png'
-}
-
-def get_team_logo(team_name):
-    """Get team logo filename with improved fuzzy matching"""
-    # Direct match first
-    if team_name in team_logo_mapping:
-        return team_logo_mapping[team_name]
-    
-    # Try case-insensitive exact match
-    for key, value in team_logo_mapping.items():
-        if key.lower() == team_name.lower():
-            return value
-    
-    # Try partial matching for common cases (more restrictive)
-    for key, value in team_logo_mapping.items():
-        # Check if the mapping key is contained in the team name or vice versa
-        # But be more careful to avoid false positives
-        if (key.lower() in team_name.lower() and len(key) > 3) or \
-           (team_name.lower() in key.lower() and len(team_name) > 3):
-            return value
-    
-    # Return a generic default logo instead of Arsenal logo
-    return 'score_sight_logo2.png'
-
 def hash_password(password):
     """Hash a password using SHA256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -260,8 +154,12 @@ def register_user(username, email, password):
     save_users(users)
     return True
 
-def fetch_live_matches():
-    """Fetch live matches from football-data.org API including competition info"""
+def fetch_live_matches(raise_errors=False):
+    """
+    Fetch live matches from football-data.org API including competition info
+    
+    With raise_errors a failed request raises instead of returning a fallback
+    """
     try:
         print("Fetching live matches from API...")
         url = "https://api.football-data.org/v4/matches"
@@ -341,13 +239,21 @@ def fetch_live_matches():
             return matches
         else:
             print(f"Error fetching live matches: {response.status_code}")
+            if raise_errors:
+                raise RuntimeError(f"live matches request failed with status {response.status_code}")
             return []
     except Exception as e:
         print(f"Exception in fetch_live_matches: {e}")
+        if raise_errors:
+            raise
         return []
 
-def fetch_upcoming_matches():
-    """Fetch upcoming matches from football-data.org API including World Cup Qualifiers"""
+def fetch_upcoming_matches(raise_errors=False):
+    """
+    Fetch upcoming matches from football-data.org API including World Cup Qualifiers
+    
+    With raise_errors a failed request raises instead of returning a fallback
+    """
     try:
         print("Fetching upcoming matches from API...")
         url = "https://api.football-data.org/v4/matches"
@@ -420,6 +326,7 @@ def fetch_upcoming_matches():
                     print(f"Away team logo key: {get_team_logo(away_team_name)}")
                     
                     matches.append({
+                        'id': match.get('id'),
                         'homeTeam': home_team_name,
                         'awayTeam': away_team_name,
                         'date': formatted_date,
@@ -429,18 +336,40 @@ def fetch_upcoming_matches():
             
             print(f"Processed upcoming matches count: {len(matches)}")
             print(f"Upcoming matches: {matches}")
+            
+            # Pre-score the fixtures in the background whenever the list changes
+            prediction_store.schedule(matches)
             return matches
         else:
             print(f"Error fetching upcoming matches: {response.status_code}")
+            if raise_errors:
+                raise RuntimeError(f"upcoming matches request failed with status {response.status_code}")
             return []
     except Exception as e:
         print(f"Exception in fetch_upcoming_matches: {e}")
+        if raise_errors:
+            raise
         import traceback
         traceback.print_exc()
         return []
 
-def fetch_epl_standings():
-    """Fetch EPL standings from football-data.org API"""
+def recent_form(team_name):
+    """
+    Last five results (W/D/L, oldest first) for a team from the form feature store
+    
+    The store is only as recent as our dataset, so this is historical form,
+    not this season's. Teams with no history get an empty list.
+    """
+    store = get_feature_store()
+    form = store.team_form(team_name) if store is not None and team_name else None
+    return form['form'] if form else []
+
+def fetch_epl_standings(raise_errors=False):
+    """
+    Fetch EPL standings from football-data.org API
+    
+    With raise_errors a failed request raises instead of returning a fallback
+    """
     try:
         # Try RapidAPI first if available
         if RAPIDAPI_AVAILABLE and get_rapidapi_standings is not None:
@@ -449,12 +378,12 @@ def fetch_epl_standings():
             if rapidapi_standings and 'standings' in rapidapi_standings:
                 standings = []
                 for i, team in enumerate(rapidapi_standings['standings']):
-                    # Use actual form data if available, otherwise generate sample data
+                    # Use actual form data if available, otherwise our own (historical) match history
                     form_data = team.get('form')
+                    form_source = 'live' if form_data else None
                     if not form_data:
-                        import random
-                        form_results = ['W', 'D', 'L']
-                        form_data = ','.join(random.choices(form_results, k=5))
+                        form_data = ','.join(recent_form(team.get('team')))
+                        form_source = 'history' if form_data else None
                     
                     standings.append({
                         'position': team.get('position', i+1),
@@ -468,7 +397,8 @@ def fetch_epl_standings():
                         'goals_against': team.get('goals_against', 0),
                         'goal_difference': team.get('goal_difference', 0),
                         'points': team.get('points', 0),
-                        'form': form_data.split(',') if form_data else []
+                        'form': form_data.split(',') if form_data else [],
+                        'form_source': form_source
                     })
                 print(f"RapidAPI standings fetched successfully, count: {len(standings)}")
                 return standings
@@ -498,13 +428,13 @@ def fetch_epl_standings():
                     print(f"Team {team.get('team', {}).get('name', 'Unknown')} form data: {form_data}")
                     
                     # Process form data correctly - it should already be in the right format
-                    # If form data is None or empty, generate sample data
+                    # If form data is None or empty, use the last results in our match history,
+                    # flagged as historical since the dataset ends seasons ago
+                    form_source = 'live' if form_data else None
                     if not form_data:
-                        # Generate sample form data (W=Win, D=Draw, L=Loss)
-                        import random
-                        form_results = ['W', 'D', 'L']
-                        form_data = ','.join(random.choices(form_results, k=5))
-                        print(f"Using sample form data for {team.get('team', {}).get('name', 'Unknown')}: {form_data}")
+                        form_data = ','.join(recent_form(team.get('team', {}).get('name')))
+                        form_source = 'history' if form_data else None
+                        print(f"Using stored form data for {team.get('team', {}).get('name', 'Unknown')}: {form_data}")
                     
                     standings.append({
                         'position': team.get('position', 0),
@@ -518,22 +448,31 @@ def fetch_epl_standings():
                         'goals_against': team.get('goalsAgainst', 0),
                         'goal_difference': team.get('goalDifference', 0),
                         'points': team.get('points', 0),
-                        'form': form_data.split(',') if isinstance(form_data, str) else (form_data if isinstance(form_data, list) else [])
+                        'form': form_data.split(',') if isinstance(form_data, str) else (form_data if isinstance(form_data, list) else []),
+                        'form_source': form_source
                     })
             
             print(f"Processed EPL standings: {standings}")
             return standings
         else:
             print(f"Error fetching EPL standings: {response.status_code}")
+            if raise_errors:
+                raise RuntimeError(f"EPL standings request failed with status {response.status_code}")
             return []
     except Exception as e:
         print(f"Exception in fetch_epl_standings: {e}")
+        if raise_errors:
+            raise
         import traceback
         traceback.print_exc()
         return []
 
-def fetch_epl_news():
-    """Fetch EPL news from NewsAPI"""
+def fetch_epl_news(raise_errors=False):
+    """
+    Fetch EPL news from NewsAPI
+    
+    With raise_errors a failed request raises instead of returning a fallback
+    """
     try:
         # Try RapidAPI first if available
         if RAPIDAPI_AVAILABLE and get_rapidapi_news is not None:
@@ -618,9 +557,13 @@ def fetch_epl_news():
             return news_data
         else:
             print(f"Error fetching news: {response.status_code}")
+            if raise_errors:
+                raise RuntimeError(f"news request failed with status {response.status_code}")
             return []
     except Exception as e:
         print(f"Exception in fetch_epl_news: {e}")
+        if raise_errors:
+            raise
         # Return sample data on error
         return [
             {
@@ -660,6 +603,7 @@ def fetch_previous_matches():
     Fetch previous matches from football-data.org API including World Cup Qualifiers
     Returns a list of previous matches or sample data if API call fails or returns no data
     """
+    results = []
     try:
         print("Fetching previous matches from API...")
         url = "https://api.football-data.org/v4/matches"
@@ -728,6 +672,17 @@ def fetch_previous_matches():
                 print("No matches returned from API, returning sample data")
                 return get_sample_previous_matches()
             
+            # Every finished match, not just the ten shown, goes to the team ratings and head-to-head records
+            results = [{
+                "id": match.get('id'),
+                "date": convert_utc_to_ist(match.get('utcDate', '')),
+                "homeTeam": match.get('homeTeam', {}).get('name'),
+                "awayTeam": match.get('awayTeam', {}).get('name'),
+                "home_score": match.get('score', {}).get('fullTime', {}).get('home'),
+                "away_score": match.get('score', {}).get('fullTime', {}).get('away'),
+                "league": match.get('competition', {}).get('name')
+            } for match in api_matches]
+            
             # Get last 10 finished matches
             for match in api_matches[-10:]:
                 # Get match statistics if available
@@ -771,11 +726,22 @@ def fetch_previous_matches():
                     }
                 })
         print(f"Processed previous matches count: {len(matches)}")
-        return matches
     except Exception as e:
         print(f"Error fetching previous matches: {e}")
         # Return sample data with stats if API fails
         return get_sample_previous_matches()
+    
+    # Finished Premier League results keep the team ratings and head-to-head records current,
+    # a failure there must not replace the real results with sample data
+    try:
+        record_finished_matches(results)
+    except Exception as e:
+        print(f"Error updating team ratings: {e}")
+    try:
+        record_head_to_head_results(results)
+    except Exception as e:
+        print(f"Error updating head-to-head records: {e}")
+    return matches
 
 def get_sample_previous_matches():
     """Return sample previous matches data"""
@@ -890,6 +856,41 @@ def get_sample_previous_matches():
         }
     ]
 
+def fetch_remaining_epl_fixtures():
+    """
+    Fetch all remaining EPL fixtures for this season from football-data.org
+    Falls back to the Premier League games in the upcoming matches list
+    """
+    try:
+        print("Fetching remaining EPL fixtures from API...")
+        url = f"{API_BASE_URL}/competitions/PL/matches"
+        headers = {
+            'X-Response-Control': 'minified',
+            'X-Auth-Token': API_KEY
+        }
+        params = {'status': 'SCHEDULED,TIMED,POSTPONED'}
+        
+        response = requests.get(url, headers=headers, params=params)
+        print(f"Remaining fixtures API response status: {response.status_code}")
+        
+        if response.status_code == 200:
+            fixtures = []
+            for match in response.json().get('matches', []):
+                fixtures.append({
+                    'id': match.get('id'),
+                    'homeTeam': match.get('homeTeam', {}).get('name', 'Unknown'),
+                    'awayTeam': match.get('awayTeam', {}).get('name', 'Unknown'),
+                    'date': convert_utc_to_ist(match.get('utcDate', '')),
+                    'matchday': match.get('matchday')
+                })
+            if fixtures:
+                print(f"Processed remaining fixtures count: {len(fixtures)}")
+                return fixtures
+    except Exception as e:
+        print(f"Exception in fetch_remaining_epl_fixtures: {e}")
+    
+    return [match for match in fetch_upcoming_matches() if match.get('competition') == 'Premier League']
+
 def fetch_live_match_streams():
     """
     Fetch live match streaming information
@@ -942,158 +943,223 @@ def fetch_live_match_streams():
             ]
         }
 
-def get_gemini_response(prompt, conversation_history=None, user_greeted=False):
-    """Get response from Google Gemini API using the official SDK with enhanced real-time data and search capabilities"""
+# Chat context is built from cached snapshots of these sources
+chat_context = ChatContextBuilder({
+    'live': lambda: fetch_live_matches(raise_errors=True),
+    'upcoming': lambda: fetch_upcoming_matches(raise_errors=True),
+    'standings': lambda: fetch_epl_standings(raise_errors=True),
+    'news': lambda: fetch_epl_news(raise_errors=True)
+})
+
+# Answers to repeated questions, valid while the data behind them is unchanged
+response_cache = ResponseCache(team_terms(list(home_team_encoder.classes_)
+                                          if models_loaded and home_team_encoder is not None else []))
+
+# Live-score and standings questions are answered from the same snapshots, without the model
+intent_router = IntentRouter(chat_context.snapshots, list(home_team_encoder.classes_)
+                             if models_loaded and home_team_encoder is not None else [])
+
+# How chat questions were answered: 'stats' and 'intent' are local, 'cache' reuses an earlier model answer
+chat_answer_counts = {'stats': 0, 'intent': 0, 'cache': 0, 'llm': 0}
+chat_answer_lock = threading.Lock()
+
+def record_chat_answer(source):
+    with chat_answer_lock:
+        chat_answer_counts[source] += 1
+
+def chat_traffic_metrics():
+    """Answer counts by source and the share of questions served without a model call"""
+    with chat_answer_lock:
+        counts = dict(chat_answer_counts)
+    total = sum(counts.values())
+    return {'answers': counts, 'total': total,
+            'without_llm_share': round(1 - counts['llm'] / total, 3) if total else None}
+
+# Chat history lives on the server, keyed by the session's conversation id
+conversations = ConversationStore()
+
+def chat_conversation_id():
+    """The conversation id of this browser session, created on first use"""
+    if 'chat_id' not in session:
+        session['chat_id'] = new_conversation_id()
+    return session['chat_id']
+
+def local_chat_answer(prompt):
+    """Answer from our own data when the question is one we can answer exactly, otherwise None"""
+    # Historical stats questions ("Liverpool home goals in 2017-18") come from the match dataset
+    engine = get_stats_engine()
+    answer = engine.answer(prompt) if engine is not None else None
+    if answer is not None:
+        record_chat_answer('stats')
+        return answer
+    # Live scores, the table and top-N come straight from the cached snapshots,
+    # which may need a fetch, so a failure here sends the question to the model
     try:
-        # Fetch comprehensive real-time data based on the query content
-        live_matches = []
-        upcoming_matches = []
-        epl_standings = []
-        news_data = []
-        
-        # Determine what data to fetch based on the query
-        prompt_lower = prompt.lower()
-        
-        # Always fetch basic data
-        live_matches = fetch_live_matches()
-        upcoming_matches = fetch_upcoming_matches()
-        epl_standings = fetch_epl_standings()
-        
-        # Fetch additional data based on query keywords
-        if any(keyword in prompt_lower for keyword in ['news', 'latest', 'update', 'transfer']):
-            news_data = fetch_epl_news()
-        
-        # Create context with real-time data
-        context_parts = []
-        
-        # Add current date and time in IST
-        current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        context_parts.append(f"Current Date and Time (IST): {current_datetime}")
-        
-        if live_matches:
-            # Format live matches data for better readability
-            live_matches_formatted = []
-            for match in live_matches:
-                live_matches_formatted.append(
-                    f"{match['homeTeam']} vs {match['awayTeam']} - "
-                    f"Score: {match['score']} - "
-                    f"Minute: {match['minute']} - "
-                    f"Competition: {match['competition']} - "
-                    f"Date: {match['date']}"
-                )
-            context_parts.append(f"Live Matches:\n" + "\n".join(live_matches_formatted))
-        else:
-            context_parts.append("Live Matches: No live matches currently")
-            
-        if upcoming_matches:
-            # Format upcoming matches data for better readability
-            upcoming_matches_formatted = []
-            for match in upcoming_matches:
-                upcoming_matches_formatted.append(
-                    f"{match['homeTeam']} vs {match['awayTeam']} - "
-                    f"Competition: {match['competition']} - "
-                    f"Date: {match['date']}"
-                )
-            context_parts.append(f"Upcoming Matches:\n" + "\n".join(upcoming_matches_formatted))
-        else:
-            context_parts.append("Upcoming Matches: No upcoming matches data available")
-            
-        if epl_standings:
-            # Format standings data for better readability
-            standings_formatted = []
-            for team in epl_standings[:10]:  # Top 10 standings
-                standings_formatted.append(
-                    f"{team['position']}. {team['team']} - "
-                    f"Played: {team['played']}, Won: {team['won']}, Drawn: {team['drawn']}, Lost: {team['lost']} - "
-                    f"GF: {team['goals_for']}, GA: {team['goals_against']}, GD: {team['goal_difference']} - "
-                    f"Points: {team['points']}"
-                )
-            context_parts.append(f"EPL Standings (Top 10):\n" + "\n".join(standings_formatted))
-        else:
-            context_parts.append("EPL Standings: No standings data available")
-            
-        if news_data:
-            # Format news data for better readability
-            news_formatted = []
-            for article in news_data[:5]:  # Top 5 news items
-                news_formatted.append(
-                    f"Title: {article['title']}\n"
-                    f"Description: {article['description']}\n"
-                    f"Published: {article['publishedAt']}"
-                )
-            context_parts.append(f"Latest News:\n" + "\n\n".join(news_formatted))
-        
-        context = "\n\n".join(context_parts)
-        
-        # Build conversation history string if available
-        history_context = ""
-        if conversation_history:
-            history_parts = []
-            for i, (role, message) in enumerate(conversation_history):
-                if role == "user":
-                    history_parts.append(f"User: {message}")
-                elif role == "assistant":
-                    history_parts.append(f"Assistant: {message}")
-            history_context = "\n".join(history_parts)
-        
-        # Create a more sophisticated prompt that can handle various topics with real-time data
-        enhanced_prompt = f"""
-        You are an AI assistant for ScoreSight, a football analytics platform. 
-        You have access to real-time football data and can provide up-to-date information.
-        
-        Here is the current real-time football data:
-        {context}
-        
-        Conversation History:
-        {history_context}
-        
-        User question:
-        {prompt}
-        
-        User greeted status: {'Yes' if user_greeted else 'No'}
-        
-        Instructions:
-        1. If the question is about current football data (matches, standings, news), use the real-time data provided above.
-        2. If the question is about predictions or analysis, use your football knowledge combined with the data.
-        3. If the question is about general topics, provide a knowledgeable response.
-        4. Always be accurate and mention when you're using real-time data.
-        5. If asked about specific teams or players, provide the most current information available.
-        6. For match predictions, consider current form, standings, and head-to-head data.
-        7. If asked about the current date or time, use the Current Date and Time provided in the context above (in IST).
-        8. Always provide helpful and concise responses.
-        9. Format your responses professionally with clear headings, bullet points, and structured information when appropriate.
-        10. Use ``code`` style for specific data values
-        11. Organize information in clear sections
-        12. For lists of data, present them in a structured format with clear labels.
-        13. For numerical data, be precise and include units where appropriate.
-        14. Reference the conversation history when relevant to provide context-aware responses.
-        15. If a user asks a follow-up question, use the conversation history to understand the context.
-        16. Only greet the user once per conversation. If the "User greeted status" is "Yes", do not greet again.
-        17. If the "User greeted status" is "No", you may provide an initial greeting but only once.
-        18. Always present match times in IST format as provided in the data.
-        19. Include competition information when discussing matches.
-        
-        Provide a helpful, well-formatted, and professional response.
-        """
-        
-        # Use getattr to avoid linter issues
-        GenerativeModel = getattr(genai, 'GenerativeModel')
-        # Initialize the model with a specific model name
-        model = GenerativeModel('models/gemini-flash-latest')
-        
-        # Generate response
-        response = model.generate_content(enhanced_prompt)
-        
-        if response.text:
-            return response.text
-        else:
-            return "Sorry, I couldn't generate a response at the moment. Please try again later."
-            
+        answer = intent_router.answer(prompt)
     except Exception as e:
-        print(f"Error getting Gemini response: {e}")
-        import traceback
-        traceback.print_exc()
-        return "Sorry, I encountered an error while processing your request."
+        print(f"Error answering chat intent locally: {e}")
+        answer = None
+    if answer is not None:
+        record_chat_answer('intent')
+    return answer
+
+def get_chat_model():
+    """The model answering chat questions: Gemini, or the local stub when CHAT_MODEL=stub"""
+    if Config.CHAT_MODEL == 'stub':
+        return StubChatModel()
+    # Use getattr to avoid linter issues
+    GenerativeModel = getattr(genai, 'GenerativeModel')
+    # Initialize the model with a specific model name
+    return GenerativeModel('models/gemini-flash-latest')
+
+def build_chat_prompt(prompt, conversation_history=None, user_greeted=False, conversation_summary=None):
+    """The full prompt for one question: real-time data context, history and instructions"""
+    # Only the data this question needs, from cached snapshots where they are fresh
+    context = chat_context.build(prompt)['text']
+    
+    # Build conversation history string if available
+    history_context = ""
+    if conversation_history:
+        history_parts = []
+        for i, (role, message) in enumerate(conversation_history):
+            if role == "user":
+                history_parts.append(f"User: {message}")
+            elif role == "assistant":
+                history_parts.append(f"Assistant: {message}")
+        history_context = "\n".join(history_parts)
+    if conversation_summary:
+        history_context = f"Earlier in this conversation:\n{conversation_summary}\n\nRecent messages:\n{history_context}"
+    
+    # Create a more sophisticated prompt that can handle various topics with real-time data
+    enhanced_prompt = f"""
+    You are an AI assistant for ScoreSight, a football analytics platform. 
+    You have access to real-time football data and can provide up-to-date information.
+    
+    Here is the current real-time football data:
+    {context}
+    
+    Conversation History:
+    {history_context}
+    
+    User question:
+    {prompt}
+    
+    User greeted status: {'Yes' if user_greeted else 'No'}
+    
+    Instructions:
+    1. If the question is about current football data (matches, standings, news), use the real-time data provided above.
+    2. If the question is about predictions or analysis, use your football knowledge combined with the data.
+    3. If the question is about general topics, provide a knowledgeable response.
+    4. Always be accurate and mention when you're using real-time data.
+    5. If asked about specific teams or players, provide the most current information available.
+    6. For match predictions, consider current form, standings, and head-to-head data.
+    7. If asked about the current date or time, use the Current Date and Time provided in the context above (in IST).
+    8. Always provide helpful and concise responses.
+    9. Format your responses professionally with clear headings, bullet points, and structured information when appropriate.
+    10. Use ``code`` style for specific data values
+    11. Organize information in clear sections
+    12. For lists of data, present them in a structured format with clear labels.
+    13. For numerical data, be precise and include units where appropriate.
+    14. Reference the conversation history when relevant to provide context-aware responses.
+    15. If a user asks a follow-up question, use the conversation history to understand the context.
+    16. Only greet the user once per conversation. If the "User greeted status" is "Yes", do not greet again.
+    17. If the "User greeted status" is "No", you may provide an initial greeting but only once.
+    18. Always present match times in IST format as provided in the data.
+    19. Include competition information when discussing matches.
+    
+    Provide a helpful, well-formatted, and professional response.
+    """
+    return enhanced_prompt
+
+def stream_model_response(prompt, conversation_history=None, user_greeted=False, conversation_summary=None):
+    """
+    Yield the model's answer (or a cached earlier one) in pieces as it is generated
+    
+    Errors, and an empty answer, are raised so the chat job is marked failed.
+    """
+    versions = chat_context.versions(select_sources(prompt))
+    cached = response_cache.lookup(prompt, versions, user_greeted)
+    if cached is not None:
+        record_chat_answer('cache')
+        yield cached
+        return
+    
+    started = time.perf_counter()
+    enhanced_prompt = build_chat_prompt(prompt, conversation_history, user_greeted, conversation_summary)
+    parts = []
+    record_chat_answer('llm')
+    for chunk in get_chat_model().generate_content(enhanced_prompt, stream=True):
+        text = response_text(chunk)
+        if text:
+            parts.append(text)
+            yield text
+    if not parts:
+        raise RuntimeError("The model returned an empty answer")
+    response_cache.store(prompt, versions, user_greeted, ''.join(parts), time.perf_counter() - started)
+
+# Model answers run on the chat worker pool, so slow Gemini calls never hold web request threads
+chat_jobs = ChatJobQueue()
+
+def start_chat_answer(user_message):
+    """
+    Answer locally when we can, otherwise queue a model job for this session's conversation
+    
+    Returns (answer, job): the local answer with no job, or no answer and the
+    queued job. Both are None when the chat queue is full.
+    """
+    conversation_id = chat_conversation_id()
+    local = local_chat_answer(user_message)
+    if local is not None:
+        conversations.append(conversation_id, 'user', user_message)
+        conversations.append(conversation_id, 'assistant', local)
+        return local, None
+    
+    # The prompt gets the history before this question, which is recorded
+    # right away so a quick follow-up already has it as context
+    conversation = conversations.context(conversation_id)
+    conversations.append(conversation_id, 'user', user_message)
+    
+    def produce():
+        # A failure partway raises out of the loop: the job is marked failed
+        # and the half-finished answer is left out of the conversation
+        parts = []
+        for text in stream_model_response(user_message, conversation['history'], conversation['greeted'],
+                                          conversation['summary']):
+            parts.append(text)
+            yield text
+        conversations.append(conversation_id, 'assistant', ''.join(parts))
+    
+    job = chat_jobs.submit(produce, owner=conversation_id)
+    if job is None:
+        conversations.retract(conversation_id, 'user', user_message)
+    return None, job
+
+def chat_busy_response():
+    response = jsonify({'error': 'The AI assistant is busy right now, please try again in a moment.'})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+CHAT_ERROR_MESSAGE = 'Sorry, I encountered an error while processing your request.'
+
+def chat_job_answer(job):
+    """The final answer of a finished job, the error message in place of a partial answer if it failed"""
+    if job.status == 'failed' or not job.text:
+        return CHAT_ERROR_MESSAGE
+    return job.text
+
+def chat_job_events(job):
+    """Server-sent events for a chat job: 'delta' pieces as they arrive, then a 'done' event"""
+    offset = 0
+    while True:
+        text, offset, finished = job.read(offset, timeout=15)
+        if text:
+            yield f"data: {json.dumps({'delta': text})}\n\n"
+        elif not finished:
+            # Keeps proxies from closing a connection that is waiting in the queue
+            yield ": waiting\n\n"
+        if finished:
+            yield f"event: done\ndata: {json.dumps({'response': chat_job_answer(job), 'status': job.status})}\n\n"
+            return
 
 def get_available_teams():
     """Get list of available teams, or return empty lists if models failed to load"""
@@ -1175,8 +1241,11 @@ def index():
     # Fetch live data
     print("Fetching data for home page...")
     live_matches = fetch_live_matches()
-    upcoming_matches = fetch_upcoming_matches()
+    upcoming_matches = prediction_store.attach(fetch_upcoming_matches())
     epl_standings = fetch_epl_standings()
+    rating_engine = get_rating_engine()
+    if rating_engine is not None:
+        rating_engine.attach(epl_standings)
     print(f"Live matches count: {len(live_matches)}")
     print(f"Upcoming matches count: {len(upcoming_matches)}")
     print(f"EPL standings count: {len(epl_standings)}")
@@ -1219,7 +1288,7 @@ def live_schedule():
     # Fetch all relevant data
     print("Fetching data for live schedule page...")
     live_matches = fetch_live_matches()
-    upcoming_matches = fetch_upcoming_matches()
+    upcoming_matches = prediction_store.attach(fetch_upcoming_matches())
     previous_matches = fetch_previous_matches()
     live_streams = fetch_live_match_streams()
     epl_news = fetch_epl_news()
@@ -1358,6 +1427,14 @@ def predict():
     home_logo = team_logo_mapping.get(home_team, '')
     away_logo = team_logo_mapping.get(away_team, '')
     
+    # Current strength ratings of both sides
+    rating_engine = get_rating_engine()
+    ratings = rating_engine.match_ratings(home_team, away_team) if rating_engine is not None else None
+    
+    # Head-to-head record from the home side's point of view
+    h2h_store = get_head_to_head()
+    head_to_head = h2h_store.lookup(home_team, away_team) if h2h_store is not None else None
+    
     # Prepare response data
     response = {
         "match_result": result_mapping[result["match_result"]],
@@ -1366,43 +1443,200 @@ def predict():
         "ftag": result["predicted_FTAG"],
         "home_logo": home_logo,
         "away_logo": away_logo,
-        "match_date": match_date
+        "match_date": match_date,
+        "ratings": ratings,
+        "head_to_head": head_to_head
     }
     
     return jsonify(response)
 
+@app.route('/h2h')
+def h2h():
+    """Head-to-head record of two teams: /h2h?home=Arsenal&away=Chelsea"""
+    if 'username' not in session:
+        return jsonify({"error": "Authentication required"}), 401
+    
+    home_team = request.args.get('home')
+    away_team = request.args.get('away')
+    if not home_team or not away_team:
+        return jsonify({"error": "Both home and away teams are required"}), 400
+    
+    h2h_store = get_head_to_head()
+    if h2h_store is None:
+        return jsonify({"error": "Head-to-head data is not available"}), 503
+    
+    record = h2h_store.lookup(home_team, away_team)
+    if record is None:
+        return jsonify({"error": f"No head-to-head history for '{home_team}' and '{away_team}'"}), 404
+    
+    return jsonify(record)
+
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep():
+    """Predict one fixture over a grid of one or two swept match statistics"""
+    if 'username' not in session:
+        return jsonify({"error": "Authentication required"}), 401
+    
+    # Check if models are loaded
+    if not models_loaded:
+        return jsonify({"error": "Prediction models are not available"}), 500
+    
+    data = request.get_json(silent=True) or {}
+    home_team = data.get('home_team')
+    away_team = data.get('away_team')
+    
+    # Make sure both teams are selected
+    if not home_team or not away_team:
+        return jsonify({"error": "Both home and away teams are required"}), 400
+    
+    # Stats that aren't swept stay fixed at the submitted (or default) values
+    try:
+        base_stats = {name: float(data[name]) for name in STAT_FEATURES if name in data}
+    except (TypeError, ValueError):
+        return jsonify({"error": "Match statistics must be numbers"}), 400
+    
+    # e.g. "sweep": [{"feature": "HS", "min": 0, "max": 20, "step": 1}, {"feature": "HC", "values": [0, 5, 10]}]
+    result = sweep_match_scenarios(home_team, away_team, base_stats, data.get('sweep') or [])
+    
+    if "error" in result:
+        return jsonify(result), 400
+    
+    return jsonify(result)
+
+@app.route('/api/season-simulation')
+def season_simulation():
+    """
+    Monte Carlo projection of final EPL points and positions
+    
+    The simulation runs in the background. Until it finishes this answers
+    202 with a Retry-After, then the same URL returns the projection.
+    """
+    if 'username' not in session:
+        return jsonify({"error": "Authentication required"}), 401
+    
+    n_simulations = request.args.get('simulations', DEFAULT_SIMULATIONS, type=int)
+    n_simulations = min(n_simulations or DEFAULT_SIMULATIONS, MAX_REQUEST_SIMULATIONS)
+    
+    standings = fetch_epl_standings()
+    fixtures = fetch_remaining_epl_fixtures()
+    projection = season_projections.submit(standings, fixtures, n_simulations)
+    try:
+        result = projection.result(timeout=REQUEST_WAIT_SECONDS)
+    except FuturesTimeoutError:
+        response = jsonify({"status": "running", "simulations": n_simulations})
+        response.headers['Retry-After'] = '2'
+        return response, 202
+    except Exception as e:
+        print(f"Error simulating the season: {e}")
+        return jsonify({"error": "Season simulation failed"}), 500
+    
+    if "error" in result:
+        return jsonify(result), 503
+    
+    return jsonify(result)
+
+@app.route('/api/prediction-metrics')
+def prediction_metrics():
+    """API endpoint exposing prediction batching and queue wait metrics"""
+    return jsonify(get_prediction_metrics())
+
+@app.route('/api/chat-metrics')
+def chat_metrics():
+    """API endpoint exposing AI assistant context, cache, conversation and local answer metrics"""
+    engine = get_stats_engine()
+    return jsonify({'context': chat_context.metrics(), 'response_cache': response_cache.metrics(),
+                    'conversations': conversations.metrics(),
+                    'stats_queries': engine.metrics() if engine is not None else None,
+                    'intents': intent_router.metrics(), 'traffic': chat_traffic_metrics(),
+                    'jobs': chat_jobs.metrics()})
+
 @app.route('/ai-chat', methods=['POST'])
 def ai_chat():
-    """Handle AI chat requests with conversation history"""
+    """
+    Handle AI chat requests, with the conversation history kept on the server
+    
+    Questions answered from our own data come back at once as {'status': 'done',
+    'response'}. Anything needing the model is queued: 202 with a job id and the
+    URLs to poll or stream it, or 503 when the chat queue is full.
+    """
     try:
         user_message = ''
-        conversation_history = []
-        user_greeted = False
-        
         if request.json is not None:
             user_message = request.json.get('message', '')
-            conversation_history = request.json.get('history', [])
-            user_greeted = request.json.get('greeted', False)
-        
-        # Limit conversation history to last 10 messages to prevent context overflow
-        if len(conversation_history) > 10:
-            conversation_history = conversation_history[-10:]
         
-        response_text = get_gemini_response(user_message, conversation_history, user_greeted)
-        return jsonify({'response': response_text})
+        answer, job = start_chat_answer(user_message)
+        if answer is not None:
+            return jsonify({'status': 'done', 'response': answer})
+        if job is None:
+            return chat_busy_response()
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'position': chat_jobs.position(job),
+            'poll': url_for('ai_chat_job', job_id=job.id),
+            'stream': url_for('ai_chat_job_stream', job_id=job.id)
+        }), 202
     except Exception as e:
         print(f"Error in AI chat: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'response': 'Sorry, I encountered an error while processing your request.'}), 500
 
+@app.route('/ai-chat/stream', methods=['POST'])
+def ai_chat_stream():
+    """Submit a chat question and stream its answer as server-sent events in the same request"""
+    payload = request.get_json(silent=True) or {}
+    user_message = payload.get('message', '')
+    # Set before streaming starts, the session cookie can't change once the response is under way
+    answer, job = start_chat_answer(user_message)
+    if answer is None and job is None:
+        return chat_busy_response()
+    
+    if answer is not None:
+        events = iter([f"data: {json.dumps({'delta': answer})}\n\n",
+                       f"event: done\ndata: {json.dumps({'response': answer})}\n\n"])
+    else:
+        events = chat_job_events(job)
+    return Response(events, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/ai-chat/jobs/<job_id>')
+def ai_chat_job(job_id):
+    """Poll a queued chat answer: the text after ?offset=, the new offset and the job status"""
+    job = chat_jobs.get(job_id, session.get('chat_id'))
+    if job is None:
+        return jsonify({'error': 'Unknown or expired chat job'}), 404
+    text, offset, finished = job.read(request.args.get('offset', 0, type=int))
+    body = {'job_id': job.id, 'status': job.status, 'text': text, 'offset': offset}
+    if job.status == 'queued':
+        body['position'] = chat_jobs.position(job)
+    if finished:
+        body['response'] = chat_job_answer(job)
+    return jsonify(body)
+
+@app.route('/ai-chat/jobs/<job_id>/stream')
+def ai_chat_job_stream(job_id):
+    """Stream a queued chat answer as server-sent events"""
+    job = chat_jobs.get(job_id, session.get('chat_id'))
+    if job is None:
+        return jsonify({'error': 'Unknown or expired chat job'}), 404
+    return Response(chat_job_events(job), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/ai-chat/reset', methods=['POST'])
+def ai_chat_reset():
+    """Forget this session's conversation and start a new one"""
+    if 'chat_id' in session:
+        conversations.reset(session.pop('chat_id'))
+    return jsonify({'status': 'ok'})
+
 @app.route('/api/live-schedule-data')
 def live_schedule_data():
     """API endpoint to fetch live schedule data"""
     try:
         # Fetch all relevant data
         live_matches = fetch_live_matches()
-        upcoming_matches = fetch_upcoming_matches()
+        upcoming_matches = prediction_store.attach(fetch_upcoming_matches())
         previous_matches = fetch_previous_matches()
         live_streams = fetch_live_match_streams()
         epl_news = fetch_epl_news()
@@ -0,0 +1,3 @@
+"""
+AI assistant chat pipeline for ScoreSight application
+"""
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Context for AI assistant prompts
+
+A chat message used to fetch live matches, upcoming matches and the
+standings one after another, then format all of them, whatever was asked.
+Here the question's keywords pick the sources it needs. Each source's data
+is kept as a snapshot with a time-to-live and a version (a hash of the
+data), and missing snapshots are fetched concurrently. Formatted context
+blocks are cached by (source, version), so they are only rebuilt when the
+data behind them changes. When a fetch fails the previous snapshot is kept
+(or an empty one if there is none) and the fetch is retried soon after,
+not when the full TTL is up.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.config import Config
+
+# Words that mean a question needs a data source
+SOURCE_KEYWORDS = {
+    'live': ['live', 'score', 'scores', 'playing', 'now', 'right now', 'currently', 'minute', 'half time',
+             'halftime', 'today', 'tonight', 'in play', 'going on'],
+    'upcoming': ['next', 'upcoming', 'fixture', 'fixtures', 'schedule', 'when', 'tomorrow', 'weekend',
+                 'this week', 'kick off', 'kickoff', 'play', 'plays', 'playing', 'vs', 'versus', 'against'],
+    'standings': ['table', 'standings', 'standing', 'position', 'top', 'bottom', 'points', 'rank', 'ranked',
+                  'relegation', 'relegated', 'title', 'leader', 'leaders', 'leading', 'first place', 'champions',
+                  'league', 'gd', 'goal difference'],
+    'news': ['news', 'latest', 'update', 'updates', 'transfer', 'transfers', 'injury', 'injuries', 'signing',
+             'rumour', 'rumor'],
+}
+# Predictions and team questions lean on the table and the fixture list
+PREDICTION_KEYWORDS = ['predict', 'prediction', 'win', 'beat', 'chance', 'chances', 'odds', 'form', 'favourite',
+                       'favorite', 'who will', 'better']
+PREDICTION_SOURCES = ['standings', 'upcoming']
+# Questions nothing matches get the usual three, which are cheap once cached
+DEFAULT_SOURCES = ['live', 'upcoming', 'standings']
+SOURCE_ORDER = ['live', 'upcoming', 'standings', 'news']
+
+STANDINGS_ROWS = 10
+NEWS_ITEMS = 5
+
+
+def _keyword_pattern(words):
+    return re.compile(r'\b(' + '|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True)) + r')\b')
+
+
+SOURCE_PATTERNS = {source: _keyword_pattern(words) for source, words in SOURCE_KEYWORDS.items()}
+PREDICTION_PATTERN = _keyword_pattern(PREDICTION_KEYWORDS)
+
+
+def select_sources(prompt):
+    """Data sources a question needs, in context order"""
+    text = (prompt or '').lower()
+    sources = {source for source, pattern in SOURCE_PATTERNS.items() if pattern.search(text)}
+    if PREDICTION_PATTERN.search(text):
+        sources.update(PREDICTION_SOURCES)
+    if not sources:
+        sources = set(DEFAULT_SOURCES)
+    return [source for source in SOURCE_ORDER if source in sources]
+
+
+def data_version(data):
+    """Short content hash of a snapshot, the same for the same data"""
+    encoded = json.dumps(data, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def render_live(matches):
+    if not matches:
+        return "Live Matches: No live matches currently"
+    lines = [f"{match['homeTeam']} vs {match['awayTeam']} - "
+             f"Score: {match['score']} - "
+             f"Minute: {match['minute']} - "
+             f"Competition: {match['competition']} - "
+             f"Date: {match['date']}" for match in matches]
+    return "Live Matches:\n" + "\n".join(lines)
+
+
+def render_upcoming(matches):
+    if not matches:
+        return "Upcoming Matches: No upcoming matches data available"
+    lines = [f"{match['homeTeam']} vs {match['awayTeam']} - "
+             f"Competition: {match['competition']} - "
+             f"Date: {match['date']}" for match in matches]
+    return "Upcoming Matches:\n" + "\n".join(lines)
+
+
+def render_standings(standings):
+    if not standings:
+        return "EPL Standings: No standings data available"
+    lines = [f"{team['position']}. {team['team']} - "
+             f"Played: {team['played']}, Won: {team['won']}, Drawn: {team['drawn']}, Lost: {team['lost']} - "
+             f"GF: {team['goals_for']}, GA: {team['goals_against']}, GD: {team['goal_difference']} - "
+             f"Points: {team['points']}" for team in standings[:STANDINGS_ROWS]]
+    return f"EPL Standings (Top {STANDINGS_ROWS}):\n" + "\n".join(lines)
+
+
+def render_news(articles):
+    if not articles:
+        return None
+    items = [f"Title: {article['title']}\n"
+             f"Description: {article['description']}\n"
+             f"Published: {article['publishedAt']}" for article in articles[:NEWS_ITEMS]]
+    return "Latest News:\n" + "\n\n".join(items)
+
+
+RENDERERS = {'live': render_live, 'upcoming': render_upcoming, 'standings': render_standings, 'news': render_news}
+
+
+class ChatContextBuilder:
+    """
+    Cached data snapshots and their rendered context blocks
+
+    fetchers maps a source name to the function that fetches it. Only one
+    fetch per source runs at a time; concurrent callers share its result.
+    """
+
+    def __init__(self, fetchers, ttls=None, max_workers=4, retry_seconds=None):
+        self.fetchers = dict(fetchers)
+        self.ttls = dict(ttls or Config.CHAT_SNAPSHOT_TTLS)
+        self.retry_seconds = retry_seconds if retry_seconds is not None else Config.CHAT_SNAPSHOT_RETRY_SECONDS
+        self._snapshots = {}
+        self._in_flight = {}
+        self._blocks = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chat-context')
+        self.stats = {'builds': 0, 'snapshot_hits': 0, 'snapshot_fetches': 0, 'block_hits': 0,
+                      'block_renders': 0, 'fetch_failures': 0, 'fetch_seconds': 0.0}
+
+    def _fetch(self, source):
+        started = time.perf_counter()
+        failed = False
+        try:
+            data = self.fetchers[source]()
+        except Exception as e:
+            print(f"Error fetching {source} for chat context: {e}")
+            failed = True
+        seconds = time.perf_counter() - started
+        with self._lock:
+            if failed:
+                # Keep serving what we had, but don't wait a whole TTL to try again
+                previous = self._snapshots.get(source) or {'data': [], 'version': data_version([])}
+                snapshot = {'data': previous['data'], 'version': previous['version'], 'fetched_at': time.time(),
+                            'ttl': min(self.retry_seconds, self.ttls.get(source, 0))}
+                self.stats['fetch_failures'] += 1
+            else:
+                snapshot = {'data': data, 'version': data_version(data), 'fetched_at': time.time()}
+            self._snapshots[source] = snapshot
+            self._in_flight.pop(source, None)
+            self.stats['snapshot_fetches'] += 1
+            self.stats['fetch_seconds'] += seconds
+        return snapshot
+
+    def snapshots(self, sources):
+        """
+        Fresh snapshot of every source, {source: {'data', 'version', 'fetched_at'}}
+
+        Sources whose snapshot is older than its TTL are fetched
+        concurrently, so a cold call costs the slowest fetch, not the sum.
+        A snapshot kept after a failed fetch also has a short 'ttl'.
+        """
+        now = time.time()
+        ready, pending = {}, {}
+        with self._lock:
+            for source in sources:
+                snapshot = self._snapshots.get(source)
+                ttl = snapshot.get('ttl', self.ttls.get(source, 0)) if snapshot is not None else 0
+                if snapshot is not None and now - snapshot['fetched_at'] < ttl:
+                    ready[source] = snapshot
+                    self.stats['snapshot_hits'] += 1
+                    continue
+                future = self._in_flight.get(source)
+                if future is None:
+                    future = self._in_flight[source] = self._executor.submit(self._fetch, source)
+                pending[source] = future
+        for source, future in pending.items():
+            ready[source] = future.result()
+        return ready
+
+    def versions(self, sources):
+        """Current snapshot version of each source, fetching any that are stale"""
+        return {source: snapshot['version'] for source, snapshot in self.snapshots(sources).items()}
+
+    def invalidate(self, source=None):
+        """Drop one source's snapshot (or all of them) so the next build refetches it"""
+        with self._lock:
+            if source is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(source, None)
+
+    def _block(self, source, snapshot):
+        key = (source, snapshot['version'])
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self.stats['block_hits'] += 1
+                return block
+        block = RENDERERS[source](snapshot['data']) or ''
+        with self._lock:
+            # Older versions of this source's block are never asked for again
+            self._blocks = {k: v for k, v in self._blocks.items() if k[0] != source}
+            self._blocks[key] = block
+            self.stats['block_renders'] += 1
+        return block
+
+    def build(self, prompt, sources=None):
+        """
+        Context for one question
+
+        Returns {'text', 'sources', 'versions', 'data'}: the prompt context,
+        which sources went into it, their snapshot versions and the raw
+        snapshot data.
+        """
+        sources = sources if sources is not None else select_sources(prompt)
+        snapshots = self.snapshots(sources)
+        parts = [f"Current Date and Time (IST): {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]
+        parts.extend(block for block in (self._block(source, snapshots[source]) for source in sources) if block)
+        with self._lock:
+            self.stats['builds'] += 1
+        return {
+            'text': "\n\n".join(parts),
+            'sources': sources,
+            'versions': {source: snapshots[source]['version'] for source in sources},
+            'data': {source: snapshots[source]['data'] for source in sources}
+        }
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['snapshot_ages'] = {source: round(time.time() - snapshot['fetched_at'], 1)
+                                      for source, snapshot in self._snapshots.items()}
+        lookups = stats['snapshot_hits'] + stats['snapshot_fetches']
+        stats['snapshot_hit_rate'] = round(stats['snapshot_hits'] / lookups, 3) if lookups else None
+        stats['fetch_seconds'] = round(stats['fetch_seconds'], 3)
+        return stats
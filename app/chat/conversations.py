@@ -0,0 +1,166 @@
+"""
+Server-side conversation store for the AI assistant
+
+Each chat session has an append-only list of turns kept here, so the
+browser only sends its new message. The history that goes into a prompt
+has a token budget: the latest turns are kept word for word, and older
+ones are folded into a rolling summary. The summary has its own budget
+and sheds its oldest lines first, so prompt size stays bounded however
+long the conversation gets. Turns folded into the summary are not kept,
+and each stored turn is cut to a maximum length.
+
+The summary is extractive (the first sentence of each folded turn), so
+compaction never costs a model call.
+"""
+
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.config import Config
+
+SUMMARY_LINE_CHARS = 160
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+
+def estimate_tokens(text):
+    """Rough token count, about four characters per token"""
+    return max(1, len(text or '') // 4)
+
+
+def summarize_turn(role, text):
+    """One summary line for a turn: its first sentence, shortened"""
+    flat = ' '.join((text or '').split())
+    first = _SENTENCE_END.split(flat, 1)[0]
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[:SUMMARY_LINE_CHARS - 3].rstrip() + '...'
+    return f"{'User asked' if role == 'user' else 'Assistant said'}: {first}"
+
+
+def new_conversation_id():
+    return uuid.uuid4().hex
+
+
+class Conversation:
+    """Turns of one chat, plus the summary of the ones folded out of the prompt window"""
+
+    def __init__(self):
+        # Only the turns still in the prompt window, older ones live on in the summary
+        self.turns = []
+        self.turn_count = 0
+        self.greeted = False
+        self.summary_lines = []
+        self.window_tokens = 0
+        self.last_active = time.time()
+
+
+class ConversationStore:
+    """Conversations by id, least recently active dropped first"""
+
+    def __init__(self, history_budget=None, summary_budget=None, recent_turns=None, max_conversations=None,
+                 idle_seconds=None, max_turn_chars=None):
+        self.history_budget = history_budget or Config.CHAT_HISTORY_TOKEN_BUDGET
+        self.summary_budget = summary_budget or Config.CHAT_SUMMARY_TOKEN_BUDGET
+        self.recent_turns = recent_turns or Config.CHAT_RECENT_TURNS
+        self.max_conversations = max_conversations or Config.CHAT_MAX_CONVERSATIONS
+        self.idle_seconds = idle_seconds or Config.CHAT_CONVERSATION_IDLE_SECONDS
+        self.max_turn_chars = max_turn_chars or Config.CHAT_MAX_TURN_CHARS
+        self._conversations = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'turns': 0, 'truncated_turns': 0, 'compacted_turns': 0, 'expired': 0}
+
+    def _get(self, conversation_id, create=True):
+        conversation = self._conversations.get(conversation_id)
+        now = time.time()
+        if conversation is not None and now - conversation.last_active > self.idle_seconds:
+            del self._conversations[conversation_id]
+            self.stats['expired'] += 1
+            conversation = None
+        if conversation is None and create:
+            conversation = self._conversations[conversation_id] = Conversation()
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+                self.stats['expired'] += 1
+        if conversation is not None:
+            conversation.last_active = now
+            self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def _compact(self, conversation):
+        """Fold the oldest turns in the window into the summary until the window fits its budget"""
+        while conversation.window_tokens > self.history_budget and len(conversation.turns) > self.recent_turns:
+            role, text, tokens = conversation.turns.pop(0)
+            conversation.summary_lines.append(summarize_turn(role, text))
+            conversation.window_tokens -= tokens
+            self.stats['compacted_turns'] += 1
+        # The summary rolls too: its oldest lines go first
+        while (len(conversation.summary_lines) > 1
+               and sum(estimate_tokens(line) for line in conversation.summary_lines) > self.summary_budget):
+            conversation.summary_lines.pop(0)
+
+    def _clip(self, text):
+        if len(text) <= self.max_turn_chars:
+            return text
+        return text[:self.max_turn_chars - 3].rstrip() + '...'
+
+    def append(self, conversation_id, role, text):
+        """Add a turn ('user' or 'assistant') to a conversation"""
+        text = text or ''
+        truncated = len(text) > self.max_turn_chars
+        text = self._clip(text)
+        tokens = estimate_tokens(text)
+        with self._lock:
+            conversation = self._get(conversation_id)
+            conversation.turns.append((role, text, tokens))
+            conversation.turn_count += 1
+            conversation.greeted = conversation.greeted or role == 'assistant'
+            conversation.window_tokens += tokens
+            self.stats['turns'] += 1
+            self.stats['truncated_turns'] += truncated
+            self._compact(conversation)
+
+    def retract(self, conversation_id, role, text):
+        """Take back the latest turn if it is this one, for a message that was never answered"""
+        text = self._clip(text or '')
+        with self._lock:
+            conversation = self._get(conversation_id, create=False)
+            if conversation is None or not conversation.turns or conversation.turns[-1][:2] != (role, text):
+                return False
+            _, _, tokens = conversation.turns.pop()
+            conversation.turn_count -= 1
+            conversation.window_tokens -= tokens
+            self.stats['turns'] -= 1
+            return True
+
+    def context(self, conversation_id):
+        """
+        What a prompt needs from a conversation
+
+        Returns {'summary', 'history', 'greeted', 'turns'}: the summary of
+        older turns (None if nothing was folded yet), the recent turns as
+        [role, text] pairs, whether the assistant has answered yet, and
+        the total number of turns.
+        """
+        with self._lock:
+            conversation = self._get(conversation_id, create=False)
+            if conversation is None:
+                return {'summary': None, 'history': [], 'greeted': False, 'turns': 0}
+            return {
+                'summary': '\n'.join(conversation.summary_lines) or None,
+                'history': [[role, text] for role, text, _ in conversation.turns],
+                'greeted': conversation.greeted,
+                'turns': conversation.turn_count
+            }
+
+    def reset(self, conversation_id):
+        with self._lock:
+            return self._conversations.pop(conversation_id, None) is not None
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['conversations'] = len(self._conversations)
+        return stats
@@ -0,0 +1,230 @@
+"""
+Keyword intent router for the AI assistant
+
+"What's the Chelsea score right now" or "show me the top 5" only need
+data we already hold as chat context snapshots, so a model call adds
+seconds and nothing else. IntentRouter recognises a few such intents by
+keywords and answers them from the live and standings snapshots with
+fixed templates:
+
+    live_scores    every live match, or one team's match
+    top_n          the top (or bottom) N of the table
+    leader         who is top of the table
+    team_position  where a team is and how many points it has
+    table          the whole table
+
+Anything else, including predictions, history, news, other competitions
+and follow-ups, gets None and goes to the model.
+"""
+
+import re
+import threading
+
+from app.utils.team_names import TEAM_NAME_ALIASES, canonical_team_name
+
+NUMBER_WORDS = {'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8,
+                'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'fifteen': 15, 'twenty': 20}
+MAX_WORDS = 16
+
+_NUMBER = r'(\d{1,2}|' + '|'.join(NUMBER_WORDS) + r')'
+# Questions these words appear in need more than a snapshot lookup
+DECLINE_PATTERN = re.compile(
+    r"\b(predict\w*|will|would|could|should|chance\w*|odds|why|how come|explain|history|historical|ever|"
+    r"news|transfer\w*|injur\w*|last season|next season|\d{4}|next|when|upcoming|fixture\w*|"
+    r"form|compare|better|players?|scorer\w*|assists?|manager|was|did|yesterday|last night|final|results?)\b")
+# The snapshots only hold the Premier League, so other competitions go to the model
+COMPETITION_PATTERN = re.compile(
+    r"\b(la ?liga|serie a|bundesliga|ligue 1|eredivisie|primeira liga|mls|championship|league one|league two|"
+    r"champions league|europa( conference)? league|conference league|ucl|uel|fa cup|carabao cup|league cup|efl|"
+    r"world cup|euros?|nations league|copa|(spanish|italian|german|french|dutch|scottish) league)\b")
+# Follow-ups ("and their position?") depend on earlier turns
+FOLLOW_UP_PATTERN = re.compile(r"^(and|what about|how about)\b|\b(it|they|them|their|he|she|him|her|his|else|again|"
+                               r"same|previous|above)\b")
+LIVE_PATTERN = re.compile(r"\b(live|happening|going on|in play|playing now|playing right now|currently playing)\b")
+# "score" alone is as often about a past result or a video game, so it needs a live cue too
+SCORE_PATTERN = re.compile(r"\b(scores?|scoreline|score line)\b")
+LIVE_CUE_PATTERN = re.compile(r"\b(live|now|currently|at the moment)\b")
+TOP_N_PATTERN = re.compile(r"\b(top|bottom|last)\s+" + _NUMBER + r"\b")
+RELEGATION_PATTERN = re.compile(r"\b(relegation zone|drop zone|in the relegation|going down)\b")
+LEADER_PATTERN = re.compile(r"\b(top of the (table|league)|(who is|who's|whos) (top|first|leading|1st)|"
+                            r"(leading|leads|leaders? of) the (table|league)|league leaders?|first place|"
+                            r"top spot)\b")
+TABLE_PATTERN = re.compile(r"\b(table|standings?|league positions?)\b")
+POSITION_PATTERN = re.compile(r"\b(position|place|placed|rank|ranked|where|points|table|standings?)\b")
+
+
+def _ordinal(number):
+    if 10 <= number % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+    return f'{number}{suffix}'
+
+
+def _signed(number):
+    try:
+        return f'{int(number):+d}'
+    except (TypeError, ValueError):
+        return str(number)
+
+
+def render_table_rows(rows):
+    return '\n'.join(f"{row['position']}. **{row['team']}** – `{row['points']}` pts "
+                     f"(P{row['played']}, W{row['won']} D{row['drawn']} L{row['lost']}, "
+                     f"GD {_signed(row['goal_difference'])})" for row in rows)
+
+
+def render_live_match(match):
+    minute = match.get('minute')
+    minute = f" ({minute}')" if minute not in (None, '', 'N/A') else ''
+    return f"- **{match['homeTeam']}** {match['score']} **{match['awayTeam']}**{minute} · {match['competition']}"
+
+
+class IntentRouter:
+    """Answers live-score and standings questions from cached snapshots, without the model"""
+
+    def __init__(self, snapshots, team_names=()):
+        # snapshots(sources) -> {source: {'data': ...}}, e.g. ChatContextBuilder.snapshots
+        self.snapshots = snapshots
+        names = set(team_names) | set(TEAM_NAME_ALIASES) | set(TEAM_NAME_ALIASES.values())
+        self._team_names = {}
+        for name in names:
+            self._team_names[name.lower()] = canonical_team_name(name)
+        self._team_pattern = self._compile(self._team_names)
+        self._patterns = {}
+        self._lock = threading.Lock()
+        self.stats = {'questions': 0, 'answered': 0, 'intents': {}}
+
+    @staticmethod
+    def _compile(names):
+        alternatives = sorted((re.escape(name) for name in names), key=len, reverse=True)
+        return re.compile(r"\b(" + '|'.join(alternatives) + r")\b") if alternatives else None
+
+    def _teams_in(self, text, extra_names=()):
+        """Canonical names of the teams a question mentions, including names only the snapshot uses"""
+        names, pattern = self._team_names, self._team_pattern
+        extra = {name.lower(): canonical_team_name(name) for name in extra_names}
+        unknown = frozenset(extra.keys() - names.keys())
+        if unknown:
+            # Snapshot spellings ('Arsenal FC') change rarely, so their patterns are kept
+            names = dict(names, **extra)
+            with self._lock:
+                pattern = self._patterns.get(unknown)
+                if pattern is None:
+                    if len(self._patterns) > 16:
+                        self._patterns.clear()
+                    pattern = self._patterns[unknown] = self._compile(names)
+        teams = []
+        for match in pattern.finditer(text) if pattern else ():
+            team = names[match.group(1)]
+            if team not in teams:
+                teams.append(team)
+        return teams
+
+    def classify(self, prompt):
+        """(intent, details) for a question the router can answer, or (None, None)"""
+        text = ' '.join((prompt or '').lower().replace('’', "'").split())
+        if not text or len(text.split()) > MAX_WORDS:
+            return None, None
+        if DECLINE_PATTERN.search(text) or COMPETITION_PATTERN.search(text) or FOLLOW_UP_PATTERN.search(text):
+            return None, None
+        top_n = TOP_N_PATTERN.search(text)
+        if top_n:
+            count = top_n.group(2)
+            count = int(count) if count.isdigit() else NUMBER_WORDS[count]
+            if 1 <= count <= 20:
+                return 'top_n', {'count': count, 'bottom': top_n.group(1) != 'top'}
+        if RELEGATION_PATTERN.search(text):
+            return 'top_n', {'count': 3, 'bottom': True}
+        if LIVE_PATTERN.search(text) or (SCORE_PATTERN.search(text) and LIVE_CUE_PATTERN.search(text)):
+            return 'live_scores', {'text': text}
+        if LEADER_PATTERN.search(text):
+            return 'leader', {}
+        if POSITION_PATTERN.search(text) and self._teams_in(text):
+            return 'team_position', {'text': text}
+        if TABLE_PATTERN.search(text):
+            return 'table', {'text': text}
+        return None, None
+
+    def _standings(self):
+        return self.snapshots(['standings'])['standings']['data'] or []
+
+    def _answer_live_scores(self, details):
+        matches = self.snapshots(['live'])['live']['data'] or []
+        names = [match[side] for match in matches for side in ('homeTeam', 'awayTeam')]
+        teams = self._teams_in(details['text'], names)
+        if teams:
+            wanted = set(teams)
+            chosen = [match for match in matches
+                      if {canonical_team_name(match['homeTeam']), canonical_team_name(match['awayTeam'])} & wanted]
+            if not chosen:
+                return f"{' and '.join(teams)} {'is' if len(teams) == 1 else 'are'} not playing right now."
+            return "Live now:\n" + '\n'.join(render_live_match(match) for match in chosen)
+        if not matches:
+            return "There are no live matches right now."
+        return "Live now:\n" + '\n'.join(render_live_match(match) for match in matches)
+
+    def _answer_top_n(self, details):
+        standings = self._standings()
+        if not standings:
+            return None
+        count = min(details['count'], len(standings))
+        rows = standings[-count:] if details['bottom'] else standings[:count]
+        heading = f"{'Bottom' if details['bottom'] else 'Top'} {count} of the Premier League table:"
+        return heading + '\n' + render_table_rows(rows)
+
+    def _answer_leader(self, details):
+        standings = self._standings()
+        if not standings:
+            return None
+        leader = standings[0]
+        answer = (f"**{leader['team']}** are top of the Premier League with `{leader['points']}` points "
+                  f"from {leader['played']} matches (GD {_signed(leader['goal_difference'])}).")
+        if len(standings) > 1:
+            gap = leader['points'] - standings[1]['points']
+            answer += f" {standings[1]['team']} are second, {gap} point{'s' if gap != 1 else ''} behind."
+        return answer
+
+    def _answer_team_position(self, details):
+        standings = self._standings()
+        if not standings:
+            return None
+        rows = {canonical_team_name(row['team']): row for row in standings}
+        teams = self._teams_in(details['text'], [row['team'] for row in standings])
+        lines = []
+        for team in teams:
+            row = rows.get(team)
+            if row is None:
+                # Not in this season's table: let the model explain
+                return None
+            lines.append(f"**{row['team']}** are {_ordinal(int(row['position']))} with `{row['points']}` points "
+                         f"from {row['played']} matches (W{row['won']} D{row['drawn']} L{row['lost']}, "
+                         f"GD {_signed(row['goal_difference'])}).")
+        return '\n'.join(lines) or None
+
+    def _answer_table(self, details):
+        standings = self._standings()
+        if not standings:
+            return None
+        if POSITION_PATTERN.search(details['text']) and self._teams_in(details['text'],
+                                                                        [row['team'] for row in standings]):
+            # A team only the current table knows by name ("where is Brentford in the table")
+            return self._answer_team_position(details)
+        return "Premier League table:\n" + render_table_rows(standings)
+
+    def answer(self, prompt):
+        """Templated answer for a recognised intent, or None to send the question to the model"""
+        intent, details = self.classify(prompt)
+        text = getattr(self, f'_answer_{intent}')(details) if intent else None
+        with self._lock:
+            self.stats['questions'] += 1
+            if text is not None:
+                self.stats['answered'] += 1
+                self.stats['intents'][intent] = self.stats['intents'].get(intent, 0) + 1
+        return text
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats, intents=dict(self.stats['intents']))
+        stats['answer_rate'] = round(stats['answered'] / stats['questions'], 3) if stats['questions'] else None
+        return stats
@@ -0,0 +1,173 @@
+"""
+Bounded job queue for AI assistant answers
+
+A Gemini call can take several seconds. Run inside the request, it holds
+a web worker thread the whole time, and a handful of chatters can starve
+/predict and the page routes. Chat requests now only submit a job and get
+its id back. A small pool of chat worker threads runs the jobs, and the
+client polls (or streams) the text as it is generated.
+
+The queue is bounded: when it is full, submit returns None and the route
+answers 503 instead of piling up work. Jobs live in this process only and
+are forgotten a while after they finish.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+
+from app.config import Config
+
+
+def _summary(samples):
+    if not samples:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    values = np.fromiter(samples, dtype=np.float64)
+    return {
+        'mean': round(float(values.mean()), 3),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p95': round(float(np.percentile(values, 95)), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+
+class ChatJob:
+    """One queued answer: its text so far, its status and its timings"""
+
+    def __init__(self, produce, owner=None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.produce = produce
+        self.status = 'queued'
+        self.parts = []
+        self.error = None
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self._changed = threading.Condition()
+
+    @property
+    def text(self):
+        with self._changed:
+            return ''.join(self.parts)
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def _publish(self, part=None, status=None):
+        with self._changed:
+            if part:
+                self.parts.append(part)
+            if status:
+                self.status = status
+            self._changed.notify_all()
+
+    def read(self, offset=0, timeout=None):
+        """
+        Text after character offset, waiting up to timeout for some if there is none yet
+
+        Returns (text, new offset, finished).
+        """
+        with self._changed:
+            text = ''.join(self.parts)
+            if len(text) <= offset and not self.finished and timeout:
+                self._changed.wait(timeout)
+                text = ''.join(self.parts)
+            return text[offset:], len(text), self.finished
+
+
+class ChatJobQueue:
+    """Bounded queue of chat jobs run by a fixed pool of worker threads"""
+
+    def __init__(self, workers=None, max_queued=None, job_ttl=None):
+        self.workers = workers or Config.CHAT_WORKERS
+        self.max_queued = max_queued or Config.CHAT_QUEUE_SIZE
+        self.job_ttl = job_ttl or Config.CHAT_JOB_TTL
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.running = 0
+        self.stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+        self._wait_ms = deque(maxlen=1000)
+        self._run_ms = deque(maxlen=1000)
+        self._latency_ms = deque(maxlen=1000)
+        self._threads = [threading.Thread(target=self._run, name=f'chat-worker-{i}', daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, produce, owner=None):
+        """
+        Queue a job; produce() must return an iterable of text pieces
+
+        Returns the ChatJob, or None when the queue is full.
+        """
+        job = ChatJob(produce, owner)
+        with self._lock:
+            self._expire()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self.stats['rejected'] += 1
+                return None
+            self._jobs[job.id] = job
+            self.stats['submitted'] += 1
+        return job
+
+    def get(self, job_id, owner=None):
+        """A job by id, None if it is unknown, expired or belongs to someone else"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (job.owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def position(self, job):
+        """Jobs ahead of this one in the queue (0 once it is running)"""
+        if job.status != 'queued':
+            return 0
+        with self._queue.mutex:
+            waiting = list(self._queue.queue)
+        return waiting.index(job) if job in waiting else 0
+
+    def _expire(self):
+        now = time.perf_counter()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and now - job.finished_at > self.job_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            job.started_at = time.perf_counter()
+            job._publish(status='running')
+            with self._lock:
+                self.running += 1
+            status = 'done'
+            try:
+                for part in job.produce():
+                    job._publish(part)
+            except Exception as e:
+                print(f"Error running chat job {job.id}: {e}")
+                job.error = str(e)
+                status = 'failed'
+            job.finished_at = time.perf_counter()
+            job._publish(status=status)
+            with self._lock:
+                self.running -= 1
+                self.stats['completed' if status == 'done' else 'failed'] += 1
+                self._wait_ms.append((job.started_at - job.submitted_at) * 1000)
+                self._run_ms.append((job.finished_at - job.started_at) * 1000)
+                self._latency_ms.append((job.finished_at - job.submitted_at) * 1000)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, workers=self.workers, capacity=self.max_queued, queue_depth=self._queue.qsize(),
+                        running=self.running, tracked_jobs=len(self._jobs), queue_wait_ms=_summary(self._wait_ms),
+                        run_ms=_summary(self._run_ms), latency_ms=_summary(self._latency_ms))
@@ -0,0 +1,60 @@
+"""
+Language models for the AI assistant
+
+Production chat goes to Gemini through the google.generativeai SDK.
+StubChatModel is a local stand-in with the same generate_content(prompt,
+stream=...) interface, for tests, benchmarks and running without an API
+key. It answers after a configurable first-token delay, then emits its
+reply a few words at a time.
+"""
+
+import time
+
+from app.config import Config
+
+
+class StubResponse:
+    """A finished (or streamed) piece of text, shaped like the SDK's responses"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubChatModel:
+    """Deterministic local model: echoes the question back, one chunk at a time"""
+
+    def __init__(self, first_token_delay=None, chunk_delay=None, words_per_chunk=3):
+        self.first_token_delay = (Config.CHAT_STUB_FIRST_TOKEN_MS if first_token_delay is None
+                                  else first_token_delay) / 1000.0
+        self.chunk_delay = (Config.CHAT_STUB_CHUNK_MS if chunk_delay is None else chunk_delay) / 1000.0
+        self.words_per_chunk = words_per_chunk
+        self.calls = 0
+
+    def reply_for(self, prompt):
+        question = prompt.rsplit('User question:', 1)[-1].split('User greeted status:', 1)[0].strip()
+        return (f"This is the local ScoreSight assistant. You asked: \"{question}\". "
+                f"Live answers need the Gemini model, set CHAT_MODEL=gemini and GOOGLE_API_KEY.")
+
+    def _chunks(self, text):
+        words = text.split(' ')
+        time.sleep(self.first_token_delay)
+        for start in range(0, len(words), self.words_per_chunk):
+            if start:
+                time.sleep(self.chunk_delay)
+            piece = ' '.join(words[start:start + self.words_per_chunk])
+            yield StubResponse(piece if start == 0 else ' ' + piece)
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        chunks = self._chunks(self.reply_for(prompt))
+        if stream:
+            return chunks
+        return StubResponse(''.join(chunk.text for chunk in chunks))
+
+
+def response_text(chunk):
+    """Text of a response or stream chunk, '' when the SDK has none (e.g. blocked by safety filters)"""
+    try:
+        return chunk.text or ''
+    except (ValueError, AttributeError):
+        return ''
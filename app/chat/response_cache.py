@@ -0,0 +1,228 @@
+"""
+Response cache for the AI assistant
+
+Lots of chat questions are the same question in different words ("who's
+top of the table", "Who is top of the league table?"). Answers are cached
+under the normalised prompt, the snapshot versions of the data sources
+the question uses and the greeting state. When any of that data changes,
+the versions no longer match and the entry is dropped.
+
+Near-duplicates are found through a small inverted index over content
+words: candidates that share a word are scored by Jaccard similarity.
+Team names and numbers must match exactly, so "when do Arsenal play next"
+never answers "when do Chelsea play next".
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils.team_names import TEAM_NAME_ALIASES
+
+MAX_ENTRIES = 500
+MAX_AGE_SECONDS = 1800
+SIMILARITY_THRESHOLD = 0.75
+
+CONTRACTIONS = {
+    "what's": "what is", "who's": "who is", "when's": "when is", "where's": "where is", "how's": "how is",
+    "it's": "it is", "isn't": "is not", "aren't": "are not", "don't": "do not", "doesn't": "does not",
+    "didn't": "did not", "won't": "will not", "can't": "can not", "who're": "who are",
+}
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'do', 'does', 'did', 'to', 'of', 'in', 'on', 'at',
+    'for', 'me', 'my', 'please', 'can', 'could', 'would', 'you', 'tell', 'show', 'give', 'i', 'what', 'which',
+    'who', 'whos', 'right', 'now', 'currently', 'current', 'team', 'club', 'hey', 'hi', 'so', 'about', 'know',
+    'let', 'us', 'there', 'any', 'some', 'will', 'go', 'going',
+}
+# Different words for the same thing
+SYNONYMS = {
+    'standings': 'table', 'standing': 'table', 'ladder': 'table', 'league': 'table',
+    'leading': 'top', 'leads': 'top', 'leader': 'top', 'leaders': 'top', 'first': 'top', '1st': 'top',
+    'fixture': 'match', 'fixtures': 'match', 'game': 'match', 'games': 'match', 'matches': 'match',
+    'upcoming': 'next', 'playing': 'play', 'plays': 'play', 'face': 'play', 'facing': 'play',
+    'latest': 'news', 'updates': 'news', 'update': 'news',
+}
+# Follow-ups lean on earlier turns, so their answers can't be shared
+FOLLOW_UP_WORDS = {'it', 'they', 'them', 'their', 'that', 'those', 'these', 'this', 'he', 'she', 'him', 'her',
+                   'his', 'else', 'also', 'again', 'more', 'same', 'previous', 'above'}
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _stem(word):
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'ws')):
+        return word[:-1]
+    return word
+
+
+def tokenize(prompt):
+    """Lowercased words of a prompt with contractions expanded"""
+    words = []
+    for word in _WORD.findall((prompt or '').lower()):
+        words.extend(CONTRACTIONS.get(word, word.replace("'", '')).split())
+    return words
+
+
+def normalize_prompt(prompt):
+    """Canonical form of a prompt: content words, synonyms merged, in order"""
+    words = [SYNONYMS.get(word, word) for word in tokenize(prompt) if word not in STOPWORDS]
+    return ' '.join(_stem(word) for word in words)
+
+
+def is_self_contained(prompt):
+    """False for follow-ups ("what about them?") whose answer depends on the conversation"""
+    words = tokenize(prompt)
+    if not words:
+        return False
+    return not FOLLOW_UP_WORDS.intersection(words) and words[:2] != ['what', 'about'] and words[0] != 'and'
+
+
+def team_terms(team_names=()):
+    """Lowercased words that make up team names, for the must-match check"""
+    names = set(team_names) | set(TEAM_NAME_ALIASES) | set(TEAM_NAME_ALIASES.values())
+    terms = set()
+    for name in names:
+        terms.update(_stem(word) for word in tokenize(name) if word not in STOPWORDS)
+    # Words that are also common in questions ('city', 'united') can't pin down a team on their own
+    return terms - {'city', 'united', 'town', 'athletic', 'albion', 'park', 'man'}
+
+
+class ResponseCache:
+    """Answers keyed by (normalised prompt, data versions, greeted), with near-duplicate lookups"""
+
+    def __init__(self, protected_terms=None, max_entries=MAX_ENTRIES, max_age=MAX_AGE_SECONDS,
+                 threshold=SIMILARITY_THRESHOLD):
+        self.protected_terms = set(protected_terms if protected_terms is not None else team_terms())
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._index = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'exact_hits': 0, 'similar_hits': 0, 'misses': 0, 'uncacheable': 0,
+                      'stores': 0, 'stale_stores': 0, 'invalidated': 0, 'evicted': 0, 'saved_seconds': 0.0}
+
+    @staticmethod
+    def _scope(versions, greeted):
+        return (tuple(sorted(versions.items())), bool(greeted))
+
+    def _pinned(self, words):
+        """Words two prompts must share exactly: team names and numbers"""
+        return frozenset(word for word in words if word in self.protected_terms or word.isdigit())
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for word in entry['words']:
+            keys = self._index.get(word)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[word]
+
+    def _observe(self, versions):
+        """Note the current data versions, dropping entries built on versions that have been replaced"""
+        changed = {(source, old) for source, old in self._versions.items()
+                   if source in versions and versions[source] != old}
+        if changed:
+            stale = [key for key in self._entries if changed.intersection(key[1][0])]
+            for key in stale:
+                self._remove(key)
+            self.stats['invalidated'] += len(stale)
+        self._versions.update(versions)
+
+    def _fresh(self, key, entry, now):
+        if now - entry['stored_at'] > self.max_age:
+            self._remove(key)
+            self.stats['evicted'] += 1
+            return False
+        return True
+
+    def lookup(self, prompt, versions, greeted=False):
+        """Cached answer for a prompt against the current data versions, or None"""
+        with self._lock:
+            self.stats['lookups'] += 1
+            self._observe(versions)
+            if not is_self_contained(prompt):
+                self.stats['uncacheable'] += 1
+                return None
+            normalized = normalize_prompt(prompt)
+            scope = self._scope(versions, greeted)
+            now = time.time()
+
+            entry = self._entries.get((normalized, scope))
+            hit = 'exact_hits' if entry is not None and self._fresh((normalized, scope), entry, now) else None
+            if hit is None:
+                # Near-duplicates: entries sharing a content word, same data and greeting state
+                words = set(normalized.split())
+                pinned = self._pinned(words)
+                best, best_score = None, self.threshold
+                candidates = set().union(*(self._index.get(word, ()) for word in words)) if words else set()
+                for key in candidates:
+                    if key[1] != scope:
+                        continue
+                    other = self._entries[key]
+                    if other['pinned'] != pinned:
+                        continue
+                    score = len(words & other['words']) / len(words | other['words'])
+                    if score >= best_score and self._fresh(key, other, now):
+                        best, best_score = key, score
+                if best is not None:
+                    entry, hit = self._entries[best], 'similar_hits'
+                    normalized = best[0]
+
+            if hit is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats[hit] += 1
+            self.stats['saved_seconds'] += entry['seconds']
+            self._entries.move_to_end((normalized, scope))
+            entry['hits'] += 1
+            return entry['response']
+
+    def store(self, prompt, versions, greeted, response, seconds):
+        """Remember an answer and how long it took to generate, unless its data versions are out of date"""
+        if not response or not is_self_contained(prompt):
+            return False
+        normalized = normalize_prompt(prompt)
+        words = set(normalized.split())
+        key = (normalized, self._scope(versions, greeted))
+        with self._lock:
+            # A slow answer built on data that has since been replaced is dropped,
+            # rather than letting its old versions invalidate the newer entries
+            if any(self._versions.get(source, version) != version for source, version in versions.items()):
+                self.stats['stale_stores'] += 1
+                return False
+            self._versions.update(versions)
+            self._remove(key)
+            self._entries[key] = {'response': response, 'words': words, 'pinned': self._pinned(words),
+                                  'seconds': float(seconds), 'stored_at': time.time(), 'hits': 0}
+            for word in words:
+                self._index.setdefault(word, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats['evicted'] += 1
+            self.stats['stores'] += 1
+        return True
+
+    def invalidate(self, source=None):
+        """Drop every entry, or every entry built on one data source"""
+        with self._lock:
+            keys = [key for key in self._entries
+                    if source is None or any(name == source for name, _ in key[1][0])]
+            for key in keys:
+                self._remove(key)
+            self.stats['invalidated'] += len(keys)
+            return len(keys)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+        hits = stats['exact_hits'] + stats['similar_hits']
+        stats['hit_rate'] = round(hits / stats['lookups'], 3) if stats['lookups'] else None
+        stats['saved_seconds'] = round(stats['saved_seconds'], 3)
+        return stats
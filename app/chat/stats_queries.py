@@ -0,0 +1,280 @@
+"""
+Local answers to historical stats questions
+
+"How many goals did Liverpool score at home in 2017-18" is answered from
+our own match data instead of Gemini, which has never seen it. Per team,
+season and venue totals are computed once into one array. Questions are
+matched through an inverted index of phrases (team names and aliases,
+season spellings, stat names) to the team, season, venue and stat they
+mean.
+
+Anything the index can't pin down completely (no team, no stat, a season
+we don't have, a prediction or a head-to-head) gets None, and the
+question goes to the model as before. So does any question with words
+outside a small list of fillers, since those words usually make it a
+different question (a player's goals, the most or fewest, the title).
+"""
+
+import re
+import threading
+import time
+
+import numpy as np
+
+from app.config import Config
+from app.data.columnar import read_unified_dataset
+from app.utils.team_names import TEAM_NAME_ALIASES
+
+# key: (label, phrases that name it)
+STATS = {
+    'played': ('matches played', ['played', 'appearances']),
+    'wins': ('wins', ['wins', 'win', 'won', 'victories']),
+    'draws': ('draws', ['draws', 'draw', 'drew', 'drawn']),
+    'losses': ('losses', ['losses', 'loss', 'lost', 'lose', 'defeats']),
+    'points': ('points', ['points', 'pts']),
+    'goals_scored': ('goals scored', ['scored', 'score', 'goals scored', 'goals for']),
+    'goals_conceded': ('goals conceded', ['conceded', 'concede', 'goals conceded', 'goals against', 'let in']),
+    'half_time_goals': ('first-half goals', ['first half goals', 'half time goals', 'halftime goals']),
+    'clean_sheets': ('clean sheets', ['clean sheets', 'clean sheet', 'shutouts']),
+    'failed_to_score': ('matches without scoring', ['failed to score', 'without scoring']),
+    'shots': ('shots', ['shots']),
+    'shots_on_target': ('shots on target', ['shots on target', 'on target']),
+    'corners': ('corners', ['corners', 'corner kicks']),
+    'fouls': ('fouls', ['fouls', 'fouls committed']),
+    'yellow_cards': ('yellow cards', ['yellow cards', 'yellows', 'bookings']),
+    'red_cards': ('red cards', ['red cards', 'reds', 'sendings off', 'sent off']),
+}
+STAT_KEYS = list(STATS)
+# Vague words, only used when nothing more specific names a stat
+WEAK_STATS = {'goals': ['goals_scored'], 'matches': ['played'], 'games': ['played'],
+              'cards': ['yellow_cards', 'red_cards']}
+
+VENUES = {'home': ['home', 'at home', 'home games', 'home matches'],
+          'away': ['away', 'on the road', 'away games', 'away matches', 'away from home']}
+VENUE_LABELS = {'home': 'home matches', 'away': 'away matches', None: 'all matches'}
+ALL_SEASONS_WORDS = {'total', 'overall', 'combined', 'altogether', 'ever', 'all'}
+# Questions about the future, the present or a match-up aren't for this engine
+DECLINE_WORDS = {'predict', 'prediction', 'predictions', 'will', 'chance', 'chances', 'odds', 'favourite',
+                 'favorite', 'next', 'today', 'tonight', 'tomorrow', 'this', 'current', 'currently', 'last',
+                 'live', 'now', 'why', 'should'}
+HEAD_TO_HEAD_WORDS = {'against', 'vs', 'versus', 'v', 'beat', 'beaten', 'between', 'head'}
+# The only words a question may have besides teams, seasons, stats and venues. Anything else
+# ("most", "Salah", "league", "fewest ... or ...") asks something the totals don't answer.
+FILLER_WORDS = {'how', 'many', 'much', 'what', 'was', 'were', 'is', 'are', 'did', 'do', 'does', 'have', 'has',
+                'had', 'get', 'got', 'in', 'the', 'a', 'an', 'of', 'for', 'at', 'and', 'during', 'season',
+                'seasons', 'number', 'their', 'team', 'tell', 'me', 'show', 'give', 'stats', 'statistics',
+                'record', 'please', 'with', 'from', 'to'} | ALL_SEASONS_WORDS
+MAX_PHRASE_WORDS = 4
+
+_TOKEN = re.compile(r"\d{2,4}[-/]\d{2,4}|[a-z0-9]+")
+_YEAR_LIKE = re.compile(r"^\d{2,4}[-/]\d{2,4}$|^(19|20)\d\d$")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def tokenize(text):
+    """Lowercased words, with season spellings like 2017-18 kept as one token"""
+    text = (text or '').lower().replace("'s", '').replace("’s", '').replace('&', ' and ')
+    return _TOKEN.findall(text)
+
+
+def season_spellings(season):
+    """Ways of writing a season: 2017-2018, 2017-18, 2017/18, 17/18, ..."""
+    start, end = season.split('-')
+    spellings = set()
+    for separator in ('-', '/'):
+        spellings.update({f'{start}{separator}{end}', f'{start}{separator}{end[2:]}',
+                          f'{start[2:]}{separator}{end[2:]}'})
+    return spellings
+
+
+def season_label(season):
+    start, end = season.split('-')
+    return f'{start}-{end[2:]}'
+
+
+class StatsQueryEngine:
+    """Precomputed team/season/venue totals and the phrase index used to read questions"""
+
+    def __init__(self, matches):
+        self.teams = sorted(set(matches['HomeTeam'].astype(str)) | set(matches['AwayTeam'].astype(str)))
+        self.seasons = sorted(matches['Season'].astype(str).unique())
+        team_codes = {team: i for i, team in enumerate(self.teams)}
+        season_codes = {season: i for i, season in enumerate(self.seasons)}
+        season_idx = matches['Season'].astype(str).map(season_codes).to_numpy()
+
+        # totals[team, season, venue (0 home, 1 away), stat]
+        self.totals = np.zeros((len(self.teams), len(self.seasons), 2, len(STAT_KEYS)), dtype=np.int32)
+        result = matches['FTR'].astype(str).to_numpy()
+        for venue, (side, other, won, lost) in enumerate((('H', 'A', 'H', 'A'), ('A', 'H', 'A', 'H'))):
+            team_col = 'HomeTeam' if side == 'H' else 'AwayTeam'
+            team_idx = matches[team_col].astype(str).map(team_codes).to_numpy()
+            scored = matches[f'FT{side}G'].to_numpy(dtype=np.int32)
+            conceded = matches[f'FT{other}G'].to_numpy(dtype=np.int32)
+            wins = result == won
+            draws = result == 'D'
+            columns = {
+                'played': np.ones(len(matches), dtype=np.int32),
+                'wins': wins,
+                'draws': draws,
+                'losses': result == lost,
+                'points': 3 * wins + draws,
+                'goals_scored': scored,
+                'goals_conceded': conceded,
+                'half_time_goals': matches[f'HT{side}G'],
+                'clean_sheets': conceded == 0,
+                'failed_to_score': scored == 0,
+                'shots': matches[f'{side}S'],
+                'shots_on_target': matches[f'{side}ST'],
+                'corners': matches[f'{side}C'],
+                'fouls': matches[f'{side}F'],
+                'yellow_cards': matches[f'{side}Y'],
+                'red_cards': matches[f'{side}R'],
+            }
+            for stat, values in enumerate(columns.values()):
+                np.add.at(self.totals[:, :, venue, stat], (team_idx, season_idx),
+                          np.asarray(values, dtype=np.int32))
+
+        self.index = self._build_index()
+        self._lock = threading.Lock()
+        self.stats = {'questions': 0, 'answered': 0, 'seconds': 0.0}
+
+    def _build_index(self):
+        """Phrase (tuple of words) -> list of (kind, value)"""
+        index = {}
+
+        def add(phrase, kind, value):
+            words = tuple(tokenize(phrase))
+            if words and (kind, value) not in index.setdefault(words, []):
+                index[words].append((kind, value))
+
+        for team in self.teams:
+            add(team, 'team', team)
+        for alias, team in TEAM_NAME_ALIASES.items():
+            if team in self.teams:
+                add(alias, 'team', team)
+        for season in self.seasons:
+            for spelling in season_spellings(season):
+                add(spelling, 'season', season)
+        for stat, (_, phrases) in STATS.items():
+            for phrase in phrases:
+                add(phrase, 'stat', stat)
+        for word, stats in WEAK_STATS.items():
+            for stat in stats:
+                add(word, 'weak_stat', stat)
+        for venue, phrases in VENUES.items():
+            for phrase in phrases:
+                add(phrase, 'venue', venue)
+        return index
+
+    def parse(self, question):
+        """
+        What a question asks for, read through the phrase index
+
+        Longest phrases win, so "shots on target" is one stat rather than
+        shots plus something else. Returns a dict of teams, seasons, stats,
+        venue and the words left over.
+        """
+        words = tokenize(question)
+        found = {'team': [], 'season': [], 'stat': [], 'weak_stat': [], 'venue': []}
+        leftover = []
+        position = 0
+        while position < len(words):
+            for length in range(min(MAX_PHRASE_WORDS, len(words) - position), 0, -1):
+                matches = self.index.get(tuple(words[position:position + length]))
+                if matches:
+                    for kind, value in matches:
+                        if value not in found[kind]:
+                            found[kind].append(value)
+                    position += length
+                    break
+            else:
+                leftover.append(words[position])
+                position += 1
+        stats = found['stat'] or found['weak_stat']
+        if len(stats) > 1 and 'played' in stats:
+            # Matches played are shown with every answer anyway
+            stats.remove('played')
+        return {'teams': found['team'], 'seasons': found['season'], 'stats': stats,
+                'venue': found['venue'][0] if len(found['venue']) == 1 else None, 'leftover': leftover}
+
+    def answer(self, question):
+        """Templated answer from the match data, or None when the question isn't one we can answer exactly"""
+        started = time.perf_counter()
+        parsed = self.parse(question)
+        text = self._render(parsed)
+        with self._lock:
+            self.stats['questions'] += 1
+            if text is not None:
+                self.stats['answered'] += 1
+                self.stats['seconds'] += time.perf_counter() - started
+        return text
+
+    def _render(self, parsed):
+        teams, seasons, stats, leftover = parsed['teams'], parsed['seasons'], parsed['stats'], parsed['leftover']
+        if not teams or not stats:
+            return None
+        if DECLINE_WORDS.intersection(leftover) or any(_YEAR_LIKE.match(word) for word in leftover):
+            # A prediction, the present day, or a season we don't have data for
+            return None
+        if len(teams) > 1 and HEAD_TO_HEAD_WORDS.intersection(leftover):
+            return None
+        if not FILLER_WORDS.issuperset(leftover):
+            # Leftover words change the question (a player, a ranking, the title race)
+            return None
+        if not seasons:
+            if not ALL_SEASONS_WORDS.intersection(leftover):
+                return None
+            seasons = [None]
+
+        venue = parsed['venue']
+        venues = [0] if venue == 'home' else [1] if venue == 'away' else [0, 1]
+        first, last = season_label(self.seasons[0]), season_label(self.seasons[-1])
+        lines = [f"From ScoreSight's match data ({VENUE_LABELS[venue]}):"]
+        for team in teams:
+            team_totals = self.totals[self.teams.index(team)][:, venues].sum(axis=1)
+            for season in seasons:
+                if season is None:
+                    row, label = team_totals.sum(axis=0), f'{first} to {last}'
+                else:
+                    row, label = team_totals[self.seasons.index(season)], season_label(season)
+                played = int(row[STAT_KEYS.index('played')])
+                if not played:
+                    lines.append(f"- **{team}**, {label}: no Premier League matches in our data")
+                    continue
+                values = ', '.join(f"{STATS[stat][0]} `{int(row[STAT_KEYS.index(stat)])}`" for stat in stats)
+                lines.append(f"- **{team}**, {label}: {values} ({played} matches)")
+        return '\n'.join(lines)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['answer_rate'] = round(stats['answered'] / stats['questions'], 3) if stats['questions'] else None
+        stats['avg_answer_ms'] = round(stats.pop('seconds') * 1000 / stats['answered'], 3) if stats['answered'] else None
+        return stats
+
+
+def get_stats_engine():
+    """Shared engine for the web app, built from the unified dataset on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                try:
+                    started = time.perf_counter()
+                    _engine = StatsQueryEngine(read_unified_dataset(Config.DATASET_PATH))
+                    print(f"Stats query engine ready: {len(_engine.teams)} teams, {len(_engine.seasons)} seasons, "
+                          f"{len(_engine.index)} phrases in {time.perf_counter() - started:.2f}s")
+                except Exception as e:
+                    print(f"Error building stats query engine: {e}")
+                    return None
+    return _engine
+
+
+if __name__ == "__main__":
+    # python -m app.chat.stats_queries "how many goals did Liverpool score at home in 2017-18"
+    import sys
+
+    engine = get_stats_engine()
+    print(engine.answer(' '.join(sys.argv[1:])) or 'No local answer, this question would go to the model')
@@ -28,6 +28,54 @@ class Config:
     # Model paths
     MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'models')
     
+    # Historical match data and features derived from it
+    DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'processed', 'unified_dataset.csv')
+    FEATURE_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'processed', 'team_form.npz')
+    RATINGS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'processed', 'team_ratings.npz')
+    HEAD_TO_HEAD_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'processed', 'head_to_head.npz')
+    PARTITIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'processed', 'partitions')
+    
+    # Inference settings
+    # Number of worker processes for model inference (0 = predict in the request thread)
+    INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', '0'))
+    # Seconds to wait for a worker before falling back to inline prediction
+    INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', '5'))
+    # Micro-batching of concurrent prediction requests
+    PREDICTION_BATCHING = os.getenv('PREDICTION_BATCHING', 'false').lower() in ('1', 'true', 'yes')
+    PREDICTION_BATCH_MAX_SIZE = int(os.getenv('PREDICTION_BATCH_MAX_SIZE', '32'))
+    PREDICTION_BATCH_MAX_WAIT_MS = float(os.getenv('PREDICTION_BATCH_MAX_WAIT_MS', '5'))
+    
+    # AI assistant: seconds each data snapshot stays fresh for chat context
+    CHAT_SNAPSHOT_TTLS = {
+        'live': float(os.getenv('CHAT_LIVE_TTL', '30')),
+        'upcoming': float(os.getenv('CHAT_UPCOMING_TTL', '300')),
+        'standings': float(os.getenv('CHAT_STANDINGS_TTL', '600')),
+        'news': float(os.getenv('CHAT_NEWS_TTL', '900')),
+    }
+    # After a failed fetch the previous snapshot is served, and the fetch retried after this many seconds
+    CHAT_SNAPSHOT_RETRY_SECONDS = float(os.getenv('CHAT_SNAPSHOT_RETRY_SECONDS', '15'))
+    
+    # Model answering chat questions: 'gemini', or 'stub' for the local test model
+    CHAT_MODEL = os.getenv('CHAT_MODEL', 'gemini').lower()
+    CHAT_STUB_FIRST_TOKEN_MS = float(os.getenv('CHAT_STUB_FIRST_TOKEN_MS', '200'))
+    CHAT_STUB_CHUNK_MS = float(os.getenv('CHAT_STUB_CHUNK_MS', '50'))
+    
+    # Server-side chat history: token budgets for the recent turns and the summary of older ones
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', '1500'))
+    CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv('CHAT_SUMMARY_TOKEN_BUDGET', '400'))
+    # Latest turns always kept word for word, however long they are
+    CHAT_RECENT_TURNS = int(os.getenv('CHAT_RECENT_TURNS', '4'))
+    # Longer turns are cut to this many characters before they are stored
+    CHAT_MAX_TURN_CHARS = int(os.getenv('CHAT_MAX_TURN_CHARS', '4000'))
+    CHAT_MAX_CONVERSATIONS = int(os.getenv('CHAT_MAX_CONVERSATIONS', '1000'))
+    CHAT_CONVERSATION_IDLE_SECONDS = float(os.getenv('CHAT_CONVERSATION_IDLE_SECONDS', '7200'))
+    
+    # Chat answers run on their own worker threads behind a bounded queue, not in web request threads
+    CHAT_WORKERS = int(os.getenv('CHAT_WORKERS', '4'))
+    CHAT_QUEUE_SIZE = int(os.getenv('CHAT_QUEUE_SIZE', '32'))
+    # Seconds a finished chat job can still be polled
+    CHAT_JOB_TTL = float(os.getenv('CHAT_JOB_TTL', '300'))
+    
     # Static files
     STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
     
@@ -0,0 +1,3 @@
+"""
+Match data storage for ScoreSight application
+"""
\ No newline at end of file
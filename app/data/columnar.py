@@ -0,0 +1,271 @@
+"""
+Columnar, typed storage for the unified match dataset
+
+The CSV keeps every count as text like '21.0' and has to be re-parsed
+(with type inference) on every read. Here each column is its own .npy file
+with a tight dtype:
+- counts and goals are int8 (int16 if a value doesn't fit)
+- team names, results and seasons are int16/int8 category codes
+- dates are datetime64[D]
+
+A schema.json next to them lists the columns and category labels.
+Loading memory-maps the files, so reading a few columns of a big dataset
+costs only those columns' pages.
+"""
+
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+SCHEMA_FILENAME = 'schema.json'
+
+# Match statistics stored as small integers
+COUNT_COLUMNS = ['HTHG', 'HTAG', 'FTHG', 'FTAG', 'HS', 'AS', 'HST', 'AST',
+                 'HC', 'AC', 'HF', 'AF', 'HY', 'AY', 'HR', 'AR']
+TEAM_COLUMNS = ['HomeTeam', 'AwayTeam']
+CATEGORY_COLUMNS = ['HTR', 'FTR', 'Season', 'League']
+DATE_COLUMNS = ['Date']
+
+
+def _smallest_int_dtype(values):
+    """int8 when every value fits, otherwise int16/int32"""
+    if len(values) == 0:
+        return np.int8
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def _category_codes(values, categories):
+    codes = pd.Categorical(values, categories=categories).codes
+    return codes.astype(np.int8 if len(categories) < 127 else np.int16)
+
+
+def write_columnar(df, path):
+    """
+    Write a match dataset as one typed .npy file per column plus a schema
+
+    Rows without teams or a full-time score (blank lines in the source
+    files) are dropped, so count columns never need a missing value.
+    Returns the schema.
+    """
+    complete = df[TEAM_COLUMNS + ['FTHG', 'FTAG']].notna().all(axis=1)
+    dropped = int((~complete).sum())
+    df = df[complete].reset_index(drop=True)
+    os.makedirs(path, exist_ok=True)
+
+    # Both team columns share one dictionary so their codes are comparable
+    teams = sorted(pd.unique(df[TEAM_COLUMNS].to_numpy().ravel()).tolist())
+    columns = []
+    for name in df.columns:
+        values = df[name]
+        if name in TEAM_COLUMNS or name in CATEGORY_COLUMNS:
+            categories = teams if name in TEAM_COLUMNS else sorted(values.dropna().astype(str).unique().tolist())
+            array = _category_codes(values.astype(object).where(values.notna(), None), categories)
+            columns.append({'name': name, 'kind': 'category', 'dtype': array.dtype.name, 'categories': categories})
+        elif name in DATE_COLUMNS:
+            array = pd.to_datetime(values, errors='coerce').to_numpy(dtype='datetime64[D]')
+            columns.append({'name': name, 'kind': 'date', 'dtype': array.dtype.name})
+        elif name in COUNT_COLUMNS:
+            filled = values.fillna(0).to_numpy()
+            if values.isna().any():
+                print(f"Warning: {int(values.isna().sum())} missing values in {name} stored as 0")
+            array = filled.astype(_smallest_int_dtype(filled))
+            columns.append({'name': name, 'kind': 'count', 'dtype': array.dtype.name})
+        else:
+            array = values.to_numpy()
+            if array.dtype == object:
+                array = values.astype(str).to_numpy(dtype=str)
+            columns.append({'name': name, 'kind': 'value', 'dtype': array.dtype.str})
+        np.save(os.path.join(path, f'{name}.npy'), array, allow_pickle=False)
+
+    schema = {'format_version': FORMAT_VERSION, 'rows': len(df), 'dropped_rows': dropped, 'columns': columns}
+    with open(os.path.join(path, SCHEMA_FILENAME), 'w') as f:
+        json.dump(schema, f, indent=2)
+    return schema
+
+
+def _encode_append(column, values):
+    """
+    Encode new values for an existing column
+
+    Returns the array to append, or None if the stored dtype can't hold
+    them (the column then has to be rewritten)
+    """
+    kind, dtype = column['kind'], np.dtype(column['dtype'])
+    if kind == 'category':
+        labels = values.astype(object).where(values.notna(), None)
+        # New labels go on the end so existing codes stay valid
+        for label in pd.unique(labels.dropna().astype(str)):
+            if label not in column['categories']:
+                column['categories'].append(label)
+        if len(column['categories']) > np.iinfo(dtype).max:
+            return None
+        return pd.Categorical(labels, categories=column['categories']).codes.astype(dtype)
+    if kind == 'date':
+        return pd.to_datetime(values, errors='coerce').to_numpy(dtype='datetime64[D]')
+    if kind == 'count':
+        filled = values.fillna(0).to_numpy()
+        if len(filled) and (filled.min() < np.iinfo(dtype).min or filled.max() > np.iinfo(dtype).max):
+            return None
+        return filled.astype(dtype)
+    array = values.astype(str).to_numpy(dtype=str) if values.dtype == object else values.to_numpy()
+    if array.dtype.kind == 'U' and dtype.kind == 'U' and array.dtype.itemsize > dtype.itemsize:
+        return None
+    return array.astype(dtype)
+
+
+def _patched_header(path, extra_rows):
+    """
+    Header of a 1-D .npy file grown by extra_rows
+
+    Returns (header bytes, dtype), or None if the new header wouldn't fit
+    in the old one's space
+    """
+    with open(path, 'rb') as f:
+        if np.lib.format.read_magic(f) != (1, 0):
+            return None
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        data_offset = f.tell()
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {
+        'descr': np.lib.format.dtype_to_descr(dtype),
+        'fortran_order': False,
+        'shape': (shape[0] + extra_rows,)
+    })
+    if header.tell() != data_offset or fortran_order or len(shape) != 1:
+        return None
+    return header.getvalue(), dtype
+
+
+def _append_npy(path, values, header, dtype):
+    """Write rows at the end of a .npy file, then patch its header"""
+    with open(path, 'r+b') as f:
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        f.seek(0)
+        f.write(header)
+
+
+def append_columnar(df, path):
+    """
+    Add rows to an existing columnar dataset without rewriting it
+
+    Each column's new rows are appended to its .npy file and only the
+    header is patched. If a value doesn't fit a stored dtype (a count
+    over 127 in an int8 column, say) the dataset is rewritten once with
+    wider types instead, and likewise if the team columns no longer share
+    one dictionary. Returns (rows appended, rewritten).
+    """
+    schema = read_schema(path)
+    complete = df[TEAM_COLUMNS + ['FTHG', 'FTAG']].notna().all(axis=1)
+    df = df[complete].reset_index(drop=True)
+    if df.empty:
+        return 0, False
+
+    # New teams go on the end of every team column in the same order, so
+    # the columns keep sharing one dictionary
+    team_columns = [column for column in schema['columns'] if column['name'] in TEAM_COLUMNS]
+    known = set(team_columns[0]['categories']) if team_columns else set()
+    new_teams = [team for team in pd.unique(df[TEAM_COLUMNS].astype(str).to_numpy().ravel()).tolist()
+                 if team not in known]
+    for column in team_columns:
+        column['categories'].extend(new_teams)
+
+    encoded = {}
+    for column in schema['columns']:
+        values = df[column['name']] if column['name'] in df.columns else pd.Series([None] * len(df))
+        encoded[column['name']] = _encode_append(column, values)
+
+    headers = {name: _patched_header(os.path.join(path, f'{name}.npy'), len(df)) for name in encoded}
+    shared = all(column['categories'] == team_columns[0]['categories'] for column in team_columns)
+    if (not shared or any(array is None for array in encoded.values())
+            or any(h is None for h in headers.values())):
+        combined = pd.concat([load_dataframe(path, mmap=False), df], ignore_index=True)
+        write_columnar(combined, path)
+        return len(df), True
+
+    for name, array in encoded.items():
+        _append_npy(os.path.join(path, f'{name}.npy'), array, *headers[name])
+
+    # Schema last, so a reader never sees a row count the files don't have yet
+    schema['rows'] += len(df)
+    with open(os.path.join(path, SCHEMA_FILENAME), 'w') as f:
+        json.dump(schema, f, indent=2)
+    return len(df), False
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILENAME)) as f:
+        schema = json.load(f)
+    if schema.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{path} has columnar format {schema.get('format_version')}, expected {FORMAT_VERSION}")
+    return schema
+
+
+def load_columns(path, columns=None, mmap=True):
+    """
+    Memory-mapped raw arrays, {name: array}
+
+    Category columns come back as their integer codes. Use the schema's
+    'categories' to decode them, or load_dataframe for labelled columns.
+    """
+    schema = read_schema(path)
+    wanted = set(columns) if columns is not None else None
+    return {
+        column['name']: np.load(os.path.join(path, f"{column['name']}.npy"),
+                                mmap_mode='r' if mmap else None, allow_pickle=False)
+        for column in schema['columns'] if wanted is None or column['name'] in wanted
+    }
+
+
+def load_dataframe(path, columns=None, mmap=True):
+    """Load the dataset (or some of its columns) as a DataFrame with category, date and small int columns"""
+    schema = read_schema(path)
+    arrays = load_columns(path, columns, mmap)
+    data = {}
+    for column in schema['columns']:
+        name = column['name']
+        if name not in arrays:
+            continue
+        if column['kind'] == 'category':
+            data[name] = pd.Categorical.from_codes(np.asarray(arrays[name]), categories=column['categories'])
+        else:
+            data[name] = arrays[name]
+    order = columns if columns is not None else [column['name'] for column in schema['columns']]
+    return pd.DataFrame(data, columns=[name for name in order if name in data])
+
+
+def columnar_path_for(csv_path):
+    """The columnar copy written next to a CSV: data/processed/unified_dataset.csv -> data/processed/unified_dataset"""
+    return os.path.splitext(csv_path)[0]
+
+
+def read_unified_dataset(csv_path, columns=None):
+    """
+    Load the unified dataset, from its columnar copy when there is one
+
+    Callers that need the CSV's exact dtypes can still pd.read_csv directly.
+    """
+    path = columnar_path_for(csv_path)
+    if os.path.exists(os.path.join(path, SCHEMA_FILENAME)):
+        return load_dataframe(path, columns)
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+if __name__ == "__main__":
+    # python -m app.data.columnar data/processed/unified_dataset.csv  (writes data/processed/unified_dataset/)
+    import sys
+
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else columnar_path_for(source)
+    schema = write_columnar(pd.read_csv(source), target)
+    print(f"Wrote {schema['rows']} rows, {len(schema['columns'])} columns to {target} "
+          f"({schema['dropped_rows']} incomplete rows dropped)")
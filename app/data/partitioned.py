@@ -0,0 +1,223 @@
+"""
+League/season partitioned match store
+
+Matches are stored as one columnar directory per league and season:
+
+    data/processed/partitions/league=E0/season=2015-2016/
+
+load_matches only opens the partitions a query names and only maps the
+columns it asks for. Team filters are checked against each partition's
+category labels first, so partitions a team never played in are skipped
+without reading any rows.
+
+Every writer (the batch rebuild, incremental season ingestion and the
+streaming ingest) records the source files it has put into the store in
+one manifest at the partition root, so none of them ingests a file
+another has already written. Each entry also names the directory the file
+came from and the partitions its rows went to, so a writer only ever
+rebuilds partitions holding its own files.
+"""
+
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from app.config import Config
+from app.data.columnar import SCHEMA_FILENAME, append_columnar, load_columns, read_schema, write_columnar
+from app.utils.team_names import canonical_team_name
+
+DEFAULT_LEAGUE = 'E0'
+MANIFEST_FILENAME = 'ingest_manifest.json'
+
+
+def partition_path(root, league, season):
+    return os.path.join(root, f'league={league}', f'season={season}')
+
+
+def list_partitions(root=None):
+    """Every (league, season, path) under root, in league then season order"""
+    root = root or Config.PARTITIONS_PATH
+    partitions = []
+    for path in sorted(glob.glob(os.path.join(root, 'league=*', 'season=*'))):
+        if os.path.exists(os.path.join(path, SCHEMA_FILENAME)):
+            league = os.path.basename(os.path.dirname(path)).split('=', 1)[1]
+            season = os.path.basename(path).split('=', 1)[1]
+            partitions.append((league, season, path))
+    return partitions
+
+
+def load_partition_manifest(root=None):
+    """Source files in the store, {'files': {name: {'sha256', 'rows', ...}}}"""
+    path = os.path.join(root or Config.PARTITIONS_PATH, MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_partition_manifest(root, manifest):
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def entry_partitions(entry, league=DEFAULT_LEAGUE):
+    """(league, season) partitions a manifest entry's rows went to"""
+    if entry.get('partitions'):
+        return [tuple(partition) for partition in entry['partitions']]
+    return [(league, entry['season'])] if entry.get('season') else []
+
+
+def remove_partitions(root, partitions):
+    for league, season in partitions:
+        path = partition_path(root, league, season)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+
+def write_partitions(df, root=None, league=DEFAULT_LEAGUE, files=None, keep=None):
+    """
+    Replace the store with a dataset split by league and season
+
+    Rows without a League column get the given league. files describes
+    the source files the dataset came from and replaces the store's
+    manifest, except for the entries in keep: files another writer put in
+    the store, whose partitions are left alone. Raises ValueError if the
+    dataset has rows for one of those partitions. Returns the partitions written.
+    """
+    root = root or Config.PARTITIONS_PATH
+    if 'League' not in df.columns:
+        df = df.assign(League=league)
+    kept = {partition for entry in (keep or {}).values() for partition in entry_partitions(entry)}
+    overlap = kept & set(df.groupby(['League', 'Season'], observed=True).groups)
+    if overlap:
+        raise ValueError(f"Partitions {sorted(overlap)} also hold rows from other sources")
+    remove_partitions(root, [(league_name, season) for league_name, season, _ in list_partitions(root)
+                             if (league_name, season) not in kept])
+    save_partition_manifest(root, {'files': dict(keep or {}, **(files or {}))})
+
+    written = []
+    for (league_name, season), rows in df.groupby(['League', 'Season'], sort=True, observed=True):
+        path = partition_path(root, league_name, season)
+        write_columnar(rows, path)
+        written.append((league_name, season, path))
+    return written
+
+
+def append_partitions(df, root=None, league=DEFAULT_LEAGUE, files=None):
+    """
+    Add rows to the partitions they belong to, creating new ones as needed
+
+    Existing partitions are appended to in place. files describes the
+    source files the rows came from and is added to the store's manifest.
+    Returns how many rows went to each (league, season).
+    """
+    root = root or Config.PARTITIONS_PATH
+    if 'League' not in df.columns:
+        df = df.assign(League=league)
+    added = {}
+    for (league_name, season), rows in df.groupby(['League', 'Season'], sort=False, observed=True):
+        path = partition_path(root, league_name, season)
+        if os.path.exists(os.path.join(path, SCHEMA_FILENAME)):
+            append_columnar(rows, path)
+        else:
+            write_columnar(rows, path)
+        added[(league_name, season)] = len(rows)
+    if files:
+        manifest = load_partition_manifest(root)
+        manifest['files'].update(files)
+        save_partition_manifest(root, manifest)
+    return added
+
+
+def _as_list(value):
+    if value is None:
+        return None
+    return [value] if isinstance(value, str) else list(value)
+
+
+def load_matches(league=None, seasons=None, teams=None, columns=None, root=None):
+    """
+    Matches from the partitions that fit a query, as one DataFrame
+
+    league and seasons take a name or a list of names. teams keeps matches
+    where any of the teams played, home or away. columns limits which
+    columns are read. Category columns come back as pandas categoricals,
+    with labels merged across partitions.
+    """
+    leagues, seasons = _as_list(league), _as_list(seasons)
+    teams = [canonical_team_name(team) for team in _as_list(teams)] if teams is not None else None
+
+    # Team filtering needs the team columns even if the caller doesn't
+    wanted = list(columns) if columns is not None else None
+    read = None
+    if wanted is not None:
+        read = wanted + [name for name in ('HomeTeam', 'AwayTeam') if teams is not None and name not in wanted]
+
+    parts = []
+    for league_name, season, path in list_partitions(root):
+        if leagues is not None and league_name not in leagues:
+            continue
+        if seasons is not None and season not in seasons:
+            continue
+        schema = read_schema(path)
+        kinds = {column['name']: column for column in schema['columns']}
+
+        mask = None
+        if teams is not None:
+            # Look the teams up in this partition's labels before touching any rows
+            codes = {name: [kinds[name]['categories'].index(team) for team in teams
+                            if team in kinds[name]['categories']] for name in ('HomeTeam', 'AwayTeam')}
+            if not codes['HomeTeam'] and not codes['AwayTeam']:
+                continue
+            team_arrays = load_columns(path, ['HomeTeam', 'AwayTeam'])
+            mask = np.isin(team_arrays['HomeTeam'], codes['HomeTeam']) | np.isin(team_arrays['AwayTeam'], codes['AwayTeam'])
+            if not mask.any():
+                continue
+
+        arrays = load_columns(path, read)
+        parts.append((kinds, {name: np.asarray(array[mask] if mask is not None else array)
+                              for name, array in arrays.items()}))
+
+    if not parts:
+        return pd.DataFrame(columns=wanted or [])
+
+    # Stitch the partitions together column by column. Category codes are
+    # remapped onto the union of every partition's labels first.
+    order = wanted if wanted is not None else [column['name'] for column in parts[0][0].values()]
+    data = {}
+    for name in order:
+        pieces = [(kinds[name], arrays[name]) for kinds, arrays in parts if name in arrays]
+        if not pieces:
+            continue
+        if pieces[0][0]['kind'] != 'category':
+            data[name] = np.concatenate([values for _, values in pieces])
+            continue
+        labels = {}
+        for column, _ in pieces:
+            for label in column['categories']:
+                labels.setdefault(label, len(labels))
+        # Code -1 (missing) stays -1 rather than indexing the last label
+        codes = np.concatenate([
+            np.where(values < 0, -1, np.asarray([labels[label] for label in column['categories']] or [-1],
+                                                dtype=np.int32)[values])
+            for column, values in pieces
+        ])
+        data[name] = pd.Categorical.from_codes(codes, categories=list(labels))
+    return pd.DataFrame(data)
+
+if __name__ == "__main__":
+    # python -m app.data.partitioned [dataset.csv]  (partitions the unified dataset by league and season)
+    import sys
+    import time
+
+    from app.data.columnar import read_unified_dataset
+
+    source = sys.argv[1] if len(sys.argv) > 1 else Config.DATASET_PATH
+    started = time.perf_counter()
+    written = write_partitions(read_unified_dataset(source))
+    print(f"Wrote {len(written)} partitions to {Config.PARTITIONS_PATH} in {time.perf_counter() - started:.2f}s")
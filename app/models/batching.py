@@ -0,0 +1,183 @@
+"""
+Micro-batching for prediction requests
+
+Concurrent /predict calls each score a single row. The batcher holds
+incoming rows for a few milliseconds (or until enough have arrived),
+runs one vectorised predict for the whole batch and hands each caller
+back its own slice of the results.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+
+import numpy as np
+
+
+class _PendingRequest:
+    __slots__ = ('features', 'future', 'enqueued_at')
+
+    def __init__(self, features):
+        self.features = features
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatcherMetrics:
+    """Running batch size and queue wait statistics"""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.requests = 0
+        self.cancelled = 0
+        self.max_batch_rows = 0
+        self.batch_size_counts = {}
+        # Recent samples for percentiles
+        self._batch_rows = deque(maxlen=window)
+        self._queue_wait_ms = deque(maxlen=window)
+        self._predict_ms = deque(maxlen=window)
+
+    def record_batch(self, requests, rows, queue_waits_ms, predict_ms):
+        with self._lock:
+            self.batches += 1
+            self.rows += rows
+            self.requests += requests
+            self.max_batch_rows = max(self.max_batch_rows, rows)
+            self.batch_size_counts[rows] = self.batch_size_counts.get(rows, 0) + 1
+            self._batch_rows.append(rows)
+            self._queue_wait_ms.extend(queue_waits_ms)
+            self._predict_ms.append(predict_ms)
+
+    def record_cancelled(self, requests):
+        with self._lock:
+            self.cancelled += requests
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+        values = np.fromiter(samples, dtype=np.float64)
+        return {
+            'mean': round(float(values.mean()), 3),
+            'p50': round(float(np.percentile(values, 50)), 3),
+            'p95': round(float(np.percentile(values, 95)), 3),
+            'max': round(float(values.max()), 3),
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'cancelled': self.cancelled,
+                'rows': self.rows,
+                'mean_batch_rows': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'max_batch_rows': self.max_batch_rows,
+                'batch_rows': self._summary(self._batch_rows),
+                'batch_size_counts': dict(sorted(self.batch_size_counts.items())),
+                'queue_wait_ms': self._summary(self._queue_wait_ms),
+                'predict_ms': self._summary(self._predict_ms),
+            }
+
+
+class MicroBatcher:
+    """
+    Collect pending prediction requests and score them together
+
+    A batch is sent when it reaches max_batch_size rows or the oldest request
+    has waited max_wait_ms. While traffic is light (the previous batch held a
+    single request and nothing else is queued) requests go straight through,
+    so batching only adds latency once there is concurrency to exploit.
+    Requests whose caller stopped waiting are cancelled and left out of
+    the batch they would have joined.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.metrics = BatcherMetrics()
+        self._queue = queue.Queue()
+        self._last_batch_requests = 1
+        self._thread = threading.Thread(target=self._run, name='prediction-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, features):
+        """Queue feature rows for scoring, returns a Future for (results, fthg, ftag)"""
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        pending = _PendingRequest(features)
+        self._queue.put(pending)
+        return pending.future
+
+    def predict(self, features, timeout=None):
+        """Score feature rows as part of the next batch and wait for them"""
+        future = self.submit(features)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            # Nobody will read the result, so don't spend a batch slot on it
+            future.cancel()
+            raise
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or due"""
+        batch = [self._queue.get()]
+        while batch[0].future.cancelled():
+            self.metrics.record_cancelled(1)
+            batch = [self._queue.get()]
+        rows = len(batch[0].features)
+
+        if self._last_batch_requests <= 1 and self._queue.empty():
+            return batch
+
+        deadline = batch[0].enqueued_at + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending.future.cancelled():
+                self.metrics.record_cancelled(1)
+                continue
+            batch.append(pending)
+            rows += len(pending.features)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Marks the rest as running so they can no longer be cancelled
+            running = [pending for pending in batch if pending.future.set_running_or_notify_cancel()]
+            if len(running) < len(batch):
+                self.metrics.record_cancelled(len(batch) - len(running))
+            batch = running
+            if not batch:
+                continue
+            self._last_batch_requests = len(batch)
+            started = time.perf_counter()
+            queue_waits_ms = [(started - pending.enqueued_at) * 1000 for pending in batch]
+
+            try:
+                features = np.vstack([pending.features for pending in batch])
+                match_results, fthg_preds, ftag_preds = self.predict_fn(features)
+            except Exception as e:
+                for pending in batch:
+                    pending.future.set_exception(e)
+                continue
+
+            predict_ms = (time.perf_counter() - started) * 1000
+            self.metrics.record_batch(len(batch), len(features), queue_waits_ms, predict_ms)
+
+            # Hand every request back its own rows
+            offset = 0
+            for pending in batch:
+                end = offset + len(pending.features)
+                pending.future.set_result((match_results[offset:end], fthg_preds[offset:end], ftag_preds[offset:end]))
+                offset = end
@@ -0,0 +1,250 @@
+"""
+Compact, array-based storage for our RandomForest models
+
+The pickled sklearn forests carry a full object graph per tree and need
+sklearn installed to load. Here every tree is flattened into a handful of
+plain NumPy arrays (one shared node table for the whole forest) and saved
+as an uncompressed .npz, so serving only needs NumPy.
+"""
+
+import os
+
+import numpy as np
+
+# Bump this whenever the array layout below changes
+FORMAT_VERSION = 1
+
+MODEL_SUFFIX = '.npz'
+ENCODERS_FILENAME = 'team_encoders.npz'
+
+
+class CompactForest:
+    """
+    A RandomForest stored as flat arrays
+
+    All trees share one node table. Child pointers are global node indices
+    and leaves have left == -1. Classifier leaves store class probabilities,
+    regressor leaves store the predicted value.
+    """
+
+    def __init__(self, kind, roots, left, right, feature, threshold, value,
+                 max_depth, n_features, classes=None):
+        self.kind = kind
+        self.roots = roots
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features)
+        self.classes_ = classes
+        self.n_estimators = len(roots)
+
+    def apply(self, X):
+        """Return the leaf index reached in every tree, shape (n_rows, n_trees)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators)).copy()
+
+        # Walk all rows through all trees one level at a time
+        for _ in range(self.max_depth):
+            left = self.left[nodes]
+            is_leaf = left < 0
+            if is_leaf.all():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(is_leaf, nodes, np.where(go_left, left, self.right[nodes]))
+        return nodes
+
+    def predict_proba(self, X):
+        """Average the class probabilities of every tree"""
+        if self.kind != 'classifier':
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self.value[self.apply(X)].mean(axis=1, dtype=np.float64)
+
+    def predict(self, X):
+        """Predict like the sklearn forest this was exported from"""
+        if self.kind == 'classifier':
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        return self.value[self.apply(X)].mean(axis=1, dtype=np.float64)
+
+    @property
+    def nbytes(self):
+        """Memory taken by the node arrays"""
+        return sum(array.nbytes for array in
+                   (self.roots, self.left, self.right, self.feature, self.threshold, self.value))
+
+
+class CompactLabelEncoder:
+    """Drop-in replacement for a fitted LabelEncoder, backed by its sorted classes"""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def transform(self, values):
+        # Checked at the input's own width, casting to the classes' dtype would truncate longer names
+        values = np.asarray(values)
+        unknown = ~np.isin(values, self.classes_)
+        if np.any(unknown):
+            raise ValueError(f"y contains previously unseen labels: {values[unknown].tolist()}")
+        return np.searchsorted(self.classes_, values)
+
+    def inverse_transform(self, codes):
+        return self.classes_[np.asarray(codes)]
+
+
+def _float32_at_most(values):
+    """Cast to float32 rounding down, so x <= t gives the same answer as in float64"""
+    rounded = values.astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def forest_to_arrays(model):
+    """Flatten a fitted RandomForestClassifier/Regressor into plain arrays"""
+    is_classifier = hasattr(model, 'classes_')
+    roots, left, right, feature, threshold, value = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        roots.append(offset)
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        # Leaves never read their feature, point them at column 0 so indexing stays valid
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(_float32_at_most(np.where(is_leaf, 0.0, tree.threshold)))
+
+        if is_classifier:
+            # Single output: (n_nodes, 1, n_classes) -> per-leaf class probabilities
+            counts = tree.value[:, 0, :].astype(np.float64)
+            totals = counts.sum(axis=1, keepdims=True)
+            value.append(counts / np.where(totals == 0, 1, totals))
+        else:
+            value.append(tree.value[:, 0, 0])
+
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        'format_version': np.array(FORMAT_VERSION, dtype=np.int32),
+        'kind': np.array('classifier' if is_classifier else 'regressor'),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float32),
+        'value': np.concatenate(value).astype(np.float32),
+        # One extra level so the walk always reaches the leaves
+        'max_depth': np.array(max_depth + 1, dtype=np.int32),
+        'n_features': np.array(model.n_features_in_, dtype=np.int32),
+    }
+    if is_classifier:
+        arrays['classes'] = np.asarray(model.classes_).astype(str)
+    return arrays
+
+
+def export_model(model, path):
+    """Write a fitted forest to a compact .npz file"""
+    np.savez(path, **forest_to_arrays(model))
+    return path
+
+
+def export_encoders(home_encoder, away_encoder, path):
+    """Write the fitted team encoders' classes to a .npz file"""
+    np.savez(
+        path,
+        format_version=np.array(FORMAT_VERSION, dtype=np.int32),
+        home_classes=np.asarray(home_encoder.classes_).astype(str),
+        away_classes=np.asarray(away_encoder.classes_).astype(str),
+    )
+    return path
+
+
+def _check_version(data, path):
+    version = int(data['format_version'])
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} uses compact model format v{version}, expected v{FORMAT_VERSION}")
+
+
+def _from_arrays(data):
+    return CompactForest(
+        kind=str(data['kind']),
+        roots=data['roots'],
+        left=data['left'],
+        right=data['right'],
+        feature=data['feature'],
+        threshold=data['threshold'],
+        value=data['value'],
+        max_depth=data['max_depth'],
+        n_features=data['n_features'],
+        classes=data['classes'] if 'classes' in data else None,
+    )
+
+
+def compact_from_model(model):
+    """Convert a fitted forest in memory, without a round trip through disk"""
+    return _from_arrays(forest_to_arrays(model))
+
+
+def load_model(path):
+    """Load a forest written by export_model"""
+    with np.load(path, allow_pickle=False) as data:
+        _check_version(data, path)
+        return _from_arrays(data)
+
+
+def load_encoders(path):
+    """Load the home/away team encoders written by export_encoders"""
+    with np.load(path, allow_pickle=False) as data:
+        _check_version(data, path)
+        return CompactLabelEncoder(data['home_classes']), CompactLabelEncoder(data['away_classes'])
+
+
+def export_all(match_winner_model, fthg_model, ftag_model, home_encoder, away_encoder, output_dir='.'):
+    """Export all three models and both encoders next to each other"""
+    paths = [
+        export_model(match_winner_model, os.path.join(output_dir, 'match_winner_model' + MODEL_SUFFIX)),
+        export_model(fthg_model, os.path.join(output_dir, 'fthg_model' + MODEL_SUFFIX)),
+        export_model(ftag_model, os.path.join(output_dir, 'ftag_model' + MODEL_SUFFIX)),
+        export_encoders(home_encoder, away_encoder, os.path.join(output_dir, ENCODERS_FILENAME)),
+    ]
+    return paths
+
+
+def compact_artifacts_exist(model_dir):
+    """Check whether a full set of compact artifacts is available"""
+    names = ['match_winner_model' + MODEL_SUFFIX, 'fthg_model' + MODEL_SUFFIX,
+             'ftag_model' + MODEL_SUFFIX, ENCODERS_FILENAME]
+    return all(os.path.exists(os.path.join(model_dir, name)) for name in names)
+
+
+def artifacts_version(model_dir, filenames):
+    """Short content hash of a set of model files, changes whenever any of them is retrained"""
+    import hashlib
+
+    digest = hashlib.sha256()
+    for name in filenames:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def load_all(model_dir):
+    """Load all compact artifacts, returns (winner, fthg, ftag, home_encoder, away_encoder)"""
+    home_encoder, away_encoder = load_encoders(os.path.join(model_dir, ENCODERS_FILENAME))
+    return (
+        load_model(os.path.join(model_dir, 'match_winner_model' + MODEL_SUFFIX)),
+        load_model(os.path.join(model_dir, 'fthg_model' + MODEL_SUFFIX)),
+        load_model(os.path.join(model_dir, 'ftag_model' + MODEL_SUFFIX)),
+        home_encoder,
+        away_encoder,
+    )
@@ -0,0 +1,254 @@
+"""
+Rolling team-form features
+
+Every match in the unified dataset becomes two team rows (one home, one
+away). Rolling last-N form, goals for and goals against are computed per
+team and per team+venue with grouped rolling windows. The features
+describe a team going into each match, so they never include
+that match's own result. The table is saved as a columnar .npz. New
+matches are appended by recomputing only their rows from each team's last
+N games. Serving lookups (current form of a team, features of a match) are
+plain array indexing.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.config import Config
+from app.data.columnar import read_unified_dataset
+from app.utils.team_names import canonical_team_name
+
+FORMAT_VERSION = 1
+FORM_WINDOW = 5
+
+HOME, AWAY = 0, 1
+RESULT_CODES = np.array(['L', 'D', 'W'])
+POINTS_FOR_RESULT = np.array([0, 1, 3])
+
+# Pre-match features of a team row, in storage order
+FEATURE_COLUMNS = [
+    'form_matches', 'form_ppg', 'form_goals_for', 'form_goals_against',
+    'venue_form_matches', 'venue_form_ppg', 'venue_form_goals_for', 'venue_form_goals_against'
+]
+HISTORY_COLUMNS = ['match', 'team', 'venue', 'goals_for', 'goals_against', 'result']
+
+_feature_store = None
+_store_lock = threading.Lock()
+
+
+def matches_to_team_rows(matches, team_codes, first_match_id=0):
+    """
+    Turn matches into one row per team per match
+
+    Match ids are row positions in the dataset (offset by first_match_id).
+    Rows missing teams or full-time goals are skipped. Unknown teams are
+    added to team_codes.
+    """
+    matches = matches.reset_index(drop=True)
+    match_ids = first_match_id + np.arange(len(matches))
+    valid = matches[['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].notna().all(axis=1).to_numpy()
+    matches, match_ids = matches[valid], match_ids[valid]
+
+    home_names = matches['HomeTeam'].map(canonical_team_name)
+    away_names = matches['AwayTeam'].map(canonical_team_name)
+    for name in pd.unique(pd.concat([home_names, away_names])):
+        team_codes.setdefault(name, len(team_codes))
+
+    fthg = matches['FTHG'].to_numpy(dtype=np.int16)
+    ftag = matches['FTAG'].to_numpy(dtype=np.int16)
+    rows = pd.DataFrame({
+        'match': np.concatenate([match_ids, match_ids]).astype(np.int32),
+        'team': np.concatenate([home_names.map(team_codes), away_names.map(team_codes)]).astype(np.int16),
+        'venue': np.repeat(np.array([HOME, AWAY], dtype=np.int8), len(matches)),
+        'goals_for': np.concatenate([fthg, ftag]),
+        'goals_against': np.concatenate([ftag, fthg]),
+    })
+    # 0 = loss, 1 = draw, 2 = win
+    rows['result'] = (np.sign(rows['goals_for'] - rows['goals_against']) + 1).astype(np.int8)
+    return rows.sort_values(['match', 'venue'], kind='stable').reset_index(drop=True)
+
+
+def rolling_form(rows, window=FORM_WINDOW):
+    """
+    Pre-match rolling features for every team row
+
+    Each team's stats are shifted by one game before the window is taken,
+    so a row only sees the matches before it. Teams with no earlier games
+    get zeros.
+    """
+    stats = pd.DataFrame({
+        'points': POINTS_FOR_RESULT[rows['result'].to_numpy()].astype(np.float64),
+        'goals_for': rows['goals_for'].astype(np.float64),
+        'goals_against': rows['goals_against'].astype(np.float64),
+    }, index=rows.index)
+
+    features = pd.DataFrame(index=rows.index)
+    for prefix, keys in (('form', [rows['team']]), ('venue_form', [rows['team'], rows['venue']])):
+        previous = stats.groupby(keys, sort=False).shift()
+        rolled = previous.groupby(keys, sort=False).rolling(window, min_periods=1)
+        means = rolled.mean().reset_index(level=list(range(len(keys))), drop=True).sort_index()
+        counts = rolled['points'].count().reset_index(level=list(range(len(keys))), drop=True).sort_index()
+        features[f'{prefix}_matches'] = counts
+        features[f'{prefix}_ppg'] = means['points']
+        features[f'{prefix}_goals_for'] = means['goals_for']
+        features[f'{prefix}_goals_against'] = means['goals_against']
+
+    return features[FEATURE_COLUMNS].fillna(0).to_numpy(dtype=np.float32)
+
+
+class TeamFormStore:
+    """Team rows with their pre-match form features, plus each team's current form"""
+
+    def __init__(self, teams, history, features, n_matches, window=FORM_WINDOW):
+        self.teams = list(teams)
+        self.team_codes = {name: code for code, name in enumerate(self.teams)}
+        self.history = history
+        self.features = features
+        self.n_matches = int(n_matches)
+        self.window = int(window)
+        self._index()
+
+    @classmethod
+    def build(cls, df, window=FORM_WINDOW):
+        """Compute the whole store from a dataset in one vectorised pass"""
+        team_codes = {}
+        history = matches_to_team_rows(df, team_codes)
+        teams = sorted(team_codes, key=team_codes.get)
+        return cls(teams, history, rolling_form(history, window), len(df), window)
+
+    def append(self, new_matches):
+        """
+        Add matches played after everything already in the store
+
+        Only the new rows are computed, from each team's last `window` games
+        overall and at the same venue. Returns the number of matches added.
+        """
+        team_codes = dict(self.team_codes)
+        new_rows = matches_to_team_rows(new_matches, team_codes, first_match_id=self.n_matches)
+        self.n_matches += len(new_matches)
+        if new_rows.empty:
+            return 0
+
+        context = pd.concat([
+            self.history.groupby('team', sort=False).tail(self.window),
+            self.history.groupby(['team', 'venue'], sort=False).tail(self.window)
+        ]).drop_duplicates()
+        combined = pd.concat([context, new_rows], ignore_index=True).sort_values(['match', 'venue'], kind='stable')
+        is_new = combined['match'].to_numpy() >= new_rows['match'].min()
+        new_features = rolling_form(combined.reset_index(drop=True), self.window)[is_new]
+
+        self.teams = sorted(team_codes, key=team_codes.get)
+        self.team_codes = team_codes
+        self.history = pd.concat([self.history, new_rows], ignore_index=True)
+        self.features = np.vstack([self.features, new_features])
+        self._index()
+        return int(new_rows['match'].nunique())
+
+    def _index(self):
+        """Rebuild the lookup tables: match id -> row and team -> current form"""
+        match = self.history['match'].to_numpy()
+        venue = self.history['venue'].to_numpy()
+        self._match_rows = np.full((self.n_matches, 2), -1, dtype=np.int32)
+        self._match_rows[match, venue] = np.arange(len(self.history))
+
+        n_teams = len(self.teams)
+        points = POINTS_FOR_RESULT[self.history['result'].to_numpy()]
+        recent = self.history.assign(points=points).groupby('team', sort=False).tail(self.window)
+        current = recent.groupby('team').agg(
+            matches=('points', 'size'), ppg=('points', 'mean'),
+            goals_for=('goals_for', 'mean'), goals_against=('goals_against', 'mean'))
+        self._current = np.zeros((n_teams, 4), dtype=np.float32)
+        self._current[current.index.to_numpy()] = current.to_numpy(dtype=np.float32)
+
+        # Last `window` results per team, oldest first
+        letters = recent.assign(letter=RESULT_CODES[recent['result'].to_numpy()])
+        self._form = np.full(n_teams, '', dtype=object)
+        for code, letters_for_team in letters.groupby('team')['letter']:
+            self._form[code] = list(letters_for_team)
+
+    def team_code(self, team_name):
+        return self.team_codes.get(canonical_team_name(team_name))
+
+    def team_form(self, team_name):
+        """Current form of a team (its last `window` games), None if we have no history for it"""
+        code = self.team_code(team_name)
+        if code is None:
+            return None
+        matches, ppg, goals_for, goals_against = self._current[code]
+        return {
+            'team': self.teams[code],
+            'matches': int(matches),
+            'form': list(self._form[code] or []),
+            'points': int(round(ppg * matches)),
+            'ppg': round(float(ppg), 3),
+            'goals_for': round(float(goals_for), 3),
+            'goals_against': round(float(goals_against), 3)
+        }
+
+    def match_features(self, match_id):
+        """Pre-match form of both sides of a stored match, keyed home_*/away_*"""
+        if not 0 <= match_id < self.n_matches or self._match_rows[match_id, 0] < 0:
+            return None
+        home_row, away_row = self._match_rows[match_id]
+        features = {f'home_{name}': float(value) for name, value in zip(FEATURE_COLUMNS, self.features[home_row])}
+        features.update({f'away_{name}': float(value) for name, value in zip(FEATURE_COLUMNS, self.features[away_row])})
+        return features
+
+    def save(self, path):
+        """Write the store as one array per column"""
+        arrays = {column: self.history[column].to_numpy() for column in HISTORY_COLUMNS}
+        arrays.update({column: self.features[:, i] for i, column in enumerate(FEATURE_COLUMNS)})
+        np.savez(path,
+                 format_version=np.array(FORMAT_VERSION, dtype=np.int32),
+                 teams=np.asarray(self.teams, dtype=str),
+                 n_matches=np.array(self.n_matches, dtype=np.int64),
+                 window=np.array(self.window, dtype=np.int32),
+                 **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"{path} has feature store format {int(data['format_version'])}, "
+                                 f"expected {FORMAT_VERSION}")
+            history = pd.DataFrame({column: data[column] for column in HISTORY_COLUMNS})
+            features = np.column_stack([data[column] for column in FEATURE_COLUMNS])
+            return cls(data['teams'].tolist(), history, features, int(data['n_matches']), int(data['window']))
+
+
+def get_feature_store():
+    """Shared store for the web app, loaded on first use and built from the dataset if missing"""
+    global _feature_store
+    if _feature_store is None:
+        with _store_lock:
+            if _feature_store is None:
+                try:
+                    if os.path.exists(Config.FEATURE_STORE_PATH):
+                        _feature_store = TeamFormStore.load(Config.FEATURE_STORE_PATH)
+                    else:
+                        _feature_store = TeamFormStore.build(read_unified_dataset(Config.DATASET_PATH))
+                        _feature_store.save(Config.FEATURE_STORE_PATH)
+                    print(f"Team form store ready: {len(_feature_store.teams)} teams, "
+                          f"{_feature_store.n_matches} matches")
+                except Exception as e:
+                    print(f"Error loading team form store: {e}")
+                    return None
+    return _feature_store
+
+
+if __name__ == "__main__":
+    # python -m app.models.feature_store [dataset.csv] [output.npz]
+    import sys
+    import time
+
+    dataset = sys.argv[1] if len(sys.argv) > 1 else Config.DATASET_PATH
+    output = sys.argv[2] if len(sys.argv) > 2 else Config.FEATURE_STORE_PATH
+    started = time.perf_counter()
+    store = TeamFormStore.build(read_unified_dataset(dataset))
+    store.save(output)
+    print(f"Built form features for {store.n_matches} matches, {len(store.teams)} teams "
+          f"in {time.perf_counter() - started:.2f}s -> {output}")
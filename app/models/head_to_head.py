@@ -0,0 +1,283 @@
+"""
+Head-to-head records between every pair of teams
+
+Results and goals are held in teams x teams arrays keyed by (home, away),
+built from the unified dataset with np.add.at scatters. Each pair (either
+way round) also gets a fixed-size ring buffer of its last meetings.
+Looking up two teams, or adding a finished match, touches a fixed number
+of cells whatever the size of the history.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.config import Config
+from app.data.columnar import read_unified_dataset
+from app.utils.team_names import canonical_team_name
+
+FORMAT_VERSION = 1
+RECENT_MEETINGS = 5
+
+HOME_WIN, DRAW, AWAY_WIN = 0, 1, 2
+EMPTY = -1
+
+_head_to_head = None
+_store_lock = threading.Lock()
+
+
+def _days(dates):
+    """Day numbers for an array of date strings, -1 where they don't parse"""
+    parsed = pd.to_datetime(pd.Series(dates).astype(str).str[:10], errors='coerce')
+    days = (parsed.to_numpy(dtype='datetime64[D]').astype(np.int64))
+    return np.where(parsed.isna().to_numpy(), EMPTY, days)
+
+
+class HeadToHead:
+    """
+    Pairwise records
+
+    results[h, a] counts home wins, draws and away wins when h hosted a,
+    goals[h, a] sums (home goals, away goals). The last meetings of each
+    unordered pair live in ring buffers at [min(x, y), max(x, y)].
+    """
+
+    def __init__(self, teams, capacity=None, recent_meetings=RECENT_MEETINGS):
+        self.teams = list(teams)
+        self.team_codes = {name: code for code, name in enumerate(self.teams)}
+        self.recent_meetings = recent_meetings
+        self.seen_match_ids = set()
+        self._lock = threading.Lock()
+        self._allocate(max(capacity or 0, len(self.teams)))
+
+    def _allocate(self, size):
+        n, k = size, self.recent_meetings
+        self.results = np.zeros((n, n, 3), dtype=np.int32)
+        self.goals = np.zeros((n, n, 2), dtype=np.int32)
+        self.recent_count = np.zeros((n, n), dtype=np.int32)
+        self.recent_home = np.full((n, n, k), EMPTY, dtype=np.int16)
+        self.recent_home_goals = np.zeros((n, n, k), dtype=np.int16)
+        self.recent_away_goals = np.zeros((n, n, k), dtype=np.int16)
+        self.recent_day = np.full((n, n, k), EMPTY, dtype=np.int64)
+
+    def _grow(self, size):
+        """Make room for more teams, keeping what is already recorded"""
+        old = {name: getattr(self, name) for name in ('results', 'goals', 'recent_count', 'recent_home',
+                                                      'recent_home_goals', 'recent_away_goals', 'recent_day')}
+        n_old = old['results'].shape[0]
+        self._allocate(size)
+        for name, array in old.items():
+            getattr(self, name)[:n_old, :n_old] = array
+
+    def team_code(self, team_name, create=False):
+        name = canonical_team_name(team_name)
+        code = self.team_codes.get(name)
+        if code is None and create and name:
+            code = len(self.teams)
+            if code >= self.results.shape[0]:
+                self._grow(max(code + 1, 2 * self.results.shape[0]))
+            self.teams.append(name)
+            self.team_codes[name] = code
+        return code
+
+    @classmethod
+    def build(cls, df, recent_meetings=RECENT_MEETINGS):
+        """Aggregate every match in the dataset with scatter adds, no per-match Python"""
+        matches = df[['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].notna().all(axis=1)
+        matches = df[matches].reset_index(drop=True)
+        home_names = matches['HomeTeam'].map(canonical_team_name)
+        away_names = matches['AwayTeam'].map(canonical_team_name)
+        teams = sorted(set(home_names) | set(away_names))
+        store = cls(teams, recent_meetings=recent_meetings)
+
+        home = home_names.map(store.team_codes).to_numpy(dtype=np.int64)
+        away = away_names.map(store.team_codes).to_numpy(dtype=np.int64)
+        fthg = matches['FTHG'].to_numpy(dtype=np.int64)
+        ftag = matches['FTAG'].to_numpy(dtype=np.int64)
+        outcome = np.select([fthg > ftag, fthg == ftag], [HOME_WIN, DRAW], AWAY_WIN)
+
+        np.add.at(store.results, (home, away, outcome), 1)
+        np.add.at(store.goals, (home, away, 0), fthg)
+        np.add.at(store.goals, (home, away, 1), ftag)
+
+        # Ring buffers: number each pair's meetings in order, keep the last k
+        low, high = np.minimum(home, away), np.maximum(home, away)
+        pair = pd.Series(low * len(teams) + high)
+        meeting = pair.groupby(pair).cumcount().to_numpy()
+        totals = pair.map(pair.value_counts()).to_numpy()
+        keep = meeting >= totals - recent_meetings
+        slot = meeting % recent_meetings
+        days = _days(matches['Date']) if 'Date' in matches else np.full(len(matches), EMPTY)
+
+        index = (low[keep], high[keep], slot[keep])
+        store.recent_home[index] = home[keep]
+        store.recent_home_goals[index] = fthg[keep]
+        store.recent_away_goals[index] = ftag[keep]
+        store.recent_day[index] = days[keep]
+        np.add.at(store.recent_count, (low, high), 1)
+        return store
+
+    def add_match(self, home_team, away_team, home_goals, away_goals, date=None, match_id=None):
+        """Record one finished match in constant time, returns False if it was already recorded"""
+        with self._lock:
+            if match_id is not None:
+                if match_id in self.seen_match_ids:
+                    return False
+                self.seen_match_ids.add(match_id)
+            home = self.team_code(home_team, create=True)
+            away = self.team_code(away_team, create=True)
+            outcome = HOME_WIN if home_goals > away_goals else (DRAW if home_goals == away_goals else AWAY_WIN)
+            self.results[home, away, outcome] += 1
+            self.goals[home, away] += (home_goals, away_goals)
+
+            low, high = min(home, away), max(home, away)
+            slot = self.recent_count[low, high] % self.recent_meetings
+            self.recent_home[low, high, slot] = home
+            self.recent_home_goals[low, high, slot] = home_goals
+            self.recent_away_goals[low, high, slot] = away_goals
+            self.recent_day[low, high, slot] = _days([date])[0] if date is not None else EMPTY
+            self.recent_count[low, high] += 1
+            return True
+
+    def record_results(self, matches, league='Premier League'):
+        """Add finished matches in the format fetch_previous_matches returns, returns how many were new"""
+        added = 0
+        for match in sorted(matches, key=lambda m: str(m.get('date', ''))):
+            if match.get('league') != league or match.get('id') is None:
+                continue
+            if match.get('home_score') is None or match.get('away_score') is None:
+                continue
+            if self.add_match(match.get('homeTeam'), match.get('awayTeam'), int(match['home_score']),
+                              int(match['away_score']), date=match.get('date'), match_id=str(match['id'])):
+                added += 1
+        return added
+
+    def _recent(self, a, b):
+        """Last meetings of a pair, most recent first"""
+        low, high = min(a, b), max(a, b)
+        count = int(self.recent_count[low, high])
+        k = self.recent_meetings
+        slots = [(count - 1 - i) % k for i in range(min(count, k))]
+        meetings = []
+        for slot in slots:
+            home = int(self.recent_home[low, high, slot])
+            day = int(self.recent_day[low, high, slot])
+            meetings.append({
+                'date': str(np.datetime64(day, 'D')) if day != EMPTY else None,
+                'home_team': self.teams[home],
+                'away_team': self.teams[high if home == low else low],
+                'home_goals': int(self.recent_home_goals[low, high, slot]),
+                'away_goals': int(self.recent_away_goals[low, high, slot])
+            })
+        return meetings
+
+    def lookup(self, team_a, team_b):
+        """
+        Record of team_a against team_b over all venues, plus team_a's home record in the fixture
+
+        Returns None if either team has no history
+        """
+        a, b = self.team_code(team_a), self.team_code(team_b)
+        if a is None or b is None or a == b:
+            return None
+        # a at home: its wins are home wins. a away: its wins are away wins.
+        at_home, away = self.results[a, b], self.results[b, a]
+        wins = int(at_home[HOME_WIN] + away[AWAY_WIN])
+        draws = int(at_home[DRAW] + away[DRAW])
+        losses = int(at_home[AWAY_WIN] + away[HOME_WIN])
+        goals_for = int(self.goals[a, b, 0] + self.goals[b, a, 1])
+        goals_against = int(self.goals[a, b, 1] + self.goals[b, a, 0])
+        meetings = wins + draws + losses
+        return {
+            'team': self.teams[a],
+            'opponent': self.teams[b],
+            'meetings': meetings,
+            'wins': wins,
+            'draws': draws,
+            'losses': losses,
+            'goals_for': goals_for,
+            'goals_against': goals_against,
+            'win_rate': round(wins / meetings, 3) if meetings else None,
+            'home_record': {
+                'meetings': int(at_home.sum()),
+                'wins': int(at_home[HOME_WIN]),
+                'draws': int(at_home[DRAW]),
+                'losses': int(at_home[AWAY_WIN])
+            },
+            'recent_meetings': self._recent(a, b)
+        }
+
+    def save(self, path):
+        n = len(self.teams)
+        with self._lock:
+            np.savez(path,
+                     format_version=np.array(FORMAT_VERSION, dtype=np.int32),
+                     teams=np.asarray(self.teams, dtype=str),
+                     results=self.results[:n, :n],
+                     goals=self.goals[:n, :n],
+                     recent_count=self.recent_count[:n, :n],
+                     recent_home=self.recent_home[:n, :n],
+                     recent_home_goals=self.recent_home_goals[:n, :n],
+                     recent_away_goals=self.recent_away_goals[:n, :n],
+                     recent_day=self.recent_day[:n, :n],
+                     seen_match_ids=np.asarray(sorted(self.seen_match_ids), dtype=str))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"{path} has head-to-head format {int(data['format_version'])}, "
+                                 f"expected {FORMAT_VERSION}")
+            store = cls(data['teams'].tolist(), recent_meetings=data['recent_home'].shape[2])
+            for name in ('results', 'goals', 'recent_count', 'recent_home',
+                         'recent_home_goals', 'recent_away_goals', 'recent_day'):
+                getattr(store, name)[...] = data[name]
+            store.seen_match_ids = set(data['seen_match_ids'].tolist())
+        return store
+
+
+def get_head_to_head():
+    """Shared head-to-head store for the web app, loaded on first use and built from the dataset if missing"""
+    global _head_to_head
+    if _head_to_head is None:
+        with _store_lock:
+            if _head_to_head is None:
+                try:
+                    if os.path.exists(Config.HEAD_TO_HEAD_PATH):
+                        _head_to_head = HeadToHead.load(Config.HEAD_TO_HEAD_PATH)
+                    else:
+                        _head_to_head = HeadToHead.build(read_unified_dataset(Config.DATASET_PATH))
+                        _head_to_head.save(Config.HEAD_TO_HEAD_PATH)
+                    print(f"Head-to-head records ready: {len(_head_to_head.teams)} teams")
+                except Exception as e:
+                    print(f"Error loading head-to-head records: {e}")
+                    return None
+    return _head_to_head
+
+
+def record_finished_matches(matches):
+    """Add newly finished matches to the shared store and save it if anything changed"""
+    store = get_head_to_head()
+    if store is None:
+        return 0
+    added = store.record_results(matches)
+    if added:
+        store.save(Config.HEAD_TO_HEAD_PATH)
+    return added
+
+
+if __name__ == "__main__":
+    # python -m app.models.head_to_head [dataset.csv] [output.npz]
+    import sys
+    import time
+
+    dataset = sys.argv[1] if len(sys.argv) > 1 else Config.DATASET_PATH
+    output = sys.argv[2] if len(sys.argv) > 2 else Config.HEAD_TO_HEAD_PATH
+    started = time.perf_counter()
+    store = HeadToHead.build(read_unified_dataset(dataset))
+    store.save(output)
+    print(f"Built head-to-head records for {len(store.teams)} teams "
+          f"in {time.perf_counter() - started:.3f}s -> {output}")
@@ -0,0 +1,96 @@
+"""
+Process pool for running model inference outside the web worker
+
+Each worker process loads the models once at startup and then scores
+feature matrices sent to it over the executor's pipes, so prediction CPU
+time doesn't compete for the GIL with request handling.
+"""
+
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Models loaded in each worker process by _init_worker
+_worker_models = None
+
+
+def predict_with_models(match_winner_model, fthg_model, ftag_model, features):
+    """Run all three models on a feature matrix, returns (results, fthg, ftag) arrays"""
+    features = np.asarray(features, dtype=np.float64)
+    if features.ndim == 1:
+        features = features.reshape(1, -1)
+    match_results = np.asarray(match_winner_model.predict(features)).astype(str)
+    fthg_preds = np.asarray(fthg_model.predict(features), dtype=np.float64)
+    ftag_preds = np.asarray(ftag_model.predict(features), dtype=np.float64)
+    return match_results, fthg_preds, ftag_preds
+
+
+def load_models(model_dir):
+    """Load the three models from model_dir, compact artifacts first"""
+    from app.models.compact_forest import compact_artifacts_exist, load_all
+
+    if compact_artifacts_exist(model_dir):
+        return load_all(model_dir)[:3]
+
+    import joblib
+    return tuple(joblib.load(os.path.join(model_dir, name)) for name in
+                 ('match_winner_model.pkl', 'fthg_model.pkl', 'ftag_model.pkl'))
+
+
+def _init_worker(model_dir):
+    """Load the models once per worker process"""
+    global _worker_models
+    _worker_models = load_models(model_dir)
+
+
+def _predict_in_worker(features):
+    return predict_with_models(*_worker_models, features)
+
+
+def _warm_up():
+    return os.getpid()
+
+
+class InferencePool:
+    """A pool of worker processes with the prediction models preloaded"""
+
+    def __init__(self, workers, model_dir, timeout=None):
+        self.workers = workers
+        self.timeout = timeout
+        # Spawn fresh interpreters rather than forking a threaded web worker
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_dir,),
+        )
+
+    def warm_up(self):
+        """Start every worker and load its models before the first request"""
+        futures = [self._executor.submit(_warm_up) for _ in range(self.workers)]
+        return sorted({future.result() for future in futures})
+
+    def submit(self, features):
+        """Queue a feature matrix for scoring, returns a Future"""
+        return self._executor.submit(_predict_in_worker, np.asarray(features, dtype=np.float64))
+
+    def predict(self, features):
+        """Score a feature matrix in a worker and wait for the result"""
+        return self.submit(features).result(timeout=self.timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def create_inference_pool(workers, model_dir, timeout=None):
+    """Start an inference pool that is shut down when the process exits"""
+    from app.config import Config
+
+    pool = InferencePool(workers, model_dir,
+                         timeout=timeout if timeout is not None else Config.INFERENCE_TIMEOUT)
+    atexit.register(pool.shutdown)
+    print(f"Inference pool started with {workers} worker processes")
+    return pool
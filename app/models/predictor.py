@@ -1,25 +1,40 @@
-import pandas as pd
 import numpy as np
-import joblib
 import os
 import sys
+import threading
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 # Add the project root to sys.path to handle relative imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 # Import Config to get the correct model directory
 from app.config import Config
+from app.models.compact_forest import artifacts_version, compact_artifacts_exist, load_all
+from app.models.batching import MicroBatcher
+from app.models.inference_pool import create_inference_pool, predict_with_models
+from app.utils.team_names import canonical_team_name
 
 # Load our trained models and encoders
 # These were created during the model training process
+# Prefer the compact .npz artifacts (NumPy only), fall back to the sklearn pickles
 try:
     model_dir = Config.MODEL_DIR
-    match_winner_model = joblib.load(os.path.join(model_dir, 'match_winner_model.pkl'))
-    fthg_model = joblib.load(os.path.join(model_dir, 'fthg_model.pkl'))
-    ftag_model = joblib.load(os.path.join(model_dir, 'ftag_model.pkl'))
-    home_team_encoder = joblib.load(os.path.join(model_dir, 'home_team_encoder.pkl'))
-    away_team_encoder = joblib.load(os.path.join(model_dir, 'away_team_encoder.pkl'))
-    print("Models and encoders loaded successfully!")
+    if compact_artifacts_exist(model_dir):
+        match_winner_model, fthg_model, ftag_model, home_team_encoder, away_team_encoder = load_all(model_dir)
+        model_format = 'compact'
+        model_version = artifacts_version(model_dir, ['match_winner_model.npz', 'fthg_model.npz',
+                                                      'ftag_model.npz', 'team_encoders.npz'])
+    else:
+        import joblib
+        match_winner_model = joblib.load(os.path.join(model_dir, 'match_winner_model.pkl'))
+        fthg_model = joblib.load(os.path.join(model_dir, 'fthg_model.pkl'))
+        ftag_model = joblib.load(os.path.join(model_dir, 'ftag_model.pkl'))
+        home_team_encoder = joblib.load(os.path.join(model_dir, 'home_team_encoder.pkl'))
+        away_team_encoder = joblib.load(os.path.join(model_dir, 'away_team_encoder.pkl'))
+        model_format = 'pickle'
+        model_version = artifacts_version(model_dir, ['match_winner_model.pkl', 'fthg_model.pkl', 'ftag_model.pkl',
+                                                      'home_team_encoder.pkl', 'away_team_encoder.pkl'])
+    print(f"Models and encoders loaded successfully! ({model_format} format, version {model_version})")
     models_loaded = True
 except Exception as e:
     print(f"Error loading models: {e}")
@@ -29,8 +44,88 @@ except Exception as e:
     ftag_model = None
     home_team_encoder = None
     away_team_encoder = None
+    model_format = None
+    model_version = None
     models_loaded = False
 
+def normalize_team_name(team_name):
+    """Normalize team names to handle variations like 'Chelsea FC'"""
+    if not team_name:
+        return team_name
+    # Remove common suffixes
+    normalized = team_name.replace(' FC', '').replace(' AFC', '').replace(' FC', '')
+    return normalized.strip()
+
+def encode_teams(home_team, away_team):
+    """
+    Convert team names to the numbers our models use
+    
+    Tries the exact names first, then the canonical dataset names, so API
+    spellings like 'Manchester City FC' or 'AFC Bournemouth' are found.
+    Returns (home_code, away_code) or None if either team is unknown.
+    """
+    if home_team_encoder is None or away_team_encoder is None:
+        return None
+    try:
+        return home_team_encoder.transform([home_team])[0], away_team_encoder.transform([away_team])[0]
+    except ValueError:
+        pass
+    try:
+        return (home_team_encoder.transform([canonical_team_name(home_team)])[0],
+                away_team_encoder.transform([canonical_team_name(away_team)])[0])
+    except ValueError:
+        return None
+
+def predict_features(features):
+    """
+    Run all three models on a matrix of feature rows
+    
+    Rows are queued on the micro-batcher when batching is enabled, so
+    concurrent requests share one model call. If the batch doesn't come
+    back within INFERENCE_TIMEOUT the rows are scored directly instead.
+    Returns (match_results, fthg_preds, ftag_preds) arrays.
+    """
+    batcher = get_prediction_batcher()
+    if batcher is not None:
+        try:
+            return batcher.predict(features, timeout=Config.INFERENCE_TIMEOUT)
+        except FuturesTimeoutError:
+            print(f"Prediction batch timed out after {Config.INFERENCE_TIMEOUT}s, predicting directly")
+    return predict_features_now(features)
+
+def predict_features_now(features):
+    """
+    Run all three models on a matrix of feature rows right away
+    
+    Uses the inference process pool when one is configured, otherwise
+    predicts inline.
+    """
+    pool = get_inference_pool()
+    if pool is not None:
+        try:
+            return pool.predict(features)
+        except Exception as e:
+            print(f"Inference pool failed, predicting inline: {e}")
+    return predict_with_models(match_winner_model, fthg_model, ftag_model, features)
+
+def predict_outcome_probabilities(features):
+    """
+    Win/draw/loss probabilities and expected goals for a matrix of feature rows
+    
+    Returns (probabilities, fthg_preds, ftag_preds) where probabilities has
+    columns in ['H', 'D', 'A'] order
+    """
+    features = np.asarray(features, dtype=np.float64)
+    proba = match_winner_model.predict_proba(features)
+    classes = [str(c) for c in match_winner_model.classes_]
+    probabilities = np.zeros((len(features), 3))
+    for column, outcome in enumerate(['H', 'D', 'A']):
+        if outcome in classes:
+            probabilities[:, column] = proba[:, classes.index(outcome)]
+    fthg_preds = np.asarray(fthg_model.predict(features), dtype=np.float64)
+    ftag_preds = np.asarray(ftag_model.predict(features), dtype=np.float64)
+    return probabilities, fthg_preds, ftag_preds
+
 def predict_match_result(home_team, away_team, hthg=0, htag=0, hs=5, as_=5, hst=2, ast=2, 
                         hc=3, ac=3, hf=10, af=10, hy=1, ay=1, hr=0, ar=0):
     """
@@ -48,14 +143,6 @@ def predict_match_result(home_team, away_team, hthg=0, htag=0, hs=5, as_=5, hst=
     Returns prediction results including winner and expected score
     """
     
-    # Normalize team names to handle variations
-    def normalize_team_name(team_name):
-        if not team_name:
-            return team_name
-        # Remove common suffixes
-        normalized = team_name.replace(' FC', '').replace(' AFC', '').replace(' FC', '')
-        return normalized.strip()
-    
     # Normalize team names
     home_team_normalized = normalize_team_name(home_team)
     away_team_normalized = normalize_team_name(away_team)
@@ -69,58 +156,46 @@ def predict_match_result(home_team, away_team, hthg=0, htag=0, hs=5, as_=5, hst=
             "error": "Prediction models are not available"
         }
     
-    try:
-        # Convert team names to numbers using our encoders
-        if home_team_encoder is not None and away_team_encoder is not None:
-            # Try exact match first
-            try:
-                home_team_encoded = home_team_encoder.transform([home_team])[0]
-                away_team_encoded = away_team_encoder.transform([away_team])[0]
-            except ValueError:
-                # If exact match fails, try normalized names
-                try:
-                    home_team_encoded = home_team_encoder.transform([home_team_normalized])[0]
-                    away_team_encoded = away_team_encoder.transform([away_team_normalized])[0]
-                except ValueError:
-                    # If normalized names also fail, raise the original error
-                    available_home_teams = home_team_encoder.classes_ if home_team_encoder is not None else []
-                    available_away_teams = away_team_encoder.classes_ if away_team_encoder is not None else []
-                    return {
-                        "error": f"Team not found. Available home teams: {list(available_home_teams)[:10]}... Available away teams: {list(available_away_teams)[:10]}..."
-                    }
-        else:
-            return {
-                "error": "Team encoders are not available"
-            }
-    except ValueError as e:
+    if home_team_encoder is None or away_team_encoder is None:
+        return {
+            "error": "Team encoders are not available"
+        }
+    
+    # Convert team names to numbers using our encoders
+    encoded = encode_teams(home_team, away_team)
+    if encoded is None:
         # Team name not found in our data
-        available_home_teams = home_team_encoder.classes_ if home_team_encoder is not None else []
-        available_away_teams = away_team_encoder.classes_ if away_team_encoder is not None else []
         return {
-            "error": f"Team not found. Available home teams: {list(available_home_teams)[:10]}... Available away teams: {list(available_away_teams)[:10]}..."
+            "error": f"Team not found. Available home teams: {list(home_team_encoder.classes_)[:10]}... Available away teams: {list(away_team_encoder.classes_)[:10]}..."
         }
+    home_team_encoded, away_team_encoded = encoded
     
     # Put all features into an array for our models
     features = np.array([[home_team_encoded, away_team_encoded, hthg, htag, hs, as_, hst, ast, 
                          hc, ac, hf, af, hy, ay, hr, ar]])
     
-    # Predict match result (winner)
-    if match_winner_model is not None:
-        match_result = match_winner_model.predict(features)[0]
-    else:
+    # Make sure all our models are available
+    if match_winner_model is None:
         return {
             "error": "Match winner model is not available"
         }
-    
-    # Predict exact scores
-    if fthg_model is not None and ftag_model is not None:
-        fthg_pred = fthg_model.predict(features)[0]
-        ftag_pred = ftag_model.predict(features)[0]
-    else:
+    if fthg_model is None or ftag_model is None:
         return {
             "error": "Score prediction models are not available"
         }
     
+    # Predict match result (winner) and exact scores
+    match_results, fthg_preds, ftag_preds = predict_features(features)
+    return reconcile_prediction(match_results[0], fthg_preds[0], ftag_preds[0])
+
+def reconcile_prediction(match_result, fthg_pred, ftag_pred):
+    """
+    Turn raw model outputs for one match into the final prediction
+    
+    Rounds the goal predictions and makes the winner agree with the score
+    """
+    match_result = str(match_result)
+    
     # Round to whole numbers since you can't score partial goals
     fthg_pred = round(fthg_pred)
     fthg_pred = max(0, fthg_pred)
@@ -171,6 +246,79 @@ def predict_match_result(home_team, away_team, hthg=0, htag=0, hs=5, as_=5, hst=
         "predicted_score": f"{fthg_pred} - {ftag_pred}"
     }
 
+def reconcile_predictions(match_results, fthg_preds, ftag_preds):
+    """
+    Vectorised reconcile_prediction for many matches at once
+    
+    Returns (match_results, fthg, ftag) arrays using the same rules
+    """
+    match_results = np.asarray(match_results).astype(str)
+    fthg = np.maximum(0, np.round(np.asarray(fthg_preds, dtype=np.float64))).astype(int)
+    ftag = np.maximum(0, np.round(np.asarray(ftag_preds, dtype=np.float64))).astype(int)
+    
+    score_based = np.where(fthg > ftag, 'H', np.where(ftag > fthg, 'A', 'D'))
+    goal_difference = np.abs(fthg - ftag)
+    
+    reconciled = np.select(
+        [
+            (match_results == 'H') & (score_based == 'A'),
+            (match_results == 'A') & (score_based == 'H'),
+            (match_results == 'D') & (score_based != 'D'),
+            (match_results != 'D') & (score_based == 'D') & (goal_difference < 1.5),
+        ],
+        ['A', 'H', score_based, 'D'],
+        default=match_results,
+    )
+    return reconciled, fthg, ftag
+
+# Optional process pool for model inference, started on first use
+_inference_pool = None
+_startup_lock = threading.Lock()
+
+def get_inference_pool():
+    """
+    Get the shared inference pool, or None to predict in this process
+    
+    Enabled by setting INFERENCE_WORKERS to the number of worker processes
+    """
+    global _inference_pool
+    if _inference_pool is None and models_loaded and Config.INFERENCE_WORKERS > 0:
+        with _startup_lock:
+            if _inference_pool is None:
+                _inference_pool = create_inference_pool(Config.INFERENCE_WORKERS, Config.MODEL_DIR)
+    return _inference_pool
+
+# Optional micro-batcher in front of the models, started on first use
+_prediction_batcher = None
+
+def get_prediction_batcher():
+    """
+    Get the shared micro-batcher, or None when batching is disabled
+    
+    Enabled with PREDICTION_BATCHING, tuned with PREDICTION_BATCH_MAX_SIZE
+    and PREDICTION_BATCH_MAX_WAIT_MS
+    """
+    global _prediction_batcher
+    if _prediction_batcher is None and models_loaded and Config.PREDICTION_BATCHING:
+        with _startup_lock:
+            if _prediction_batcher is None:
+                _prediction_batcher = MicroBatcher(
+                    predict_features_now,
+                    max_batch_size=Config.PREDICTION_BATCH_MAX_SIZE,
+                    max_wait_ms=Config.PREDICTION_BATCH_MAX_WAIT_MS,
+                )
+    return _prediction_batcher
+
+def get_prediction_metrics():
+    """Batching and inference settings plus batch size / queue wait metrics"""
+    return {
+        "batching_enabled": Config.PREDICTION_BATCHING,
+        "max_batch_size": Config.PREDICTION_BATCH_MAX_SIZE,
+        "max_wait_ms": Config.PREDICTION_BATCH_MAX_WAIT_MS,
+        "inference_workers": Config.INFERENCE_WORKERS,
+        "batcher": _prediction_batcher.metrics.snapshot() if _prediction_batcher is not None else None
+    }
+
 def get_available_teams():
     """
     Get lists of team names we can make predictions for
@@ -0,0 +1,123 @@
+"""
+Background pre-scoring of upcoming fixtures
+
+Upcoming matches are the same for every visitor, so their predictions are
+computed once per fixture list, in one batch, on a background thread.
+Pages then read them from the store instead of calling /predict per user.
+"""
+
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.models import predictor
+from app.models.scenarios import DEFAULT_STATS, STAT_FEATURES
+
+RESULT_LABELS = {'H': 'Home Win', 'A': 'Away Win', 'D': 'Draw'}
+
+
+def fixture_key(match):
+    """Stable id for a fixture, the API id when there is one"""
+    if match.get('id') is not None:
+        return str(match['id'])
+    return f"{match.get('homeTeam')}|{match.get('awayTeam')}|{match.get('date')}"
+
+
+class PredictionStore:
+    """Pre-computed predictions keyed by (fixture id, model version)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._predictions = {}
+        self._fixture_signature = None
+        self._pending = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prescoring')
+        self.runs = 0
+
+    def get(self, match, model_version=None):
+        key = (fixture_key(match), model_version or predictor.model_version)
+        with self._lock:
+            return self._predictions.get(key)
+
+    def schedule(self, matches):
+        """
+        Queue a pre-scoring run if the fixture list changed since the last one
+
+        Returns the Future of the run covering these fixtures
+        """
+        signature = hashlib.sha1(
+            '\n'.join(sorted(fixture_key(m) for m in matches)).encode('utf-8') + str(predictor.model_version).encode()
+        ).hexdigest()
+        with self._lock:
+            if signature == self._fixture_signature and self._pending is not None:
+                return self._pending
+            self._fixture_signature = signature
+            self._pending = self._executor.submit(self._score, [dict(m) for m in matches])
+            return self._pending
+
+    def _score(self, matches):
+        """Batch-predict every fixture whose teams our encoders know"""
+        if not predictor.models_loaded:
+            return 0
+
+        keys, rows = [], []
+        base_stats = [DEFAULT_STATS[name] for name in STAT_FEATURES]
+        for match in matches:
+            encoded = predictor.encode_teams(match.get('homeTeam'), match.get('awayTeam'))
+            if encoded is None:
+                continue
+            keys.append(fixture_key(match))
+            rows.append([encoded[0], encoded[1]] + base_stats)
+
+        if not rows:
+            return 0
+
+        try:
+            features = np.asarray(rows, dtype=np.float64)
+            raw_results, raw_fthg, raw_ftag = predictor.predict_features(features)
+            results, fthg, ftag = predictor.reconcile_predictions(raw_results, raw_fthg, raw_ftag)
+        except Exception as e:
+            print(f"Error pre-scoring upcoming fixtures: {e}")
+            return 0
+
+        version = predictor.model_version
+        scored = {
+            (key, version): {
+                "match_result": RESULT_LABELS[str(result)],
+                "predicted_FTHG": int(home_goals),
+                "predicted_FTAG": int(away_goals),
+                "predicted_score": f"{int(home_goals)} - {int(away_goals)}",
+                "model_version": version
+            }
+            for key, result, home_goals, away_goals in zip(keys, results, fthg, ftag)
+        }
+        with self._lock:
+            # Only keep predictions from the current model version
+            self._predictions = {k: v for k, v in self._predictions.items() if k[1] == version}
+            self._predictions.update(scored)
+            self.runs += 1
+        print(f"Pre-scored {len(scored)} upcoming fixtures (model version {version})")
+        return len(scored)
+
+    def attach(self, matches, wait=0.5):
+        """
+        Add each fixture's stored prediction as match['prediction']
+
+        Waits up to `wait` seconds for an in-flight run so a fresh fixture
+        list still renders with predictions
+        """
+        pending = self._pending
+        if pending is not None and wait:
+            try:
+                pending.result(timeout=wait)
+            except Exception:
+                pass
+        for match in matches:
+            match['prediction'] = self.get(match)
+        return matches
+
+
+# Shared store used by the web app
+prediction_store = PredictionStore()
@@ -0,0 +1,327 @@
+"""
+Elo team strength ratings
+
+The unified dataset is replayed once in order to build the ratings. After
+that every finished match updates two entries of a ratings array in
+constant time. Teams known to the prediction encoders keep their encoder
+code as their index, so ratings[code] lines up with the model features.
+Each team's rating history is kept too, so "rating as of a date" is a
+binary search instead of a replay.
+"""
+
+import os
+import threading
+from bisect import bisect_right
+
+import numpy as np
+import pandas as pd
+
+from app.config import Config
+from app.data.columnar import read_unified_dataset
+from app.utils.team_names import canonical_team_name
+
+FORMAT_VERSION = 1
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 20.0
+HOME_ADVANTAGE = 60.0
+# Share of each team's distance from the mean dropped over the summer
+SEASON_REGRESSION = 0.2
+# A gap this long between matches counts as a new season for live updates
+OFF_SEASON_DAYS = 45
+
+_rating_engine = None
+_engine_lock = threading.Lock()
+
+
+def expected_home_score(home_rating, away_rating):
+    """Expected score of the home side (win = 1, draw = 0.5), works on arrays too"""
+    return 1.0 / (1.0 + 10.0 ** ((away_rating - home_rating - HOME_ADVANTAGE) / 400.0))
+
+
+def goal_difference_multiplier(margin):
+    """Bigger wins move ratings more (World Football Elo weighting)"""
+    margin = abs(margin)
+    if margin <= 1:
+        return 1.0
+    if margin == 2:
+        return 1.5
+    return (11.0 + margin) / 8.0
+
+
+def _day(value):
+    """Day number of a date string or datetime, None if it can't be parsed"""
+    if value is None:
+        return None
+    try:
+        parsed = pd.Timestamp(str(value)[:10])
+    except (ValueError, TypeError):
+        return None
+    if pd.isna(parsed):
+        return None
+    return int(parsed.value // (86400 * 10**9))
+
+
+class RatingEngine:
+    """Current Elo ratings plus every team's rating history"""
+
+    def __init__(self, teams=()):
+        self.teams = []
+        self.team_codes = {}
+        self.ratings = np.zeros(0, dtype=np.float64)
+        self.matches_played = np.zeros(0, dtype=np.int32)
+        self._history_days = []
+        self._history_ratings = []
+        self.last_day = None
+        self.season = None
+        self.seen_match_ids = set()
+        self._lock = threading.RLock()
+        for team in teams:
+            self.team_code(team, create=True)
+
+    def team_code(self, team_name, create=False):
+        """Index of a team in the ratings array, optionally adding it at the starting rating"""
+        name = canonical_team_name(team_name)
+        code = self.team_codes.get(name)
+        if code is None and create and name:
+            code = len(self.teams)
+            self.teams.append(name)
+            self.team_codes[name] = code
+            self.ratings = np.append(self.ratings, INITIAL_RATING)
+            self.matches_played = np.append(self.matches_played, np.int32(0))
+            self._history_days.append([])
+            self._history_ratings.append([])
+        return code
+
+    def _record(self, code, day):
+        self._history_days[code].append(day)
+        self._history_ratings[code].append(float(self.ratings[code]))
+
+    def start_new_season(self, day=None):
+        """Pull every rating part of the way back to the mean between seasons"""
+        if not len(self.ratings):
+            return
+        mean = self.ratings.mean()
+        self.ratings += (mean - self.ratings) * SEASON_REGRESSION
+        if day is not None:
+            for code in range(len(self.teams)):
+                self._record(code, day)
+
+    def update(self, home_team, away_team, home_goals, away_goals, date=None, season=None, match_id=None):
+        """
+        Apply one finished match, O(1)
+
+        Returns (home_change, away_change), or None if the match was already applied
+        """
+        with self._lock:
+            if match_id is not None:
+                if match_id in self.seen_match_ids:
+                    return None
+                self.seen_match_ids.add(match_id)
+
+            day = _day(date)
+            # History must stay in date order for the as-of searches
+            if day is None or (self.last_day is not None and day < self.last_day):
+                day = self.last_day
+            new_season = (season != self.season) if season is not None else (
+                day is not None and self.last_day is not None and day - self.last_day > OFF_SEASON_DAYS)
+            if new_season and self.last_day is not None:
+                self.start_new_season(day)
+            if season is not None:
+                self.season = season
+            if day is not None:
+                self.last_day = day
+
+            home = self.team_code(home_team, create=True)
+            away = self.team_code(away_team, create=True)
+            expected = expected_home_score(self.ratings[home], self.ratings[away])
+            actual = 1.0 if home_goals > away_goals else (0.5 if home_goals == away_goals else 0.0)
+            change = K_FACTOR * goal_difference_multiplier(home_goals - away_goals) * (actual - expected)
+
+            self.ratings[home] += change
+            self.ratings[away] -= change
+            self.matches_played[home] += 1
+            self.matches_played[away] += 1
+            self._record(home, day)
+            self._record(away, day)
+            return change, -change
+
+    @classmethod
+    def build(cls, df, teams=()):
+        """
+        Replay a match dataset in order
+
+        teams fixes the first codes (pass the encoder classes so codes line
+        up). The engine's training_features holds every row's pre-match
+        home and away ratings, NaN for rows without a result.
+        """
+        engine = cls(teams)
+        matches = df.reset_index(drop=True)
+        valid = matches[['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].notna().all(axis=1).to_numpy()
+        seasons = matches['Season'].to_numpy() if 'Season' in matches else [None] * len(matches)
+        dates = matches['Date'].to_numpy() if 'Date' in matches else [None] * len(matches)
+        pre_match = np.full((len(matches), 2), np.nan)
+
+        for i, row in enumerate(zip(matches['HomeTeam'], matches['AwayTeam'], matches['FTHG'], matches['FTAG'])):
+            if not valid[i]:
+                continue
+            home, away, home_goals, away_goals = row
+            pre_match[i] = [engine.rating(home, default=INITIAL_RATING), engine.rating(away, default=INITIAL_RATING)]
+            engine.update(home, away, int(home_goals), int(away_goals), date=dates[i], season=seasons[i])
+
+        engine.training_features = pd.DataFrame(pre_match, columns=['home_rating', 'away_rating'])
+        return engine
+
+    def rating(self, team_name, as_of=None, default=None):
+        """Rating of a team now, or right after its last match on or before as_of"""
+        code = self.team_code(team_name)
+        if code is None:
+            return default
+        if as_of is None:
+            return float(self.ratings[code])
+        day = _day(as_of)
+        days = self._history_days[code]
+        position = bisect_right(days, day) if day is not None else len(days)
+        if position == 0:
+            return INITIAL_RATING
+        return self._history_ratings[code][position - 1]
+
+    def table(self, as_of=None):
+        """All teams, strongest first"""
+        rows = [{'team': team, 'rating': round(self.rating(team, as_of), 1),
+                 'matches': int(self.matches_played[code])}
+                for code, team in enumerate(self.teams)]
+        return sorted(rows, key=lambda row: -row['rating'])
+
+    def match_ratings(self, home_team, away_team, as_of=None):
+        """Both sides' ratings and the home side's expected score, None if either team is unknown"""
+        home = self.rating(home_team, as_of)
+        away = self.rating(away_team, as_of)
+        if home is None or away is None:
+            return None
+        return {
+            'home_rating': round(home, 1),
+            'away_rating': round(away, 1),
+            'home_expected_score': round(float(expected_home_score(home, away)), 4)
+        }
+
+    def rating_features(self, home_codes, away_codes):
+        """Vectorised (home rating, away rating, difference) columns for encoder codes"""
+        home = self.ratings[np.asarray(home_codes, dtype=np.int64)]
+        away = self.ratings[np.asarray(away_codes, dtype=np.int64)]
+        return np.column_stack([home, away, home - away])
+
+    def record_results(self, matches, league='Premier League'):
+        """
+        Apply finished matches in the format fetch_previous_matches returns
+
+        Matches from other competitions, and ones already applied, are
+        skipped. Returns how many were applied.
+        """
+        applied = 0
+        with self._lock:
+            for match in sorted(matches, key=lambda m: str(m.get('date', ''))):
+                if match.get('league') != league or match.get('id') is None:
+                    continue
+                home_goals, away_goals = match.get('home_score'), match.get('away_score')
+                if home_goals is None or away_goals is None:
+                    continue
+                if self.update(match.get('homeTeam'), match.get('awayTeam'), int(home_goals), int(away_goals),
+                               date=match.get('date'), match_id=str(match['id'])) is not None:
+                    applied += 1
+        return applied
+
+    def attach(self, rows, key='team'):
+        """Set row['rating'] on rows with a team name (standings, fixtures)"""
+        for row in rows:
+            rating = self.rating(row.get(key))
+            row['rating'] = int(round(rating)) if rating is not None else None
+        return rows
+
+    def save(self, path):
+        with self._lock:
+            lengths = [len(days) for days in self._history_days]
+            np.savez(path,
+                     format_version=np.array(FORMAT_VERSION, dtype=np.int32),
+                     teams=np.asarray(self.teams, dtype=str),
+                     ratings=self.ratings,
+                     matches_played=self.matches_played,
+                     history_lengths=np.asarray(lengths, dtype=np.int64),
+                     history_days=np.asarray([d for days in self._history_days for d in days], dtype=np.int64),
+                     history_ratings=np.asarray([r for ratings in self._history_ratings for r in ratings]),
+                     last_day=np.array(-1 if self.last_day is None else self.last_day, dtype=np.int64),
+                     season=np.array('' if self.season is None else str(self.season), dtype=str),
+                     seen_match_ids=np.asarray(sorted(self.seen_match_ids), dtype=str))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"{path} has ratings format {int(data['format_version'])}, expected {FORMAT_VERSION}")
+            engine = cls(data['teams'].tolist())
+            engine.ratings = data['ratings'].astype(np.float64)
+            engine.matches_played = data['matches_played'].astype(np.int32)
+            bounds = np.concatenate([[0], np.cumsum(data['history_lengths'])])
+            days, ratings = data['history_days'], data['history_ratings']
+            engine._history_days = [days[start:end].tolist() for start, end in zip(bounds[:-1], bounds[1:])]
+            engine._history_ratings = [ratings[start:end].tolist() for start, end in zip(bounds[:-1], bounds[1:])]
+            engine.last_day = int(data['last_day']) if int(data['last_day']) >= 0 else None
+            # Files saved before the season was stored start without one
+            engine.season = (str(data['season']) or None) if 'season' in data.files else None
+            engine.seen_match_ids = set(data['seen_match_ids'].tolist())
+        return engine
+
+
+def get_rating_engine():
+    """Shared engine for the web app, loaded on first use and built from the dataset if missing"""
+    global _rating_engine
+    if _rating_engine is None:
+        with _engine_lock:
+            if _rating_engine is None:
+                try:
+                    if os.path.exists(Config.RATINGS_PATH):
+                        _rating_engine = RatingEngine.load(Config.RATINGS_PATH)
+                    else:
+                        _rating_engine = build_rating_engine()
+                        _rating_engine.save(Config.RATINGS_PATH)
+                    print(f"Team ratings ready: {len(_rating_engine.teams)} teams")
+                except Exception as e:
+                    print(f"Error loading team ratings: {e}")
+                    return None
+    return _rating_engine
+
+
+def build_rating_engine(dataset_path=None):
+    """Replay the dataset with the prediction encoder's teams first, so codes match the models"""
+    from app.models import predictor
+
+    encoder = predictor.home_team_encoder
+    teams = [str(team) for team in encoder.classes_] if encoder is not None else []
+    return RatingEngine.build(read_unified_dataset(dataset_path or Config.DATASET_PATH), teams=teams)
+
+
+def record_finished_matches(matches):
+    """Feed newly finished matches into the shared engine and save it if anything changed"""
+    engine = get_rating_engine()
+    if engine is None:
+        return 0
+    applied = engine.record_results(matches)
+    if applied:
+        engine.save(Config.RATINGS_PATH)
+        print(f"Updated team ratings with {applied} finished matches")
+    return applied
+
+
+if __name__ == "__main__":
+    # python -m app.models.ratings [dataset.csv] [output.npz]
+    import sys
+    import time
+
+    started = time.perf_counter()
+    engine = build_rating_engine(sys.argv[1] if len(sys.argv) > 1 else None)
+    output = sys.argv[2] if len(sys.argv) > 2 else Config.RATINGS_PATH
+    engine.save(output)
+    print(f"Rated {len(engine.teams)} teams in {time.perf_counter() - started:.2f}s -> {output}")
+    for row in engine.table()[:10]:
+        print(f"{row['team']:<20} {row['rating']:7.1f}")
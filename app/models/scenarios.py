@@ -0,0 +1,124 @@
+"""
+What-if scenario sweeps for a single fixture
+
+Instead of re-submitting /predict once per tweak, a sweep varies one or two
+match statistics over a range, builds every combination as one feature
+matrix and scores it with a single call per model.
+"""
+
+import numpy as np
+
+from app.models import predictor
+
+# The 14 in-match statistics our models use, in feature order after the two team codes
+STAT_FEATURES = ['HTHG', 'HTAG', 'HS', 'AS', 'HST', 'AST', 'HC', 'AC', 'HF', 'AF', 'HY', 'AY', 'HR', 'AR']
+
+# Same defaults as the /predict endpoint
+DEFAULT_STATS = {
+    'HTHG': 0, 'HTAG': 0, 'HS': 5, 'AS': 5, 'HST': 2, 'AST': 2, 'HC': 3, 'AC': 3,
+    'HF': 10, 'AF': 10, 'HY': 1, 'AY': 1, 'HR': 0, 'AR': 0
+}
+
+MAX_SWEEP_AXES = 2
+MAX_AXIS_POINTS = 101
+MAX_GRID_POINTS = 2500
+
+RESULT_LABELS = {'H': 'Home Win', 'A': 'Away Win', 'D': 'Draw'}
+
+
+def _axis_values(axis):
+    """Turn one sweep axis ({feature, min, max, step} or {feature, values}) into a value array"""
+    feature = axis.get('feature')
+    if feature not in STAT_FEATURES:
+        raise ValueError(f"Unknown feature '{feature}'. Choose from: {', '.join(STAT_FEATURES)}")
+
+    if 'values' in axis:
+        values = np.asarray(axis['values'], dtype=np.float64)
+    else:
+        start = float(axis.get('min', 0))
+        stop = float(axis.get('max', start))
+        step = float(axis.get('step', 1))
+        if step <= 0:
+            raise ValueError(f"Step for '{feature}' must be positive")
+        if stop < start:
+            raise ValueError(f"Max for '{feature}' must not be below min")
+        values = np.arange(start, stop + step / 2, step)
+
+    if values.ndim != 1 or values.size == 0:
+        raise ValueError(f"No values to sweep for '{feature}'")
+    if values.size > MAX_AXIS_POINTS:
+        raise ValueError(f"Too many values for '{feature}' (max {MAX_AXIS_POINTS})")
+    if np.any(values < 0):
+        raise ValueError(f"Values for '{feature}' can't be negative")
+    return feature, values
+
+
+def build_sweep_matrix(home_code, away_code, base_stats, axes):
+    """
+    Build the full scenario grid as one feature matrix
+
+    Returns (features, feature_names, value_arrays). Rows are in C order
+    over the axes, so they reshape directly into the result surface.
+    """
+    if not isinstance(axes, list) or not all(isinstance(axis, dict) for axis in axes):
+        raise ValueError("Sweep must be a list of {feature, min, max, step} or {feature, values} objects")
+    if not axes or len(axes) > MAX_SWEEP_AXES:
+        raise ValueError(f"Sweep over 1 to {MAX_SWEEP_AXES} features")
+
+    parsed = [_axis_values(axis) for axis in axes]
+    names = [name for name, _ in parsed]
+    if len(set(names)) != len(names):
+        raise ValueError("Each swept feature can only appear once")
+
+    shape = tuple(values.size for _, values in parsed)
+    n_rows = int(np.prod(shape))
+    if n_rows > MAX_GRID_POINTS:
+        raise ValueError(f"Sweep grid has {n_rows} points (max {MAX_GRID_POINTS})")
+
+    base_row = [home_code, away_code] + [float(base_stats.get(name, DEFAULT_STATS[name])) for name in STAT_FEATURES]
+    features = np.tile(np.asarray(base_row, dtype=np.float64), (n_rows, 1))
+
+    grids = np.meshgrid(*[values for _, values in parsed], indexing='ij')
+    for (name, _), grid in zip(parsed, grids):
+        features[:, 2 + STAT_FEATURES.index(name)] = grid.ravel()
+
+    return features, names, [values for _, values in parsed]
+
+
+def sweep_match_scenarios(home_team, away_team, base_stats, axes):
+    """
+    Predict a fixture over a grid of one or two swept statistics
+
+    Returns the outcome and score surfaces, or {"error": ...} like predict_match_result
+    """
+    if not predictor.models_loaded:
+        return {"error": "Prediction models are not available"}
+
+    encoded = predictor.encode_teams(home_team, away_team)
+    if encoded is None:
+        return {"error": f"Team not found: '{home_team}' or '{away_team}'"}
+
+    try:
+        features, names, value_arrays = build_sweep_matrix(encoded[0], encoded[1], base_stats, axes)
+    except (TypeError, ValueError) as e:
+        return {"error": str(e)}
+
+    # One pass per model over the whole grid
+    raw_results, raw_fthg, raw_ftag = predictor.predict_features_now(features)
+    results, fthg, ftag = predictor.reconcile_predictions(raw_results, raw_fthg, raw_ftag)
+
+    shape = tuple(values.size for values in value_arrays)
+    outcome_counts = {label: int(np.sum(results == code)) for code, label in RESULT_LABELS.items()}
+
+    return {
+        "home_team": home_team,
+        "away_team": away_team,
+        "axes": [{"feature": name, "values": values.tolist()} for name, values in zip(names, value_arrays)],
+        "match_result": results.reshape(shape).tolist(),
+        "fthg": fthg.reshape(shape).tolist(),
+        "ftag": ftag.reshape(shape).tolist(),
+        "expected_fthg": np.round(raw_fthg, 3).reshape(shape).tolist(),
+        "expected_ftag": np.round(raw_ftag, 3).reshape(shape).tolist(),
+        "outcome_share": {label: round(count / results.size, 4) for label, count in outcome_counts.items()},
+        "points": int(results.size)
+    }
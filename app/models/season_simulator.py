@@ -0,0 +1,280 @@
+"""
+Monte Carlo simulation of the rest of the EPL season
+
+Every remaining fixture is scored once with the predictor (outcome
+probabilities and expected goals). Then thousands of seasons are played
+out as NumPy arrays in blocks, split across a process pool, and the
+results are summarised as final points and league position distributions.
+
+The web app runs projections on a background thread through
+SeasonProjections, which keeps the latest results per table and
+fixture list, so requests never wait on a simulation.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from app.utils.team_names import canonical_team_name
+
+# Long-run EPL rates, used for fixtures involving a team our models don't know
+FALLBACK_PROBABILITIES = np.array([0.46, 0.25, 0.29])  # Home win, draw, away win
+FALLBACK_HOME_GOALS = 1.53
+FALLBACK_AWAY_GOALS = 1.21
+
+DEFAULT_SIMULATIONS = 10000
+MAX_SIMULATIONS = 200000
+# Cap on ?simulations= for the API route
+MAX_REQUEST_SIMULATIONS = 50000
+# How long the API waits for a projection before answering "still running"
+REQUEST_WAIT_SECONDS = 2.0
+# Projections kept, one per (table, fixtures, simulation count)
+MAX_CACHED_PROJECTIONS = 8
+# Seasons drawn per block, keeps the (seasons, fixtures) arrays to a few MB
+SIMULATION_BLOCK = 2000
+# Below this many simulations the pool's start-up cost outweighs the split
+MIN_SIMULATIONS_PER_WORKER = 2500
+
+TOP_FOUR = 4
+RELEGATION_PLACES = 3
+
+_simulation_pool = None
+
+
+def score_fixtures(fixtures, team_index):
+    """
+    Score every remaining fixture in one batch
+
+    Returns (home_idx, away_idx, probabilities, expected_home_goals, expected_away_goals, known)
+    for the fixtures whose teams are both in the table
+    """
+    # Imported here so simulation workers don't load the models
+    from app.models import predictor
+    from app.models.scenarios import DEFAULT_STATS, STAT_FEATURES
+
+    home_idx, away_idx, rows, known = [], [], [], []
+    base_stats = [DEFAULT_STATS[name] for name in STAT_FEATURES]
+    # API names ('Manchester City FC') and dataset names ('Man City') meet on the canonical name
+    canonical_index = {canonical_team_name(team): i for team, i in team_index.items()}
+
+    for fixture in fixtures:
+        home = canonical_team_name(fixture.get('homeTeam'))
+        away = canonical_team_name(fixture.get('awayTeam'))
+        if home not in canonical_index or away not in canonical_index:
+            continue
+        home_idx.append(canonical_index[home])
+        away_idx.append(canonical_index[away])
+        encoded = predictor.encode_teams(home, away) if predictor.models_loaded else None
+        known.append(encoded is not None)
+        rows.append(([encoded[0], encoded[1]] if encoded is not None else [0, 0]) + base_stats)
+
+    n_fixtures = len(rows)
+    probabilities = np.tile(FALLBACK_PROBABILITIES, (n_fixtures, 1))
+    expected_home = np.full(n_fixtures, FALLBACK_HOME_GOALS)
+    expected_away = np.full(n_fixtures, FALLBACK_AWAY_GOALS)
+    known = np.asarray(known, dtype=bool)
+
+    if known.any():
+        features = np.asarray(rows, dtype=np.float64)[known]
+        proba, fthg, ftag = predictor.predict_outcome_probabilities(features)
+        probabilities[known] = proba
+        expected_home[known] = np.maximum(fthg, 0)
+        expected_away[known] = np.maximum(ftag, 0)
+
+    return (np.asarray(home_idx, dtype=np.int64), np.asarray(away_idx, dtype=np.int64),
+            probabilities, expected_home, expected_away, known)
+
+
+def simulate_seasons(n_simulations, base_points, tiebreak, home_idx, away_idx, probabilities, seed):
+    """
+    Play out n_simulations seasons, SIMULATION_BLOCK at a time
+
+    Returns (final_points, final_positions), both shaped (n_simulations, n_teams),
+    positions are 0-based
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = len(base_points)
+    n_fixtures = len(home_idx)
+    cumulative = np.cumsum(probabilities, axis=1)
+
+    # Scatter each fixture's points onto its two teams with one matrix product each
+    home_onehot = np.zeros((n_fixtures, n_teams), dtype=np.int16)
+    away_onehot = np.zeros((n_fixtures, n_teams), dtype=np.int16)
+    home_onehot[np.arange(n_fixtures), home_idx] = 1
+    away_onehot[np.arange(n_fixtures), away_idx] = 1
+
+    final_points = np.empty((n_simulations, n_teams), dtype=np.int16)
+    final_positions = np.empty((n_simulations, n_teams), dtype=np.int8)
+    for start in range(0, n_simulations, SIMULATION_BLOCK):
+        block = min(SIMULATION_BLOCK, n_simulations - start)
+
+        # Sample every outcome of every season from the cumulative probabilities
+        draws = rng.random((block, n_fixtures))
+        home_win = draws < cumulative[:, 0]
+        draw = ~home_win & (draws < cumulative[:, 1])
+        away_win = ~home_win & ~draw
+
+        home_points = (3 * home_win + draw).astype(np.int16)
+        away_points = (3 * away_win + draw).astype(np.int16)
+        points = base_points[None, :] + home_points @ home_onehot + away_points @ away_onehot
+
+        # Rank on points, then projected goal difference, then a coin toss
+        jitter = rng.random((block, n_teams)) * 1e-3
+        score = points * 1000.0 + tiebreak[None, :] + jitter
+        order = np.argsort(-score, axis=1)
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(n_teams)[None, :], axis=1)
+
+        final_points[start:start + block] = points
+        final_positions[start:start + block] = positions
+
+    return final_points, final_positions
+
+
+def _simulate_chunk(args):
+    return simulate_seasons(*args)
+
+
+def get_simulation_pool(workers):
+    """Shared process pool for simulations, started on first use"""
+    global _simulation_pool
+    if _simulation_pool is None:
+        _simulation_pool = ProcessPoolExecutor(max_workers=workers,
+                                               mp_context=multiprocessing.get_context('spawn'))
+    return _simulation_pool
+
+
+def run_simulations(n_simulations, base_points, tiebreak, home_idx, away_idx, probabilities,
+                    workers=None, seed=None):
+    """Split the simulations across the process pool and stitch the results back together"""
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, n_simulations // MIN_SIMULATIONS_PER_WORKER))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    chunks = np.array_split(np.arange(n_simulations), workers)
+    jobs = [(len(chunk), base_points, tiebreak, home_idx, away_idx, probabilities, child_seed)
+            for chunk, child_seed in zip(chunks, seeds)]
+
+    if workers == 1:
+        results = [_simulate_chunk(jobs[0])]
+    else:
+        results = list(get_simulation_pool(workers).map(_simulate_chunk, jobs))
+
+    points = np.concatenate([r[0] for r in results])
+    positions = np.concatenate([r[1] for r in results])
+    return points, positions, workers
+
+
+def simulate_season(standings, fixtures, n_simulations=DEFAULT_SIMULATIONS, workers=None, seed=None):
+    """
+    Project the final league table
+
+    standings: rows from fetch_epl_standings (team, points, goal_difference, played)
+    fixtures: remaining matches with homeTeam/awayTeam names, any spelling of the standings' teams
+    """
+    if not standings:
+        return {"error": "No standings data available"}
+    n_simulations = int(min(max(n_simulations, 1), MAX_SIMULATIONS))
+
+    teams = [row['team'] for row in standings]
+    team_index = {team: i for i, team in enumerate(teams)}
+    n_teams = len(teams)
+    base_points = np.array([row.get('points', 0) for row in standings], dtype=np.int16)
+    goal_difference = np.array([row.get('goal_difference', 0) for row in standings], dtype=np.float64)
+
+    started = time.perf_counter()
+    home_idx, away_idx, probabilities, expected_home, expected_away, known = score_fixtures(fixtures, team_index)
+    scoring_seconds = time.perf_counter() - started
+
+    # Expected goal difference from the remaining games breaks ties on points
+    projected_gd = goal_difference.copy()
+    np.add.at(projected_gd, home_idx, expected_home - expected_away)
+    np.add.at(projected_gd, away_idx, expected_away - expected_home)
+    tiebreak = (projected_gd - projected_gd.min()) / (np.ptp(projected_gd) + 1) * 0.9
+
+    started = time.perf_counter()
+    points, positions, workers_used = run_simulations(
+        n_simulations, base_points, tiebreak, home_idx, away_idx, probabilities, workers=workers, seed=seed)
+    simulation_seconds = time.perf_counter() - started
+
+    # position_counts[team, position] = number of seasons finishing there
+    flat_index = np.arange(n_teams)[None, :] * n_teams + positions
+    position_counts = np.bincount(flat_index.ravel(), minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+    position_probabilities = position_counts / n_simulations
+    points_percentiles = np.percentile(points, [5, 25, 50, 75, 95], axis=0)
+
+    table = []
+    for i, team in enumerate(teams):
+        table.append({
+            "team": team,
+            "current_points": int(base_points[i]),
+            "remaining_fixtures": int(np.sum(home_idx == i) + np.sum(away_idx == i)),
+            "expected_points": round(float(points[:, i].mean()), 2),
+            "points_percentiles": {
+                f"p{p}": int(value) for p, value in zip([5, 25, 50, 75, 95], points_percentiles[:, i])
+            },
+            "expected_position": round(float(positions[:, i].mean()) + 1, 2),
+            "position_probabilities": np.round(position_probabilities[i], 4).tolist(),
+            "title_probability": round(float(position_probabilities[i, 0]), 4),
+            "top_four_probability": round(float(position_probabilities[i, :TOP_FOUR].sum()), 4),
+            "relegation_probability": round(float(position_probabilities[i, n_teams - RELEGATION_PLACES:].sum()), 4)
+        })
+    table.sort(key=lambda row: row["expected_position"])
+
+    return {
+        "simulations": n_simulations,
+        "fixtures_simulated": int(len(home_idx)),
+        "fixtures_scored_by_model": int(known.sum()),
+        "table": table,
+        "timing": {
+            "scoring_ms": round(scoring_seconds * 1000, 2),
+            "simulation_ms": round(simulation_seconds * 1000, 2),
+            "simulations_per_second": round(n_simulations / simulation_seconds) if simulation_seconds > 0 else None,
+            "workers": workers_used
+        }
+    }
+
+
+class SeasonProjections:
+    """Season projections run on a background thread, kept per table, fixture list and simulation count"""
+
+    def __init__(self, max_cached=MAX_CACHED_PROJECTIONS):
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._runs = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='season-simulation')
+
+    @staticmethod
+    def signature(standings, fixtures, n_simulations):
+        table = [(row.get('team'), row.get('points'), row.get('goal_difference')) for row in standings or []]
+        remaining = [(fixture.get('homeTeam'), fixture.get('awayTeam')) for fixture in fixtures or []]
+        payload = json.dumps([table, remaining, n_simulations], default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def submit(self, standings, fixtures, n_simulations=DEFAULT_SIMULATIONS):
+        """
+        Future of the projection for this table and fixture list
+
+        A finished or running projection of the same inputs is reused, a
+        failed one is run again.
+        """
+        key = self.signature(standings, fixtures, n_simulations)
+        with self._lock:
+            future = self._runs.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._executor.submit(simulate_season, standings, fixtures, n_simulations)
+                self._runs[key] = future
+            self._runs.move_to_end(key)
+            while len(self._runs) > self.max_cached:
+                self._runs.popitem(last=False)
+            return future
+
+
+# Shared projections used by the web app
+season_projections = SeasonProjections()
@@ -2,6 +2,9 @@ import hashlib
 import os
 from datetime import datetime, timedelta
 
+from .team_logos import TeamLogoResolver, team_logo_resolver
+from .team_logos import team_logo_mapping as default_team_logo_mapping
+
 def hash_password(password):
     """Hash a password using SHA256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -10,19 +13,26 @@ def verify_password(stored_password, provided_password):
     """Verify a password against its hash"""
     return stored_password == hashlib.sha256(provided_password.encode()).hexdigest()
 
-def get_team_logo(team_name, team_logo_mapping):
-    """Get team logo filename with fuzzy matching"""
-    # Direct match first
-    if team_name in team_logo_mapping:
-        return team_logo_mapping[team_name]
-    
-    # Try partial matching for common cases
-    for key, value in team_logo_mapping.items():
-        if key in team_name or team_name in key:
-            return value
+# Resolvers for custom mappings, keyed by the mapping's id (the entry keeps the mapping alive)
+_custom_resolvers = {}
+MAX_CUSTOM_RESOLVERS = 8
+
+def get_team_logo(team_name, team_logo_mapping=None):
+    """
+    Get team logo filename with fuzzy matching
     
-    # Return default if no match found
-    return 'default.png'
+    A custom mapping is indexed on its first use and reused after that,
+    so pass a new dict rather than changing one in place.
+    """
+    # All logo lookups share the indexed resolver in team_logos
+    if team_logo_mapping is None or team_logo_mapping is default_team_logo_mapping:
+        return team_logo_resolver.resolve(team_name)
+    entry = _custom_resolvers.get(id(team_logo_mapping))
+    if entry is None or entry[0] is not team_logo_mapping:
+        if len(_custom_resolvers) >= MAX_CUSTOM_RESOLVERS:
+            _custom_resolvers.clear()
+        entry = _custom_resolvers[id(team_logo_mapping)] = (team_logo_mapping, TeamLogoResolver(team_logo_mapping))
+    return entry[1].resolve(team_name)
 
 def generate_sample_form_data():
     """Generate sample form data for teams"""
@@ -0,0 +1,175 @@
+import re
+from functools import lru_cache
+
+# Map team names to their logo filenames
+# This helps us display the correct team logos in the UI
+team_logo_mapping = {
+    'Arsenal': 'Arsenal-Logo.png',
+    'Arsenal FC': 'Arsenal-Logo.png',
+    'Aston Villa': 'Aston Villa.png',
+    'Aston Villa FC': 'Aston Villa.png',
+    'Birmingham': 'Birmingham.png',
+    'Blackburn': 'Blackburn.png',
+    'Blackpool': 'Blackpool.png',
+    'Bolton': 'Bolton.png',
+    'Bournemouth': 'Bournemouth.jpg',
+    'AFC Bournemouth': 'Bournemouth.jpg',
+    'Brighton': 'Brighton.webp',
+    'Brighton & Hove Albion': 'Brighton.webp',
+    'Brighton & Hove Albion FC': 'Brighton.webp',
+    'Burnley': 'Burnley.png',
+    'Burnley FC': 'Burnley.png',
+    'Cardiff': 'Cardiff.jpg',
+    'Chelsea': 'Chelsea.png',
+    'Chelsea FC': 'Chelsea.png',
+    'Crystal Palace': 'Crystal Palace.jpg',
+    'Crystal Palace FC': 'Crystal Palace.jpg',
+    'Everton': 'Everton.png',
+    'Everton FC': 'Everton.png',
+    'Fulham': 'Fulham.png',
+    'Fulham FC': 'Fulham.png',
+    'Hull': 'Hull.jpg',
+    'Huddersfield': 'Hundersfield.png',
+    'Huddersfield Town AFC': 'Hundersfield.png',
+    'Leicester': 'Leicester.png',
+    'Leicester City': 'Leicester.png',
+    'Leicester City FC': 'Leicester.png',
+    'Liverpool': 'Liverpool.png',
+    'Liverpool FC': 'Liverpool.png',
+    'Man City': 'Man City.jpg',
+    'Manchester City': 'Man City.jpg',
+    'Manchester City FC': 'Man City.jpg',
+    'Man United': 'Man United.png',
+    'Manchester United': 'Man United.png',
+    'Manchester United FC': 'Man United.png',
+    'Middlesbrough': 'Middlesbrough.png',
+    'Newcastle': 'Newcastle United.png',
+    'Newcastle United': 'Newcastle United.png',
+    'Newcastle United FC': 'Newcastle United.png',
+    'Norwich': 'Norwich.png',
+    'Norwich City FC': 'Norwich.png',
+    'QPR': 'QPR.png',
+    'Queens Park Rangers FC': 'QPR.png',
+    'Reading': 'Reading.png',
+    'Sheffield United': 'Sheffield United.jpg',
+    'Sheffield United FC': 'Sheffield United.jpg',
+    'Southampton': 'SouthAmpton.jpeg',
+    'Southampton FC': 'SouthAmpton.jpeg',
+    'Stoke': 'Stock.png',
+    'Stoke City FC': 'Stock.png',
+    'Sunderland': 'Sunderland.png',
+    'Sunderland AFC': 'Sunderland.png',
+    'Swansea': 'Swansea.png',
+    'Swansea City AFC': 'Swansea.png',
+    'Tottenham': 'Tottenham.png',
+    'Tottenham Hotspur': 'Tottenham.png',
+    'Tottenham Hotspur FC': 'Tottenham.png',
+    'Watford': 'Watford.png',
+    'Watford FC': 'Watford.png',
+    'West Brom': 'West Brom.jpg',
+    'West Bromwich Albion FC': 'West Brom.jpg',
+    'West Ham': 'West Ham.png',
+    'West Ham United': 'West Ham.png',
+    'West Ham United FC': 'West Ham.png',
+    'Wigan': 'Wigan.png',
+    'Wigan Athletic FC': 'Wigan.png',
+    'Wolves': 'Wolves.png',
+    'Wolverhampton Wanderers': 'Wolves.png',
+    'Wolverhampton Wanderers FC': 'Wolves.png',
+    # Add missing teams from sample data
+    'Leeds United': 'Leeds United.png',
+    'Leeds United FC': 'Leeds United.png',
+    'Brentford': 'Brentford.png',
+    'Brentford FC': 'Brentford.png',
+    'Nottingham Forest': 'Nottingham Forest.png',
+    'Nottingham Forest FC': 'Nottingham Forest.png',
+    'Luton Town': 'Luton Town.png',
+    'Luton Town FC': 'Luton Town.png'
+}
+
+# Logo shown when a team can't be matched to any known logo
+DEFAULT_TEAM_LOGO = 'score_sight_logo2.png'
+
+# Club suffixes/prefixes that don't help tell teams apart
+_CLUB_TOKENS = {'fc', 'afc'}
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _normalize_tokens(team_name):
+    """Case-fold a team name and drop punctuation and club suffixes like FC/AFC"""
+    tokens = _TOKEN_PATTERN.findall(team_name.casefold().replace('&', ' and '))
+    return ' '.join(token for token in tokens if token not in _CLUB_TOKENS)
+
+
+class TeamLogoResolver:
+    """
+    Resolve team names to logo filenames
+
+    The mapping is indexed once up front so the common cases (exact name,
+    different casing, name with/without "FC") are single dict lookups.
+    Anything else falls back to substring matching, which is memoized so
+    each unknown name is only scanned once.
+    """
+
+    def __init__(self, mapping, default=DEFAULT_TEAM_LOGO, cache_size=1024):
+        self.mapping = mapping
+        self.default = default
+        self._exact = dict(mapping)
+        self._casefolded = {}
+        self._normalized = {}
+        # (lowered key, key length, logo) in mapping order for the substring scan
+        self._substring_keys = []
+        for key, value in mapping.items():
+            lowered = key.casefold()
+            # Keep the first entry on collisions, like the old linear scan did
+            self._casefolded.setdefault(lowered, value)
+            normalized = _normalize_tokens(key)
+            if normalized:
+                self._normalized.setdefault(normalized, value)
+            self._substring_keys.append((lowered, len(key), value))
+        self._fuzzy_lookup = lru_cache(maxsize=cache_size)(self._substring_match)
+
+    def resolve(self, team_name):
+        """Get team logo filename for a team name"""
+        if not team_name:
+            return self.default
+
+        # Direct match first
+        logo = self._exact.get(team_name)
+        if logo is not None:
+            return logo
+
+        # Case-insensitive exact match
+        lowered = team_name.casefold()
+        logo = self._casefolded.get(lowered)
+        if logo is not None:
+            return logo
+
+        # Same name once punctuation and FC/AFC are ignored
+        logo = self._normalized.get(_normalize_tokens(team_name))
+        if logo is not None:
+            return logo
+
+        return self._fuzzy_lookup(lowered)
+
+    def _substring_match(self, lowered):
+        """Partial matching for common cases, with a length guard to avoid false positives"""
+        name_is_long_enough = len(lowered) > 3
+        for key, key_length, value in self._substring_keys:
+            if (key_length > 3 and key in lowered) or \
+               (name_is_long_enough and lowered in key):
+                return value
+        return self.default
+
+    def cache_info(self):
+        """Hit/miss statistics for the fuzzy-match memo"""
+        return self._fuzzy_lookup.cache_info()
+
+
+# Shared resolver for the default mapping
+team_logo_resolver = TeamLogoResolver(team_logo_mapping)
+
+
+def get_team_logo(team_name):
+    """Get team logo filename with improved fuzzy matching"""
+    return team_logo_resolver.resolve(team_name)
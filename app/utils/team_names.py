@@ -0,0 +1,55 @@
+"""
+Canonical team names
+
+Historical data (football-data.co.uk CSVs) uses short names like 'Man City'
+while the live APIs return 'Manchester City FC'. Everything keyed on team
+name in our stores uses the short dataset names.
+"""
+
+import re
+
+TEAM_NAME_ALIASES = {
+    'AFC Bournemouth': 'Bournemouth',
+    'Brighton & Hove Albion': 'Brighton',
+    'Brighton and Hove Albion': 'Brighton',
+    'Cardiff City': 'Cardiff',
+    'Huddersfield Town': 'Huddersfield',
+    'Hull City': 'Hull',
+    'Ipswich Town': 'Ipswich',
+    'Leeds': 'Leeds United',
+    'Leicester City': 'Leicester',
+    'Luton Town': 'Luton',
+    'Manchester City': 'Man City',
+    'Manchester United': 'Man United',
+    'Manchester Utd': 'Man United',
+    'Man Utd': 'Man United',
+    'Newcastle United': 'Newcastle',
+    "Nott'm Forest": 'Nottingham Forest',
+    'Norwich City': 'Norwich',
+    'Queens Park Rangers': 'QPR',
+    'Sheffield Utd': 'Sheffield United',
+    'Spurs': 'Tottenham',
+    'Stoke City': 'Stoke',
+    'Swansea City': 'Swansea',
+    'Tottenham Hotspur': 'Tottenham',
+    'West Bromwich Albion': 'West Brom',
+    'West Ham United': 'West Ham',
+    'Wigan Athletic': 'Wigan',
+    'Wolverhampton Wanderers': 'Wolves',
+    'Wolverhampton': 'Wolves',
+}
+
+_SUFFIX = re.compile(r'\s+(A?FC)$', re.IGNORECASE)
+_PREFIX = re.compile(r'^A?FC\s+', re.IGNORECASE)
+_CASEFOLD_ALIASES = {alias.casefold(): name for alias, name in TEAM_NAME_ALIASES.items()}
+
+
+def canonical_team_name(team_name):
+    """Map any spelling of a team to the short name used in our dataset"""
+    if not team_name:
+        return team_name
+    name = ' '.join(str(team_name).split())
+    if name in TEAM_NAME_ALIASES:
+        return TEAM_NAME_ALIASES[name]
+    stripped = _PREFIX.sub('', _SUFFIX.sub('', name))
+    return _CASEFOLD_ALIASES.get(stripped.casefold(), _CASEFOLD_ALIASES.get(name.casefold(), stripped))
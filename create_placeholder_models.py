@@ -4,6 +4,8 @@ from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
 import pandas as pd
 
+from app.models.compact_forest import export_all
+
 def create_placeholder_models():
     """
     Create placeholder models to prevent the application from crashing
@@ -81,6 +83,9 @@ def create_placeholder_models():
     joblib.dump(le_home, 'home_team_encoder.pkl')
     joblib.dump(le_away, 'away_team_encoder.pkl')
     
+    # Compact copies used for fast loading at serving time
+    export_all(clf, reg_fthg, reg_ftag, le_home, le_away)
+    
     print("Placeholder models created successfully!")
 
 if __name__ == "__main__":
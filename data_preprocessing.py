@@ -1,92 +1,545 @@
 import pandas as pd
+import numpy as np
 import glob
+import hashlib
+import json
 import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from app.data.columnar import append_columnar, columnar_path_for, write_columnar
+from app.data.partitioned import (DEFAULT_LEAGUE, append_partitions, entry_partitions, load_partition_manifest,
+                                  remove_partitions, save_partition_manifest, write_partitions)
+from app.utils.team_names import canonical_team_name
+
 # These are the columns we want to keep from each dataset
 # They represent important match statistics we'll use for our predictions
 req_cols = ['Date', 'HomeTeam', 'AwayTeam', 'HTHG', 'HTAG', 'HTR', 'FTHG', 'FTAG', 'FTR', 'HS', 'AS', 'HST', 'AST', 'HC', 'AC', 'HF', 'AF', 'HY', 'AY', 'HR', 'AR']
 
-def standardize_datasets():
+# Explicit types so pandas doesn't have to infer them for every file
+# (nullable integers because some files end with a blank row)
+req_dtypes = {col: 'string' for col in ['Date', 'HomeTeam', 'AwayTeam', 'HTR', 'FTR']}
+req_dtypes.update({col: 'Int16' for col in req_cols if col not in req_dtypes})
+
+# Where the season files live and where the unified dataset goes
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+RAW_DIR = os.path.join(PROJECT_DIR, 'data', 'raw')
+PROCESSED_DIR = os.path.join(PROJECT_DIR, 'data', 'processed')
+UNIFIED_FILENAME = 'unified_dataset.csv'
+MANIFEST_FILENAME = 'ingest_manifest.json'
+
+# Streaming ingestion: rows per chunk and where the league/season partitions go
+STREAM_CHUNK_ROWS = 5000
+PARTITIONS_DIR = os.path.join(PROCESSED_DIR, 'partitions')
+# Source of the season files in the partition manifest
+DEFAULT_SOURCE = os.path.join('data', 'raw')
+REJECTED_FILENAME = '_rejected.csv'
+COUNT_COLS = [col for col in req_cols if req_dtypes[col] == 'Int16']
+
+# Date layouts seen in the season files, checked in this order. Slashed
+# dates are football-data.co.uk's day-first style, with 2-digit years up to
+# 2016-17 and 4-digit years after that.
+DATE_PATTERNS = [
+    (re.compile(r'\d{4}-\d{1,2}-\d{1,2}'), '%Y-%m-%d'),
+    (re.compile(r'(\d{1,2})/(\d{1,2})/\d{4}'), '%d/%m/%Y'),
+    (re.compile(r'(\d{1,2})/(\d{1,2})/\d{2}'), '%d/%m/%y'),
+]
+DATE_SAMPLE_ROWS = 500
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Content hash of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def season_from_filename(path):
+    """Get the season from the filename (e.g., "2010-2011" from "season-2010-2011.csv")"""
+    return os.path.basename(path).replace("season-", "").replace(".csv", "")
+
+def detect_date_format(values):
+    """
+    Work out the one format a date column is written in, from a sample of it
+
+    Returns (format, ambiguous), format is None if nothing matches. Slashed
+    dates are read day first unless some value can only be month first.
+    ambiguous is True when no sampled day or month is over 12, so the
+    order is taken on trust.
+    """
+    # A small sample, checked in plain Python
+    sample = [value.strip() for value in values.dropna().head(DATE_SAMPLE_ROWS).tolist() if value.strip()]
+    best, fmt = [], None
+    for pattern, candidate in DATE_PATTERNS:
+        matches = [match for match in map(pattern.fullmatch, sample) if match]
+        if len(matches) > len(best):
+            best, fmt = matches, candidate
+    if fmt is None or fmt.startswith('%Y'):
+        return fmt, False
+
+    day_first = any(int(match.group(1)) > 12 for match in best)
+    month_first = any(int(match.group(2)) > 12 for match in best)
+    if month_first and not day_first:
+        fmt = fmt.replace('%d/%m', '%m/%d')
+    return fmt, not (day_first or month_first)
+
+def parse_dates(values, fmt, season=None):
+    """
+    Parse a whole date column with one explicit format
+
+    Returns (dates, flagged). flagged marks rows that have a date that
+    doesn't fit the format, or that falls outside the season (July to the
+    end of the following August) when the season is known.
+    """
+    if fmt is None:
+        dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    else:
+        dates = pd.to_datetime(values, format=fmt, errors='coerce')
+
+    # Only the rows that failed get looked at again, with whitespace stripped
+    failed = dates.isna().to_numpy() & values.notna().to_numpy()
+    flagged = pd.Series(False, index=values.index)
+    if failed.any():
+        text = values[failed].str.strip()
+        text = text[text != '']
+        if fmt is not None and len(text):
+            retried = pd.to_datetime(text, format=fmt, errors='coerce')
+            dates[retried.index] = retried
+            text = text[retried.isna()]
+        flagged[text.index] = True
+    if season:
+        start = int(season[:4])
+        outside = (dates < pd.Timestamp(start, 7, 1)) | (dates >= pd.Timestamp(start + 1, 9, 1))
+        flagged |= outside.fillna(False)
+    return dates, flagged.astype(bool)
+
+def parse_season_file(path):
+    """
+    Load one season file with only the columns we need and fixed types
+    Runs in a worker process, returns (path, dataframe or None, message)
+    """
+    try:
+        df = pd.read_csv(path, usecols=lambda col: col in req_cols, dtype=req_dtypes)
+    except Exception as e:
+        return path, None, f"Error processing {path}: {str(e)}"
+
+    # Check if we have all the columns we need
+    missing_cols = [col for col in req_cols if col not in df.columns]
+    if missing_cols:
+        return path, None, f"Missing columns in {path}: {missing_cols}"
+
+    # Keep the columns in our standard order and track which season this data is from
+    df = df[req_cols]
+    season = season_from_filename(path)
+    df['Season'] = season
+
+    # Convert the date column with the format this file uses
+    fmt, ambiguous = detect_date_format(df['Date'])
+    raw_dates = df['Date']
+    df['Date'], flagged = parse_dates(raw_dates, fmt, season)
+    df.attrs['dates'] = {'format': fmt, 'ambiguous': bool(ambiguous), 'flagged': int(flagged.sum())}
+
+    message = f"Successfully processed {path} - Shape: {df.shape}, dates {fmt}"
+    if ambiguous:
+        message += " (day/month order assumed)"
+    if flagged.any():
+        examples = ', '.join(f"row {i}: {raw_dates[i]!r}" for i in flagged[flagged].index[:5])
+        message += f"\n  {int(flagged.sum())} dates don't fit {fmt} or season {season}: {examples}"
+    return path, df, message
+
+def parse_season_files(paths, workers=None):
+    """Parse several season files in parallel, in the order given"""
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    if workers == 1:
+        results = [parse_season_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(parse_season_file, paths))
+
+    parsed = {}
+    for path, df, message in results:
+        print(message)
+        if df is not None:
+            parsed[path] = df
+    return parsed
+
+def source_label(directory):
+    """How a source directory is named in the partition manifest, relative to the project when inside it"""
+    path = os.path.abspath(directory)
+    return os.path.relpath(path, PROJECT_DIR) if path.startswith(PROJECT_DIR + os.sep) else path
+
+def manifest_key(source, name):
+    """Partition manifest key of a source file: the bare name for the season files in data/raw"""
+    return name if source == DEFAULT_SOURCE else os.path.join(source, name)
+
+def entry_source(entry):
+    # Entries written before sources were recorded all came from data/raw
+    return entry.get('source', DEFAULT_SOURCE)
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(output_dir, manifest):
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def standardize_datasets(raw_dir=RAW_DIR, output_dir=PROCESSED_DIR, workers=None):
     """
     Process all season CSV files and combine them into one standardized dataset
     This makes it easier to work with the data for our machine learning models
     """
-    # Find all the season CSV files in our directory
-    season_files = glob.glob("season-*.csv")
-    
+    # Find all the season CSV files in our raw data directory
+    season_files = sorted(glob.glob(os.path.join(raw_dir, "season-*.csv")))
+
     print(f"Found {len(season_files)} season files")
-    print("Files:", season_files)
-    
-    # We'll store each processed season in this list
-    all_seasons = []
-    
-    # Go through each file one by one
-    for file in season_files:
-        try:
-            print(f"\nProcessing {file}...")
-            # Load the CSV data
-            df = pd.read_csv(file)
-            
-            # Get the season from the filename (e.g., "2010-2011" from "season-2010-2011.csv")
-            season = file.replace("season-", "").replace(".csv", "")
-            
-            print(f"Original shape: {df.shape}")
-            print(f"Original columns: {list(df.columns)}")
-            
-            # Check if we have all the columns we need
-            missing_cols = [col for col in req_cols if col not in df.columns]
-            if missing_cols:
-                print(f"Missing columns in {file}: {missing_cols}")
-                continue
-            
-            # Keep only the columns we need
-            df_standardized = df[req_cols].copy()
-            
-            # Add a column to track which season this data is from
-            df_standardized['Season'] = season
-            
-            # Convert the date column to proper date format
-            df_standardized['Date'] = pd.to_datetime(df_standardized['Date'], errors='coerce')
-            
-            # Add this season's data to our list
-            all_seasons.append(df_standardized)
-            
-            print(f"Successfully processed {file} - Shape: {df_standardized.shape}")
-            
-        except Exception as e:
-            print(f"Error processing {file}: {str(e)}")
-            continue
-    
+    print("Files:", [os.path.basename(f) for f in season_files])
+
+    # Parse every season at once, in parallel
+    parsed = parse_season_files(season_files, workers)
+    all_seasons = [parsed[path] for path in season_files if path in parsed]
+
     # Combine all seasons into one big dataset
     if all_seasons:
         print(f"\nCombining {len(all_seasons)} seasons...")
         unified_df = pd.concat(all_seasons, ignore_index=True)
-        
+
         # Sort by date so the data is in chronological order
-        unified_df = unified_df.sort_values('Date').reset_index(drop=True)
-        
+        unified_df = unified_df.sort_values('Date', kind='stable').reset_index(drop=True)
+
         # Save our combined dataset to a new CSV file
-        unified_df.to_csv('unified_dataset.csv', index=False)
-        
+        os.makedirs(output_dir, exist_ok=True)
+        unified_path = os.path.join(output_dir, UNIFIED_FILENAME)
+        unified_df.to_csv(unified_path, index=False)
+
+        # Also save a typed, columnar copy that loads without re-parsing the CSV
+        schema = write_columnar(unified_df, columnar_path_for(unified_path))
+        print(f"Columnar copy saved to '{columnar_path_for(unified_path)}' ({len(schema['columns'])} columns)")
+
+        # Remember exactly which file contents are in the dataset
+        source = source_label(raw_dir)
+        files = {
+            os.path.basename(path): {
+                'sha256': file_sha256(path),
+                'source': source,
+                'season': season_from_filename(path),
+                'rows': len(parsed[path]),
+                'dates': parsed[path].attrs.get('dates'),
+                'ingested_at': datetime.now().isoformat(timespec='seconds')
+            } for path in season_files if path in parsed
+        }
+
+        # And the same matches split by league and season, for queries that only need some of them.
+        # Files streamed in from other directories keep their partitions.
+        partitions_path = os.path.join(output_dir, 'partitions')
+        others = {key: entry for key, entry in load_partition_manifest(partitions_path)['files'].items()
+                  if entry_source(entry) != source}
+        try:
+            partitions = write_partitions(unified_df, partitions_path,
+                                          files={manifest_key(source, name): entry for name, entry in files.items()},
+                                          keep=others)
+            print(f"{len(partitions)} league/season partitions saved to '{partitions_path}'")
+        except ValueError as e:
+            print(f"Partitions not rebuilt: {e}")
+
+        save_manifest(output_dir, {'files': files})
+
         print(f"\nUnified dataset created successfully!")
         print(f"Total matches: {len(unified_df)}")
         print(f"Seasons covered: {unified_df['Season'].nunique()}")
         print(f"Date range: {unified_df['Date'].min()} to {unified_df['Date'].max()}")
-        
+
         # Show some basic information about our dataset
         print("\nDataset Info:")
         print(unified_df.info())
-        
+
         # Show a few sample rows
         print("\nSample data:")
         print(unified_df.head())
-        
+
         return unified_df
     else:
         print("No datasets were successfully processed")
         return None
 
+def ingest_seasons(raw_dir=RAW_DIR, output_dir=PROCESSED_DIR, workers=None):
+    """
+    Bring the unified dataset up to date with the season files
+
+    Every file's content hash is kept in a manifest. Files we have already
+    ingested unchanged are skipped. New seasons are parsed in parallel and
+    appended to the unified CSV and its columnar copy in place. If a file
+    we already ingested has changed or gone, its rows can't be patched in
+    place, so the dataset is rebuilt from scratch instead.
+    """
+    start = time.perf_counter()
+    unified_path = os.path.join(output_dir, UNIFIED_FILENAME)
+    manifest = load_manifest(output_dir)
+    known = manifest['files']
+
+    season_files = sorted(glob.glob(os.path.join(raw_dir, "season-*.csv")))
+    hashes = {os.path.basename(path): file_sha256(path) for path in season_files}
+    new_files = [path for path in season_files if os.path.basename(path) not in known]
+    changed = [name for name, digest in hashes.items() if name in known and known[name]['sha256'] != digest]
+    removed = [name for name in known if name not in hashes]
+
+    if not os.path.exists(unified_path) or not known or changed or removed:
+        reason = ("no existing dataset or manifest" if not os.path.exists(unified_path) or not known
+                  else f"changed: {changed}, removed: {removed}")
+        print(f"Rebuilding the unified dataset ({reason})")
+        return standardize_datasets(raw_dir, output_dir, workers)
+
+    if not new_files:
+        print(f"Unified dataset is up to date ({len(known)} season files, checked in {time.perf_counter() - start:.2f}s)")
+        return None
+
+    print(f"Ingesting {len(new_files)} new season files: {[os.path.basename(f) for f in new_files]}")
+    parsed = parse_season_files(new_files, workers)
+    new_seasons = [parsed[path] for path in new_files if path in parsed]
+    if not new_seasons:
+        print("No new seasons were successfully processed")
+        return None
+    new_rows = pd.concat(new_seasons, ignore_index=True).sort_values('Date', kind='stable')
+
+    # Append to what's already there instead of rewriting it
+    header = pd.read_csv(unified_path, nrows=0).columns
+    new_rows.reindex(columns=header).to_csv(unified_path, mode='a', header=False, index=False)
+    columnar_path = columnar_path_for(unified_path)
+    if os.path.isdir(columnar_path):
+        appended, rewritten = append_columnar(new_rows, columnar_path)
+        print(f"Columnar copy: {appended} rows {'rewritten with wider types' if rewritten else 'appended in place'}")
+    source = source_label(raw_dir)
+    files = {
+        os.path.basename(path): {
+            'sha256': hashes[os.path.basename(path)],
+            'source': source,
+            'season': season_from_filename(path),
+            'rows': len(parsed[path]),
+            'dates': parsed[path].attrs.get('dates'),
+            'ingested_at': datetime.now().isoformat(timespec='seconds')
+        } for path in new_files if path in parsed
+    }
+    partitions_path = os.path.join(output_dir, 'partitions')
+    if os.path.isdir(partitions_path):
+        partition_files = load_partition_manifest(partitions_path)['files']
+        # The streaming ingest may already have put some of these files in the partitions
+        fresh = [path for path in new_files if path in parsed
+                 and partition_files.get(manifest_key(source, os.path.basename(path)), {}).get('sha256')
+                 != hashes[os.path.basename(path)]]
+        if fresh:
+            fresh_rows = pd.concat([parsed[path] for path in fresh], ignore_index=True).sort_values('Date', kind='stable')
+            added = append_partitions(fresh_rows, partitions_path,
+                                      files={manifest_key(source, os.path.basename(path)): files[os.path.basename(path)]
+                                             for path in fresh})
+            print(f"Partitions updated: {sorted(season for _, season in added)}")
+
+    known.update(files)
+    save_manifest(output_dir, manifest)
+
+    print(f"Appended {len(new_rows)} matches from {len(new_seasons)} seasons in {time.perf_counter() - start:.2f}s")
+    return new_rows
+
+def peak_memory_mb():
+    """Peak resident memory of this process so far, in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def season_for_file(path):
+    """
+    Season named by a file's path, None if it doesn't name one
+
+    Handles our "season-2010-2011.csv" files and football-data.co.uk style
+    paths where the season is a 4-digit token like ".../1011/E0.csv".
+    """
+    match = re.search(r'(\d{4})-(\d{4})', os.path.basename(path))
+    if match:
+        return f"{match.group(1)}-{match.group(2)}"
+    for token in reversed(re.split(r'[\\/_.\-]', path)):
+        if re.fullmatch(r'\d{4}', token) and int(token[2:]) == (int(token[:2]) + 1) % 100:
+            start = int(token[:2])
+            start += 1900 if start > 50 else 2000
+            return f"{start}-{start + 1}"
+    return None
+
+def season_for_dates(dates):
+    """Season of each match date, seasons start in July"""
+    start = dates.dt.year - (dates.dt.month < 7).astype('Int64')
+    return (start.astype('string') + '-' + (start + 1).astype('string'))
+
+def validate_chunk(chunk, date_flagged=None):
+    """
+    Split a chunk into rows we keep and rows we reject
+
+    Rejected rows get a 'reason': missing teams or result, negative counts,
+    a result that doesn't match the score, a date that doesn't fit the
+    file's format or season (date_flagged), or no date at all.
+    """
+    reason = pd.Series('', index=chunk.index, dtype=object)
+    reason[chunk[['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].isna().any(axis=1)] = 'missing teams or score'
+    negative = (chunk[COUNT_COLS] < 0).any(axis=1).fillna(False)
+    reason[(reason == '') & negative] = 'negative count'
+    home_win = (chunk['FTHG'] > chunk['FTAG']).fillna(False).to_numpy(dtype=bool)
+    draw = (chunk['FTHG'] == chunk['FTAG']).fillna(False).to_numpy(dtype=bool)
+    expected_ftr = np.select([home_win, draw], ['H', 'D'], 'A')
+    bad_result = (chunk['FTR'] != expected_ftr).fillna(False) & chunk[['FTR', 'FTHG', 'FTAG']].notna().all(axis=1)
+    reason[(reason == '') & bad_result] = 'result does not match score'
+    if date_flagged is not None:
+        reason[(reason == '') & date_flagged] = 'date does not fit format or season'
+    reason[(reason == '') & chunk['Date'].isna()] = 'unreadable date'
+    keep = (reason == '').to_numpy()
+    return chunk[keep], chunk[~keep].assign(reason=reason[~keep])
+
+def stream_file(path, output_dir, chunksize=STREAM_CHUNK_ROWS, team_names=None):
+    """
+    Ingest one CSV chunk by chunk into league/season partitions
+
+    Only one chunk is in memory at a time. Team names are normalised as
+    rows stream past, through a cache so each distinct name is looked up
+    once. Returns counts of rows kept and rejected, and the (league, season)
+    partitions the rows went to.
+    """
+    team_names = {} if team_names is None else team_names
+    partitions = set()
+    file_season = season_for_file(path)
+    date_format = None
+    kept = rejected = 0
+    rejected_path = os.path.join(output_dir, REJECTED_FILENAME)
+    stream_cols = req_cols + ['Div']
+
+    reader = pd.read_csv(path, usecols=lambda col: col in stream_cols, dtype=dict(req_dtypes, Div='string'),
+                         chunksize=chunksize)
+    for chunk in reader:
+        missing_cols = [col for col in req_cols if col not in chunk.columns]
+        if missing_cols:
+            print(f"Missing columns in {path}: {missing_cols}")
+            break
+
+        # The file's date format is settled from its first chunk
+        if date_format is None:
+            date_format, ambiguous = detect_date_format(chunk['Date'])
+            if ambiguous:
+                print(f"{path}: day/month order of dates assumed for {date_format}")
+        chunk['Date'], date_flagged = parse_dates(chunk['Date'], date_format, file_season)
+        valid, bad = validate_chunk(chunk, date_flagged)
+        if len(bad):
+            bad.assign(source=os.path.basename(path)).to_csv(
+                rejected_path, mode='a', header=not os.path.exists(rejected_path), index=False)
+            rejected += len(bad)
+        if valid.empty:
+            continue
+
+        # Normalise team names, looking each distinct spelling up once
+        for col in ('HomeTeam', 'AwayTeam'):
+            for name in valid[col].unique():
+                if name not in team_names:
+                    team_names[name] = canonical_team_name(name)
+        valid = valid.assign(
+            HomeTeam=valid['HomeTeam'].map(team_names),
+            AwayTeam=valid['AwayTeam'].map(team_names),
+            League=valid['Div'].fillna(DEFAULT_LEAGUE) if 'Div' in valid.columns else DEFAULT_LEAGUE,
+            Season=file_season if file_season else season_for_dates(valid['Date'])
+        )
+
+        partitions.update(append_partitions(valid[req_cols + ['Season', 'League']], output_dir))
+        kept += len(valid)
+    return kept, rejected, sorted(partitions)
+
+def stream_ingest(input_dir=RAW_DIR, output_dir=PARTITIONS_DIR, chunksize=STREAM_CHUNK_ROWS):
+    """
+    Bounded-memory ingestion of any number of season files
+
+    Every CSV under input_dir is streamed in fixed-size chunks into the
+    partitioned store, output_dir/league=E0/season=2010-2011/, so peak
+    memory depends on the chunk size, not on how much history there is.
+    Files already ingested unchanged are skipped. If one from input_dir has
+    changed or gone, the partitions it wrote are rebuilt, since streamed rows
+    can't be taken back out. Partitions that also hold another source's
+    files are never removed.
+    """
+    start = time.perf_counter()
+    files = sorted(glob.glob(os.path.join(input_dir, '**', '*.csv'), recursive=True))
+    # The same manifest the batch writers keep, so files they ingested aren't streamed in again
+    manifest = load_partition_manifest(output_dir)
+    known = manifest['files']
+    source = source_label(input_dir)
+    keys = {path: manifest_key(source, os.path.relpath(path, input_dir)) for path in files}
+    hashes = {keys[path]: file_sha256(path) for path in files}
+
+    # Only files from this input_dir are checked, other writers' files aren't ours to rebuild
+    changed = [key for key, entry in known.items()
+               if entry_source(entry) == source and hashes.get(key) != entry['sha256']]
+    unmanaged = not known and glob.glob(os.path.join(output_dir, 'league=*'))
+    if unmanaged:
+        print("Rebuilding partitions, they have no ingest manifest")
+        shutil.rmtree(output_dir)
+        known = manifest['files'] = {}
+    elif changed:
+        stale = {partition for key in changed for partition in entry_partitions(known[key])}
+        # Files sharing those partitions have to be streamed in again too
+        sharing = [key for key, entry in known.items()
+                   if key not in changed and stale & set(entry_partitions(entry))]
+        foreign = [key for key in sharing if entry_source(known[key]) != source]
+        if foreign:
+            message = (f"{changed} changed or went away, but their partitions also hold rows from {foreign}, "
+                       f"which another ingest owns")
+            print(f"Not rebuilding partitions: {message}")
+            return {'error': message}
+        print(f"Rebuilding partitions {sorted(stale)}, these files changed or went away: {changed}")
+        remove_partitions(output_dir, stale)
+        for key in changed + sharing:
+            del known[key]
+        save_partition_manifest(output_dir, manifest)
+    os.makedirs(output_dir, exist_ok=True)
+
+    pending = [path for path in files if keys[path] not in known]
+    print(f"Streaming {len(pending)} of {len(files)} files in chunks of {chunksize} rows")
+
+    team_names = {}
+    total_kept = total_rejected = 0
+    for path in pending:
+        kept, rejected, partitions = stream_file(path, output_dir, chunksize, team_names)
+        total_kept += kept
+        total_rejected += rejected
+        name = os.path.relpath(path, input_dir)
+        known[keys[path]] = {
+            'sha256': hashes[keys[path]],
+            'source': source,
+            'partitions': [list(partition) for partition in partitions],
+            'rows': kept,
+            'rejected': rejected,
+            'ingested_at': datetime.now().isoformat(timespec='seconds')
+        }
+        # Saved after every file so an interrupted run picks up where it stopped
+        save_partition_manifest(output_dir, manifest)
+        print(f"{name}: {kept} rows kept, {rejected} rejected")
+
+    seconds = time.perf_counter() - start
+    peak = peak_memory_mb()
+    print(f"Streamed {total_kept} rows ({total_rejected} rejected) in {seconds:.2f}s"
+          + (f", peak memory {peak:.1f} MB" if peak is not None else ""))
+    return {'files': len(pending), 'rows': total_kept, 'rejected': total_rejected,
+            'seconds': seconds, 'peak_memory_mb': peak}
+
 # This runs when we execute the script directly
 if __name__ == "__main__":
-    unified_data = standardize_datasets()
\ No newline at end of file
+    # "python data_preprocessing.py full" rebuilds everything, otherwise only new season files are ingested
+    if len(sys.argv) > 1 and sys.argv[1] == 'full':
+        unified_data = standardize_datasets()
+    # "python data_preprocessing.py stream [input_dir] [output_dir]" streams any amount of history into partitions
+    elif len(sys.argv) > 1 and sys.argv[1] == 'stream':
+        stream_ingest(sys.argv[2] if len(sys.argv) > 2 else RAW_DIR,
+                      sys.argv[3] if len(sys.argv) > 3 else PARTITIONS_DIR)
+    else:
+        unified_data = ingest_seasons()
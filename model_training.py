@@ -5,8 +5,18 @@ from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, mean_squared_error, mean_absolute_error
 import joblib
+import os
+import sys
+import json
+import time
 import warnings
 import traceback
+from contextlib import contextmanager
+
+from app.config import Config
+from app.data.columnar import columnar_path_for, read_unified_dataset, write_columnar
+from app.models.compact_forest import artifacts_version, export_all
+from app.models.feature_store import TeamFormStore
 warnings.filterwarnings('ignore')
 
 def prepare_features(df):
@@ -43,106 +53,342 @@ def prepare_features(df):
     X = data[feature_columns]
     return X, data, le_home, le_away
 
-def train_match_winner_model(df):
+def peak_memory_mb():
+    """Peak resident memory of this process so far, in MB (None where unsupported)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+@contextmanager
+def timed_stage(timings, name):
+    """Record how long a pipeline stage takes"""
+    start = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - start
+
+def fit_forest(name, model, X_train, y_train):
+    """Fit one forest and time it"""
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    return name, model, time.perf_counter() - start
+
+def train_all_models(df, n_jobs=-1, n_estimators=100, output_dir='.'):
     """
-    Train a model to predict which team will win the match
+    Train all three models in one pass
+    
+    Features are prepared once and the same train/test split is shared by
+    every model. The three forests are fitted one after another, each one
+    using all cores, so they don't oversubscribe the CPUs. Returns the trained models,
+    encoders and a report with per-stage timings and peak memory.
     """
-    print("Training Match Winner Prediction Model...")
+    timings = {}
+    wall_start = time.perf_counter()
     
-    try:
-        # Get our prepared features
+    # Prepare our features once for all three models
+    with timed_stage(timings, 'prepare_features'):
         X, data, le_home, le_away = prepare_features(df)
-        
-        # This is what we want to predict - the match result
-        y = data['FTR']  # FTR: Full Time Result (H=Home Win, A=Away Win, D=Draw)
-        
-        print(f"Target variable distribution:\n{y.value_counts()}")
-        
-        # Split our data into training and testing sets
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Create and train our model
-        clf = RandomForestClassifier(n_estimators=100, random_state=42)
-        clf.fit(X_train, y_train)
-        
-        # Test how well our model works
-        y_pred = clf.predict(X_test)
-        
-        # Calculate accuracy
-        accuracy = accuracy_score(y_test, y_pred)
-        print(f"Match Winner Model Accuracy: {accuracy:.4f}")
-        
-        # Save our trained model and encoders for later use
-        joblib.dump(clf, 'match_winner_model.pkl')
-        joblib.dump(le_home, 'home_team_encoder.pkl')
-        joblib.dump(le_away, 'away_team_encoder.pkl')
-        
-        print("Match winner model saved as 'match_winner_model.pkl'")
-        
-        return clf, le_home, le_away
-    except Exception as e:
-        print(f"Error in train_match_winner_model: {str(e)}")
-        traceback.print_exc()
-        return None, None, None
+    
+    # Same split as train_test_split(X, y, test_size=0.2, random_state=42) in each model
+    with timed_stage(timings, 'split'):
+        train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        targets = {
+            'match_winner': data['FTR'],  # FTR: Full Time Result (H=Home Win, A=Away Win, D=Draw)
+            'fthg': data['FTHG'],         # Full-Time Home Goals
+            'ftag': data['FTAG']          # Full-Time Away Goals
+        }
+    
+    forests = {
+        'match_winner': RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs),
+        'fthg': RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs),
+        'ftag': RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs)
+    }
+    
+    print(f"Training {len(forests)} models on {len(X_train)} matches...")
+    with timed_stage(timings, 'fit_all'):
+        for name, model in forests.items():
+            name, model, seconds = fit_forest(name, model, X_train, targets[name].iloc[train_idx])
+            timings[f'fit_{name}'] = seconds
+            print(f"Finished {name} model in {seconds:.2f}s")
+    
+    # Test how well our models work
+    metrics = {}
+    with timed_stage(timings, 'evaluate'):
+        y_pred = forests['match_winner'].predict(X_test)
+        metrics['match_winner_accuracy'] = accuracy_score(targets['match_winner'].iloc[test_idx], y_pred)
+        for name in ('fthg', 'ftag'):
+            y_test = targets[name].iloc[test_idx]
+            y_pred = forests[name].predict(X_test)
+            mse = mean_squared_error(y_test, y_pred)
+            metrics[f'{name}_mse'] = mse
+            metrics[f'{name}_mae'] = mean_absolute_error(y_test, y_pred)
+            metrics[f'{name}_rmse'] = np.sqrt(mse)
+    
+    # Save our trained models and encoders for later use
+    with timed_stage(timings, 'save'):
+        joblib.dump(forests['match_winner'], os.path.join(output_dir, 'match_winner_model.pkl'))
+        joblib.dump(forests['fthg'], os.path.join(output_dir, 'fthg_model.pkl'))
+        joblib.dump(forests['ftag'], os.path.join(output_dir, 'ftag_model.pkl'))
+        joblib.dump(le_home, os.path.join(output_dir, 'home_team_encoder.pkl'))
+        joblib.dump(le_away, os.path.join(output_dir, 'away_team_encoder.pkl'))
+        export_compact_models(forests['match_winner'], forests['fthg'], forests['ftag'], le_home, le_away,
+                              output_dir=output_dir)
+    
+    report = {
+        'mode': 'full',
+        'matches': len(X),
+        'n_jobs': n_jobs,
+        'wall_seconds': time.perf_counter() - wall_start,
+        'peak_memory_mb': peak_memory_mb(),
+        'timings': timings,
+        'metrics': metrics
+    }
+    report['version'] = record_model_version(output_dir, report, forests)
+    return forests, le_home, le_away, report
+
+def print_training_report(report):
+    """Print the timings, memory and metrics of a training run"""
+    print("\nTraining report")
+    print("=" * 40)
+    print(f"Matches: {report['matches']}, n_jobs: {report['n_jobs']}, version: {report.get('version')}")
+    for stage, seconds in report['timings'].items():
+        print(f"{stage:<20} {seconds:8.2f}s")
+    print(f"{'wall time':<20} {report['wall_seconds']:8.2f}s")
+    if report['peak_memory_mb'] is not None:
+        print(f"{'peak memory':<20} {report['peak_memory_mb']:8.1f} MB")
+    metrics = report['metrics']
+    print(f"Match Winner Model Accuracy: {metrics['match_winner_accuracy']:.4f}")
+    for name in ('fthg', 'ftag'):
+        print(f"{name.upper()} Model - MSE: {metrics[f'{name}_mse']:.4f}, MAE: {metrics[f'{name}_mae']:.4f}, "
+              f"RMSE: {metrics[f'{name}_rmse']:.4f}")
+
+# Incremental updates: how many trees each update adds, how many recent
+# matches the new trees see and how big a forest may grow before its
+# oldest trees are dropped
+UPDATE_NEW_TREES = 10
+UPDATE_WINDOW = 380  # One EPL season
+UPDATE_MAX_TREES = 200
+MODEL_VERSIONS_FILE = 'model_versions.json'
+MODEL_VERSIONS_KEPT = 50
+
+def load_model_versions(model_dir='.'):
+    """Read the model version manifest, newest entry last"""
+    path = os.path.join(model_dir, MODEL_VERSIONS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def record_model_version(model_dir, report, forests):
+    """
+    Append a training run to the model version manifest
+
+    The version id is the content hash of the saved artifacts, the same id
+    the web app reports as model_version
+    """
+    version = artifacts_version(model_dir, ['match_winner_model.npz', 'fthg_model.npz',
+                                            'ftag_model.npz', 'team_encoders.npz'])
+    versions = load_model_versions(model_dir)
+    versions.append({
+        'version': version,
+        'parent': versions[-1]['version'] if versions else None,
+        'mode': report['mode'],
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'matches': int(report['matches']),
+        'trees': {name: len(model.estimators_) for name, model in forests.items()},
+        'wall_seconds': round(report['wall_seconds'], 3),
+        'metrics': {name: round(float(value), 4) for name, value in report.get('metrics', {}).items()}
+    })
+    with open(os.path.join(model_dir, MODEL_VERSIONS_FILE), 'w') as f:
+        json.dump(versions[-MODEL_VERSIONS_KEPT:], f, indent=2)
+    return version
+
+def last_full_retrain_seconds(model_dir='.'):
+    """Wall time of the most recent full retrain in the manifest, if any"""
+    for entry in reversed(load_model_versions(model_dir)):
+        if entry['mode'] == 'full':
+            return entry['wall_seconds']
+    return None
+
+def append_matches(df, new_matches):
+    """Add new results to the dataset, skipping matches it already has"""
+    keys = [column for column in ('Date', 'HomeTeam', 'AwayTeam') if column in df.columns and column in new_matches.columns]
+    known = pd.MultiIndex.from_frame(df[keys].astype(str))
+    incoming = pd.MultiIndex.from_frame(new_matches[keys].astype(str))
+    fresh = new_matches[~incoming.isin(known) & ~incoming.duplicated()]
+    return pd.concat([df, fresh], ignore_index=True), fresh
+
+def encode_features(data, le_home, le_away):
+    """Same feature matrix as prepare_features, using already fitted encoders"""
+    data = data.copy()
+    data['HomeTeam_encoded'] = le_home.transform(data['HomeTeam'])
+    data['AwayTeam_encoded'] = le_away.transform(data['AwayTeam'])
+    feature_columns = [
+        'HomeTeam_encoded', 'AwayTeam_encoded',
+        'HTHG', 'HTAG', 'HS', 'AS', 'HST', 'AST',
+        'HC', 'AC', 'HF', 'AF', 'HY', 'AY', 'HR', 'AR'
+    ]
+    return data[feature_columns]
+
+def grow_forest(model, X, y, new_trees, max_trees, seed=None):
+    """
+    Add new_trees trees fitted on (X, y) to an existing forest
 
-def train_score_prediction_models(df):
+    With warm_start sklearn only fits the extra trees and keeps the old ones.
+    Once the forest passes max_trees the oldest trees are dropped, so it
+    keeps tracking recent form at a bounded prediction cost. The new trees'
+    seeds come from `seed`: with a fixed random_state and a forest capped at
+    max_trees, every update would otherwise reuse the same seeds.
     """
-    Train models to predict the exact score of the match
-    We need two models - one for home team goals and one for away team goals
+    params = {'warm_start': True, 'n_estimators': len(model.estimators_) + new_trees}
+    if seed is not None:
+        params['random_state'] = seed
+    model.set_params(**params)
+    model.fit(X, y)
+    if max_trees and len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.n_estimators = max_trees
+    model.set_params(warm_start=False)
+    return model
+
+def default_dataset_path():
+    """A dataset in the working directory if there is one, else the one data_preprocessing builds"""
+    return 'unified_dataset.csv' if os.path.exists('unified_dataset.csv') else Config.DATASET_PATH
+
+def update_models(new_matches, dataset_path=None, model_dir='.',
+                  new_trees=UPDATE_NEW_TREES, window=UPDATE_WINDOW, max_trees=UPDATE_MAX_TREES,
+                  feature_store_path=Config.FEATURE_STORE_PATH):
+    """
+    Refresh the saved models with a new round of results instead of retraining
+
+    The results are appended to the dataset, then every forest gets
+    new_trees extra trees fitted on the most recent `window` matches. If the
+    new results include a team the encoders have never seen the models
+    can't be grown, so this falls back to a full retrain.
+
+    Returns a report with the time taken next to the last full retrain.
     """
-    print("\nTraining Exact Score Prediction Models...")
+    timings = {}
+    wall_start = time.perf_counter()
+    dataset_path = dataset_path or default_dataset_path()
     
-    try:
-        # Get our prepared features
-        X, data, le_home, le_away = prepare_features(df)
-        
-        # Train model for home team goals
-        print("Training FTHG Model...")
-        y_fthg = data['FTHG']  # Full-Time Home Goals
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y_fthg, test_size=0.2, random_state=42)
-        
-        reg_fthg = RandomForestRegressor(n_estimators=100, random_state=42)
-        reg_fthg.fit(X_train, y_train)
-        
-        y_pred_fthg = reg_fthg.predict(X_test)
-        
-        # Check how accurate our model is
-        mse_fthg = mean_squared_error(y_test, y_pred_fthg)
-        mae_fthg = mean_absolute_error(y_test, y_pred_fthg)
-        rmse_fthg = np.sqrt(mse_fthg)
-        
-        print(f"FTHG Model - MSE: {mse_fthg:.4f}, MAE: {mae_fthg:.4f}, RMSE: {rmse_fthg:.4f}")
-        
-        # Train model for away team goals
-        print("Training FTAG Model...")
-        y_ftag = data['FTAG']  # Full-Time Away Goals
-        
-        X_train, X_test, y_train, y_test = train_test_split(X, y_ftag, test_size=0.2, random_state=42)
-        
-        reg_ftag = RandomForestRegressor(n_estimators=100, random_state=42)
-        reg_ftag.fit(X_train, y_train)
-        
-        y_pred_ftag = reg_ftag.predict(X_test)
-        
-        # Check how accurate this model is too
-        mse_ftag = mean_squared_error(y_test, y_pred_ftag)
-        mae_ftag = mean_absolute_error(y_test, y_pred_ftag)
-        rmse_ftag = np.sqrt(mse_ftag)
-        
-        print(f"FTAG Model - MSE: {mse_ftag:.4f}, MAE: {mae_ftag:.4f}, RMSE: {rmse_ftag:.4f}")
-        
-        # Save our trained models
-        joblib.dump(reg_fthg, 'fthg_model.pkl')
-        joblib.dump(reg_ftag, 'ftag_model.pkl')
-        
-        print("Score prediction models saved as 'fthg_model.pkl' and 'ftag_model.pkl'")
-        
-        return reg_fthg, reg_ftag
-    except Exception as e:
-        print(f"Error in train_score_prediction_models: {str(e)}")
-        traceback.print_exc()
-        return None, None
+    with timed_stage(timings, 'append'):
+        df = pd.read_csv(dataset_path)
+        df, new_matches = append_matches(df, new_matches)
+        added = len(new_matches)
+        if added:
+            df.to_csv(dataset_path, index=False)
+            # Keep the typed columnar copy in step with the CSV
+            if os.path.isdir(columnar_path_for(dataset_path)):
+                write_columnar(df, columnar_path_for(dataset_path))
+    print(f"Appended {added} new matches to {dataset_path} ({len(df)} total)")
+    if not added:
+        return {'mode': 'unchanged', 'appended': 0, 'wall_seconds': time.perf_counter() - wall_start,
+                'version': (load_model_versions(model_dir) or [{}])[-1].get('version')}
+    
+    with timed_stage(timings, 'load_models'):
+        forests = {
+            'match_winner': joblib.load(os.path.join(model_dir, 'match_winner_model.pkl')),
+            'fthg': joblib.load(os.path.join(model_dir, 'fthg_model.pkl')),
+            'ftag': joblib.load(os.path.join(model_dir, 'ftag_model.pkl'))
+        }
+        le_home = joblib.load(os.path.join(model_dir, 'home_team_encoder.pkl'))
+        le_away = joblib.load(os.path.join(model_dir, 'away_team_encoder.pkl'))
+    
+    # Keep the team form features in step with the dataset
+    if feature_store_path and os.path.exists(feature_store_path):
+        with timed_stage(timings, 'feature_store'):
+            store = TeamFormStore.load(feature_store_path)
+            store.append(new_matches)
+            store.save(feature_store_path)
+    
+    new_teams = (set(new_matches['HomeTeam']) - set(le_home.classes_)) | \
+                (set(new_matches['AwayTeam']) - set(le_away.classes_))
+    if new_teams:
+        print(f"New teams {sorted(new_teams)} aren't in the encoders, running a full retrain")
+        forests, le_home, le_away, report = train_all_models(df, output_dir=model_dir)
+        report['appended'] = added
+        return report
+    
+    with timed_stage(timings, 'prepare_window'):
+        data = df.dropna()
+        recent = data.tail(window)
+        # Every outcome class must be present or the new trees' class indices won't line up
+        if set(recent['FTR']) != set(forests['match_winner'].classes_):
+            recent = data
+        X = encode_features(recent, le_home, le_away)
+    
+    print(f"Growing each forest by {new_trees} trees on the last {len(X)} matches...")
+    with timed_stage(timings, 'grow'):
+        targets = {'match_winner': recent['FTR'], 'fthg': recent['FTHG'], 'ftag': recent['FTAG']}
+        for name, model in forests.items():
+            # The dataset only grows, so its row count gives each update its own seed
+            grow_forest(model, X, targets[name], new_trees, max_trees, seed=len(df))
+    
+    with timed_stage(timings, 'save'):
+        joblib.dump(forests['match_winner'], os.path.join(model_dir, 'match_winner_model.pkl'))
+        joblib.dump(forests['fthg'], os.path.join(model_dir, 'fthg_model.pkl'))
+        joblib.dump(forests['ftag'], os.path.join(model_dir, 'ftag_model.pkl'))
+        export_compact_models(forests['match_winner'], forests['fthg'], forests['ftag'], le_home, le_away,
+                              output_dir=model_dir)
+    
+    report = {
+        'mode': 'incremental',
+        'matches': len(data),
+        'appended': added,
+        'window': len(X),
+        'wall_seconds': time.perf_counter() - wall_start,
+        'full_retrain_seconds': last_full_retrain_seconds(model_dir),
+        'peak_memory_mb': peak_memory_mb(),
+        'timings': timings
+    }
+    report['version'] = record_model_version(model_dir, report, forests)
+    return report
+
+def print_update_report(report):
+    """Print how long an update took next to the last full retrain"""
+    if report['mode'] == 'full':
+        print_training_report(report)
+        return
+    if report['mode'] == 'unchanged':
+        print(f"No new matches, models left at version {report['version']}")
+        return
+    print("\nUpdate report")
+    print("=" * 40)
+    print(f"Appended: {report['appended']}, window: {report['window']}, version: {report['version']}")
+    for stage, seconds in report['timings'].items():
+        print(f"{stage:<20} {seconds:8.2f}s")
+    print(f"{'time to update':<20} {report['wall_seconds']:8.2f}s")
+    full = report['full_retrain_seconds']
+    if full:
+        print(f"{'last full retrain':<20} {full:8.2f}s  ({full / report['wall_seconds']:.1f}x slower)")
+    else:
+        print("No full retrain recorded in the manifest to compare against")
+
+def export_compact_models(clf, reg_fthg, reg_ftag, le_home, le_away, output_dir='.'):
+    """
+    Export the trained forests as compact .npz arrays for serving
+    These load much faster than the pickles and don't need sklearn installed
+    """
+    print("\nExporting compact model artifacts...")
+    paths = export_all(clf, reg_fthg, reg_ftag, le_home, le_away, output_dir=output_dir)
+    for path in paths:
+        print(f"Saved {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+    return paths
+
+def export_existing_models(model_dir='.'):
+    """
+    Convert already trained pickles in model_dir to the compact format
+    """
+    models = [joblib.load(os.path.join(model_dir, name)) for name in [
+        'match_winner_model.pkl', 'fthg_model.pkl', 'ftag_model.pkl',
+        'home_team_encoder.pkl', 'away_team_encoder.pkl'
+    ]]
+    return export_compact_models(*models, output_dir=model_dir)
 
 def main():
     """
@@ -151,14 +397,12 @@ def main():
     try:
         # Load our combined dataset
         print("Loading unified dataset...")
-        df = pd.read_csv('unified_dataset.csv')
+        df = read_unified_dataset(default_dataset_path())
         print(f"Dataset loaded with {len(df)} matches")
         
-        # Train our match winner prediction model
-        clf, le_home, le_away = train_match_winner_model(df)
-        
-        # Train our score prediction models
-        reg_fthg, reg_ftag = train_score_prediction_models(df)
+        # Prepare features once and train all three models
+        forests, le_home, le_away, report = train_all_models(df)
+        print_training_report(report)
         
         print("\nAll models trained and saved successfully!")
         print("\nModels created:")
@@ -167,10 +411,19 @@ def main():
         print("3. ftag_model.pkl - Predicts Full-Time Away Goals")
         print("4. home_team_encoder.pkl - Encoder for home teams")
         print("5. away_team_encoder.pkl - Encoder for away teams")
+        print("6. *.npz / team_encoders.npz - Compact copies of the above for serving")
     except Exception as e:
         print(f"Error in main: {str(e)}")
         traceback.print_exc()
 
 # This runs when we execute the script directly
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # "python model_training.py export [model_dir]" converts existing pickles without retraining
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        export_existing_models(sys.argv[2] if len(sys.argv) > 2 else '.')
+    # "python model_training.py update new_results.csv [model_dir]" grows the saved models with a new round
+    elif len(sys.argv) > 2 and sys.argv[1] == 'update':
+        print_update_report(update_models(pd.read_csv(sys.argv[2]),
+                                          model_dir=sys.argv[3] if len(sys.argv) > 3 else '.'))
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+Hyperparameter search for our RandomForest models
+
+Evaluates every configuration with walk-forward cross-validation by season:
+train on all seasons before season k, test on season k. The folds are built
+once and written to disk as plain arrays. Worker processes memory-map them,
+so every configuration in the search reuses the same folds. Each
+configuration is scored on accuracy (match winner), MAE (home and away
+goals), model size and inference latency.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from app.models.compact_forest import compact_from_model
+from app.data.columnar import read_unified_dataset
+from model_training import default_dataset_path, prepare_features
+
+warnings.filterwarnings('ignore')
+
+# The configurations tried by default
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 10, 20],
+    'min_samples_leaf': [1, 5],
+}
+
+# A small grid for checking the harness end to end
+QUICK_PARAM_GRID = {
+    'n_estimators': [20, 50],
+    'max_depth': [None, 10],
+    'min_samples_leaf': [1],
+}
+
+# Need at least this many seasons of history before the first test season
+MIN_TRAIN_SEASONS = 3
+LATENCY_REPEATS = 50
+LATENCY_BATCH_ROWS = 1000
+
+# Folds loaded once per worker process
+_folds = None
+
+
+def build_folds(df, min_train_seasons=MIN_TRAIN_SEASONS):
+    """
+    Build the walk-forward folds
+
+    Rows are sorted by season, so every fold is a pair of contiguous slices:
+    train = rows[:start], test = rows[start:end]. Returns the arrays and the
+    (test season, start, end) of each fold.
+    """
+    X, data, _, _ = prepare_features(df)
+    order = np.argsort(data['Season'].to_numpy(), kind='stable')
+    seasons = data['Season'].to_numpy()[order]
+
+    classes, ftr = np.unique(data['FTR'].to_numpy()[order], return_inverse=True)
+    arrays = {
+        'X': X.to_numpy(dtype=np.float64)[order],
+        'ftr': ftr.astype(np.int64),
+        'fthg': data['FTHG'].to_numpy(dtype=np.float64)[order],
+        'ftag': data['FTAG'].to_numpy(dtype=np.float64)[order],
+    }
+
+    season_names, season_starts = np.unique(seasons, return_index=True)
+    season_ends = np.append(season_starts[1:], len(seasons))
+    folds = [(str(name), int(start), int(end))
+             for name, start, end in zip(season_names, season_starts, season_ends)][min_train_seasons:]
+    return arrays, folds, classes.astype(str).tolist()
+
+
+def write_folds(arrays, folds_dir):
+    """Save each array as .npy so workers can memory-map them"""
+    for name, array in arrays.items():
+        np.save(os.path.join(folds_dir, f'{name}.npy'), array)
+
+
+def _load_folds(folds_dir):
+    """Worker initializer, maps the fold arrays once per process"""
+    global _folds
+    _folds = {name[:-4]: np.load(os.path.join(folds_dir, name), mmap_mode='r')
+              for name in os.listdir(folds_dir) if name.endswith('.npy')}
+
+
+def measure_latency(forest, X):
+    """Median single-row and per-batch latency of the compact (served) model, in ms"""
+    single = []
+    for i in range(LATENCY_REPEATS):
+        row = X[i % len(X)].reshape(1, -1)
+        start = time.perf_counter()
+        forest.predict(row)
+        single.append((time.perf_counter() - start) * 1000)
+
+    batch = X[:LATENCY_BATCH_ROWS]
+    start = time.perf_counter()
+    forest.predict(batch)
+    batch_ms = (time.perf_counter() - start) * 1000
+    return float(np.median(single)), batch_ms * LATENCY_BATCH_ROWS / len(batch)
+
+
+def evaluate_candidate(params, folds):
+    """
+    Walk-forward evaluation of one configuration, runs in a worker process
+
+    Size and latency are measured on the models from the last fold, which
+    are trained on the most history and closest to what we'd ship.
+    """
+    X, ftr, fthg, ftag = (np.asarray(_folds[name]) for name in ('X', 'ftr', 'fthg', 'ftag'))
+    started = time.perf_counter()
+    fold_results = []
+
+    for season, start, end in folds:
+        clf = RandomForestClassifier(random_state=42, n_jobs=1, **params).fit(X[:start], ftr[:start])
+        reg_fthg = RandomForestRegressor(random_state=42, n_jobs=1, **params).fit(X[:start], fthg[:start])
+        reg_ftag = RandomForestRegressor(random_state=42, n_jobs=1, **params).fit(X[:start], ftag[:start])
+
+        X_test = X[start:end]
+        fold_results.append({
+            'season': season,
+            'train_rows': start,
+            'test_rows': end - start,
+            'accuracy': float(np.mean(clf.predict(X_test) == ftr[start:end])),
+            'fthg_mae': float(np.mean(np.abs(reg_fthg.predict(X_test) - fthg[start:end]))),
+            'ftag_mae': float(np.mean(np.abs(reg_ftag.predict(X_test) - ftag[start:end]))),
+        })
+
+    compact = [compact_from_model(model) for model in (clf, reg_fthg, reg_ftag)]
+    latencies = [measure_latency(forest, X) for forest in compact]
+
+    return {
+        'params': params,
+        'accuracy': float(np.mean([f['accuracy'] for f in fold_results])),
+        'accuracy_std': float(np.std([f['accuracy'] for f in fold_results])),
+        'fthg_mae': float(np.mean([f['fthg_mae'] for f in fold_results])),
+        'ftag_mae': float(np.mean([f['ftag_mae'] for f in fold_results])),
+        'model_size_mb': sum(forest.nbytes for forest in compact) / (1024 * 1024),
+        'latency_single_ms': sum(single for single, _ in latencies),
+        'latency_1000_rows_ms': sum(batch for _, batch in latencies),
+        'seconds': time.perf_counter() - started,
+        'folds': fold_results,
+    }
+
+
+def expand_grid(grid):
+    """Every combination of the grid's values as a list of param dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_search(df, grid=PARAM_GRID, workers=None, min_train_seasons=MIN_TRAIN_SEASONS):
+    """
+    Evaluate every configuration of the grid in parallel
+
+    Returns the results sorted best first (accuracy, then combined MAE)
+    """
+    arrays, folds, classes = build_folds(df, min_train_seasons)
+    if not folds:
+        raise ValueError(f"Need more than {min_train_seasons} seasons for walk-forward folds")
+    candidates = expand_grid(grid)
+    workers = workers or os.cpu_count() or 1
+
+    print(f"{len(candidates)} configurations x {len(folds)} folds "
+          f"(test seasons {folds[0][0]} to {folds[-1][0]}), {workers} workers")
+
+    folds_dir = tempfile.mkdtemp(prefix='score_sight_folds_')
+    results = []
+    try:
+        write_folds(arrays, folds_dir)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_load_folds, initargs=(folds_dir,)) as executor:
+            futures = [executor.submit(evaluate_candidate, params, folds) for params in candidates]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(f"[{len(results)}/{len(candidates)}] {result['params']} "
+                      f"accuracy {result['accuracy']:.4f} in {result['seconds']:.1f}s")
+    finally:
+        shutil.rmtree(folds_dir, ignore_errors=True)
+
+    results.sort(key=lambda r: (-r['accuracy'], r['fthg_mae'] + r['ftag_mae']))
+    return results
+
+
+def print_report(results):
+    """One line per configuration, best first"""
+    print("\nTuning report (mean over walk-forward folds)")
+    print("=" * 108)
+    print(f"{'n_estimators':>12} {'max_depth':>9} {'min_leaf':>8} {'accuracy':>9} {'+/-':>6} "
+          f"{'FTHG MAE':>9} {'FTAG MAE':>9} {'size MB':>8} {'1 row ms':>9} {'1000 rows ms':>13}")
+    for r in results:
+        p = r['params']
+        print(f"{p.get('n_estimators', 100):>12} {str(p.get('max_depth')):>9} {p.get('min_samples_leaf', 1):>8} "
+              f"{r['accuracy']:>9.4f} {r['accuracy_std']:>6.3f} {r['fthg_mae']:>9.4f} {r['ftag_mae']:>9.4f} "
+              f"{r['model_size_mb']:>8.2f} {r['latency_single_ms']:>9.2f} {r['latency_1000_rows_ms']:>13.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward hyperparameter search for the ScoreSight models")
+    parser.add_argument('dataset', nargs='?', default=None,
+                        help="Match dataset (default: the unified dataset data_preprocessing builds)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument('--quick', action='store_true', help="Try a small grid only")
+    parser.add_argument('--output', default='tuning_results.json', help="Where to write the full results")
+    args = parser.parse_args()
+
+    print("Loading unified dataset...")
+    df = read_unified_dataset(args.dataset or default_dataset_path())
+    print(f"Dataset loaded with {len(df)} matches")
+
+    started = time.perf_counter()
+    results = run_search(df, QUICK_PARAM_GRID if args.quick else PARAM_GRID, workers=args.workers)
+    print_report(results)
+    print(f"\nSearch finished in {time.perf_counter() - started:.1f}s")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Full results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
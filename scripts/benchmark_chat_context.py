@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Time to build AI chat context: sequential fetches vs the context builder
+
+The upstream APIs are replaced with functions that sleep for a fixed
+round-trip time and return sample data. Each question is timed the old
+way (fetch live, upcoming and standings one after another, then format),
+then through ChatContextBuilder cold (empty cache) and warm.
+"""
+
+import os
+import sys
+import time
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.context import ChatContextBuilder, RENDERERS, select_sources
+
+QUESTIONS = [
+    "Who's top of the table?",
+    "What's the score in the Chelsea game?",
+    "When does Arsenal play next?",
+    "Any transfer news?",
+    "Tell me about the history of football",
+]
+
+LIVE = [{'homeTeam': 'Chelsea', 'awayTeam': 'Arsenal', 'score': '1 - 0', 'minute': 55,
+         'competition': 'Premier League', 'date': '2025-01-01 20:00 IST'}]
+UPCOMING = [{'homeTeam': f'Team {i}', 'awayTeam': f'Team {i + 1}', 'competition': 'Premier League',
+             'date': '2025-01-04 18:30 IST'} for i in range(15)]
+STANDINGS = [{'position': i + 1, 'team': f'Team {i}', 'played': 20, 'won': 10, 'drawn': 5, 'lost': 5,
+              'goals_for': 30, 'goals_against': 20, 'goal_difference': 10, 'points': 35} for i in range(20)]
+NEWS = [{'title': 'Headline', 'description': 'Story', 'publishedAt': '2025-01-01'}] * 5
+
+
+def fetcher(data, round_trip):
+    def fetch():
+        time.sleep(round_trip)
+        return data
+    return fetch
+
+
+def main():
+    round_trip = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    fetchers = {'live': fetcher(LIVE, round_trip), 'upcoming': fetcher(UPCOMING, round_trip),
+                'standings': fetcher(STANDINGS, round_trip), 'news': fetcher(NEWS, round_trip)}
+
+    def sequential(prompt):
+        data = {source: fetchers[source]() for source in ('live', 'upcoming', 'standings')}
+        if any(word in prompt.lower() for word in ('news', 'latest', 'update', 'transfer')):
+            data['news'] = fetchers['news']()
+        return "\n\n".join(filter(None, (RENDERERS[source](value) for source, value in data.items())))
+
+    print(f"Upstream round trip: {round_trip * 1000:.0f} ms per source")
+    print(f"{'question':<40} {'sources':<28} {'old ms':>8} {'cold ms':>8} {'warm ms':>8}")
+    for question in QUESTIONS:
+        builder = ChatContextBuilder(fetchers)
+        timings = []
+        for build in (sequential, builder.build, builder.build):
+            start = time.perf_counter()
+            build(question)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{question:<40} {','.join(select_sources(question)):<28} "
+              f"{timings[0]:>8.1f} {timings[1]:>8.1f} {timings[2]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Page latency under chat load: model calls in web threads vs the chat job queue
+
+A thread pool stands in for the web server's worker threads. A burst of
+chat requests arrives while page requests (a few milliseconds of work
+each) keep coming every 50 ms. Inline, every chat request runs the local stub model in a web
+thread, so pages wait behind it. Queued, the chat request only submits
+a ChatJob, and the model runs on the chat worker pool.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.jobs import ChatJobQueue
+from app.chat.llm import StubChatModel, response_text
+
+WEB_THREADS = 4
+PAGE_WORK_SECONDS = 0.005
+
+
+def page(submitted_at):
+    time.sleep(PAGE_WORK_SECONDS)
+    return (time.perf_counter() - submitted_at) * 1000
+
+
+def run(chatters, pages, handle_chat):
+    """Latency percentiles (p50, p95, max) of page requests sent every 50 ms during a chat burst"""
+    web = ThreadPoolExecutor(max_workers=WEB_THREADS)
+    chats = [web.submit(handle_chat, f"Question {i}") for i in range(chatters)]
+    requests = []
+    for _ in range(pages):
+        requests.append(web.submit(page, time.perf_counter()))
+        time.sleep(0.05)
+    latencies = [request.result() for request in requests]
+    for chat in chats:
+        chat.result()
+    web.shutdown()
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), max(latencies)
+
+
+def main():
+    chatters = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    pages = 40
+    model = StubChatModel(first_token_delay=800, chunk_delay=50)
+    jobs = ChatJobQueue(workers=4, max_queued=64)
+
+    def inline_chat(question):
+        return ''.join(response_text(chunk) for chunk in model.generate_content(question, stream=True))
+
+    def queued_chat(question):
+        return jobs.submit(lambda: (response_text(chunk) for chunk in model.generate_content(question, stream=True)))
+
+    print(f"{WEB_THREADS} web threads, {chatters} concurrent chat requests, {pages} page requests")
+    inline = run(chatters, pages, inline_chat)
+    print(f"model in web threads: page p50 {inline[0]:.0f} ms, p95 {inline[1]:.0f} ms, max {inline[2]:.0f} ms")
+    queued = run(chatters, pages, queued_chat)
+    while jobs.metrics()['completed'] < chatters:
+        time.sleep(0.05)
+    print(f"chat job queue:       page p50 {queued[0]:.0f} ms, p95 {queued[1]:.0f} ms, max {queued[2]:.0f} ms")
+    metrics = jobs.metrics()
+    print(f"chat jobs: queue wait p50 {metrics['queue_wait_ms']['p50']:.0f} ms, "
+          f"latency p50 {metrics['latency_ms']['p50']:.0f} ms, p95 {metrics['latency_ms']['p95']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Parse time and memory of the unified dataset: CSV vs the columnar copy
+
+Times a full pd.read_csv against loading the typed .npy columns (all of
+them, and just the columns training reads), and reports the resulting
+DataFrame memory. Pass a factor to repeat the dataset that many times in
+a temporary copy, to see how both scale.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.data.columnar import columnar_path_for, load_columns, load_dataframe, write_columnar
+
+TRAINING_COLUMNS = ['HomeTeam', 'AwayTeam', 'FTR', 'FTHG', 'FTAG', 'HTHG', 'HTAG', 'HS', 'AS',
+                    'HST', 'AST', 'HC', 'AC', 'HF', 'AF', 'HY', 'AY', 'HR', 'AR']
+
+
+def measure(load, repeats=5):
+    """Best-of time in ms, peak traced allocation in MB and the result's memory in MB"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = load()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if isinstance(result, pd.DataFrame):
+        size = result.memory_usage(deep=True).sum()
+    else:
+        size = sum(array.nbytes for array in result.values())
+    return best * 1000, peak / (1024 * 1024), size / (1024 * 1024)
+
+
+def main():
+    factor = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    workdir = tempfile.mkdtemp(prefix='score_sight_columnar_')
+    try:
+        csv_path = Config.DATASET_PATH
+        if factor > 1:
+            csv_path = os.path.join(workdir, 'unified_dataset.csv')
+            pd.concat([pd.read_csv(Config.DATASET_PATH)] * factor, ignore_index=True).to_csv(csv_path, index=False)
+        columnar_path = os.path.join(workdir, 'unified_dataset_columnar')
+        write_columnar(pd.read_csv(csv_path), columnar_path)
+
+        csv_mb = os.path.getsize(csv_path) / (1024 * 1024)
+        columnar_mb = sum(os.path.getsize(os.path.join(columnar_path, name))
+                          for name in os.listdir(columnar_path)) / (1024 * 1024)
+        rows = len(pd.read_csv(csv_path, usecols=['HomeTeam']))
+
+        print(f"{rows} rows, CSV {csv_mb:.2f} MB on disk, columnar {columnar_mb:.2f} MB on disk")
+        print("=" * 76)
+        print(f"{'loader':<36} {'time ms':>9} {'peak MB':>9} {'frame MB':>9}")
+        runs = [
+            ('pd.read_csv (all columns)', lambda: pd.read_csv(csv_path)),
+            ('pd.read_csv (training columns)', lambda: pd.read_csv(csv_path, usecols=TRAINING_COLUMNS)),
+            ('columnar DataFrame (all columns)', lambda: load_dataframe(columnar_path)),
+            ('columnar DataFrame (training)', lambda: load_dataframe(columnar_path, TRAINING_COLUMNS)),
+            ('columnar mmap arrays (training)', lambda: load_columns(columnar_path, TRAINING_COLUMNS)),
+        ]
+        baseline = None
+        for name, load in runs:
+            ms, peak, size = measure(load)
+            baseline = baseline or ms
+            print(f"{name:<36} {ms:>9.2f} {peak:>9.2f} {size:>9.2f}  ({baseline / ms:.1f}x)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # The committed dataset's own columnar copy, if preprocessing has written it
+    if os.path.isdir(columnar_path_for(Config.DATASET_PATH)):
+        print(f"\nColumnar copy in use: {columnar_path_for(Config.DATASET_PATH)}")
+
+
+if __name__ == "__main__":
+    main()
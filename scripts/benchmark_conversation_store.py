@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Request payload and prompt history size as a chat conversation grows
+
+The old client posted its whole history on every message and the server
+put the last 10 messages into the prompt, however long they were. With
+ConversationStore the client posts only its message, and the prompt
+history is the recent turns plus a rolling summary within a token budget.
+"""
+
+import json
+import os
+import random
+import sys
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.conversations import ConversationStore, estimate_tokens
+
+CHECKPOINTS = (5, 20, 50, 100, 200)
+
+
+def history_text(history, summary=None):
+    text = "\n".join(f"{'User' if role == 'user' else 'Assistant'}: {message}" for role, message in history)
+    return f"{summary}\n{text}" if summary else text
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else max(CHECKPOINTS)
+    rng = random.Random(3)
+    store = ConversationStore()
+    history = []
+
+    print(f"{'messages':>8} {'old payload B':>14} {'new payload B':>14} {'old prompt tok':>15} {'new prompt tok':>15}")
+    for turn in range(1, turns + 1):
+        question = f"Question {turn}: how did Arsenal do against Chelsea in match {rng.randint(1, 38)}?"
+        # Gemini answers run to a few hundred words
+        answer = ' '.join(rng.choice(['Arsenal', 'won', 'the', 'match', 'with', 'two', 'goals.', 'Chelsea',
+                                      'pressed', 'late', 'on.']) for _ in range(rng.randint(80, 300)))
+
+        old_payload = len(json.dumps({'message': question, 'history': history, 'greeted': bool(history)}))
+        new_payload = len(json.dumps({'message': question}))
+        old_prompt = estimate_tokens(history_text(history[-10:]))
+        context = store.context('bench')
+        new_prompt = estimate_tokens(history_text(context['history'], context['summary']))
+
+        history += [['user', question], ['assistant', answer]]
+        store.append('bench', 'user', question)
+        store.append('bench', 'assistant', answer)
+        if turn in CHECKPOINTS:
+            print(f"{len(history):>8} {old_payload:>14} {new_payload:>14} {old_prompt:>15} {new_prompt:>15}")
+    print(store.metrics())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Date parsing throughput on the whole raw archive
+
+Compares the old per-row format inference (pd.to_datetime with
+errors='coerce') against detecting each file's format once and parsing
+the column with it. Also counts how many dates the two disagree on and
+how many inferred dates fall outside their own season. Pass a factor to
+repeat every file's dates that many times.
+"""
+
+import glob
+import os
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+# Add the project root to sys.path so we can import the preprocessing module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_preprocessing import RAW_DIR, detect_date_format, parse_dates, season_from_filename
+
+
+def best_of(parse, repeats=5):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = parse()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    factor = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    files = sorted(glob.glob(os.path.join(RAW_DIR, 'season-*.csv')))
+    columns = {path: pd.concat([pd.read_csv(path, usecols=['Date'], dtype='string')['Date']] * factor,
+                               ignore_index=True) for path in files}
+    rows = sum(len(values) for values in columns.values())
+
+    def inferred():
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return {path: pd.to_datetime(values, errors='coerce') for path, values in columns.items()}
+
+    def explicit():
+        return {path: parse_dates(values, detect_date_format(values)[0], season_from_filename(path))
+                for path, values in columns.items()}
+
+    inferred_s, old = best_of(inferred)
+    explicit_s, new = best_of(explicit)
+
+    disagree = sum(int((old[path] != new[path][0]).sum()) for path in files)
+    old_missing = sum(int(old[path].isna().sum()) for path in files)
+    old_outside = 0
+    for path in files:
+        start = int(season_from_filename(path)[:4])
+        dates = old[path]
+        old_outside += int(((dates < pd.Timestamp(start, 7, 1)) | (dates >= pd.Timestamp(start + 1, 9, 1))).sum())
+    flagged = sum(int(new[path][1].sum()) for path in files)
+
+    print(f"{len(files)} files, {rows} dates")
+    print("=" * 60)
+    print(f"{'parser':<28} {'ms':>9} {'rows/s':>12}")
+    print(f"{'inferred per row':<28} {inferred_s * 1000:>9.1f} {rows / inferred_s:>12,.0f}")
+    print(f"{'detected format, vectorised':<28} {explicit_s * 1000:>9.1f} {rows / explicit_s:>12,.0f}"
+          f"  ({inferred_s / explicit_s:.1f}x)")
+    print(f"\nInferred: {old_missing} missing, {old_outside} outside their season")
+    print(f"Dates that differ between the two: {disagree}")
+    print(f"Flagged by the explicit parser: {flagged}")
+    for path in files:
+        print(f"  {os.path.basename(path)}: {detect_date_format(columns[path])[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Throughput of inline prediction vs the inference process pool
+
+Simulates concurrent /predict handlers with a thread pool, each scoring a
+small feature matrix, and reports requests per second as workers are added.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.models.inference_pool import InferencePool, load_models, predict_with_models
+
+
+def build_requests(count, rows_per_request, seed=42):
+    """Random but valid feature matrices, one per simulated request"""
+    rng = np.random.default_rng(seed)
+    return [
+        np.column_stack([rng.integers(0, 20, rows_per_request), rng.integers(0, 20, rows_per_request)] +
+                        [rng.integers(0, 15, rows_per_request) for _ in range(14)]).astype(np.float64)
+        for _ in range(count)
+    ]
+
+
+def run(predict, requests, client_threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=client_threads) as clients:
+        list(clients.map(predict, requests))
+    return len(requests) / (time.perf_counter() - start)
+
+
+def main():
+    client_threads = 16
+    rows_per_request = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    requests = build_requests(400, rows_per_request)
+    models = load_models(Config.MODEL_DIR)
+
+    print(f"{len(requests)} requests, {rows_per_request} rows each, {client_threads} client threads, "
+          f"{os.cpu_count()} CPUs")
+    print("=" * 60)
+    inline = run(lambda features: predict_with_models(*models, features), requests, client_threads)
+    print(f"{'inline (request thread)':<28} {inline:10.1f} req/s")
+
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in worker_counts:
+        pool = InferencePool(workers, Config.MODEL_DIR)
+        pool.warm_up()
+        throughput = run(pool.predict, requests, client_threads)
+        pool.shutdown()
+        print(f"{f'pool, {workers} workers':<28} {throughput:10.1f} req/s  ({throughput / inline:.2f}x inline)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Share of chat traffic the intent router answers without a model call
+
+Replays a mix of chat questions through IntentRouter over sample live
+and standings snapshots. Questions it declines would go to the model,
+counted here at a fixed round trip. Reports the routed share per intent,
+the time per local answer, and any question that was routed although
+it should have gone to the model.
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.intents import IntentRouter
+
+LIVE = [{'homeTeam': 'Chelsea FC', 'awayTeam': 'Arsenal FC', 'score': '1 - 0', 'minute': 55,
+         'competition': 'Premier League', 'date': '2025-01-01 20:00 IST'}]
+STANDINGS = [{'position': i + 1, 'team': team, 'played': 20, 'won': 12, 'drawn': 4, 'lost': 4, 'goals_for': 30,
+              'goals_against': 20, 'goal_difference': 10 - i, 'points': 48 - 2 * i}
+             for i, team in enumerate(['Liverpool FC', 'Arsenal FC', 'Manchester City FC', 'Chelsea FC',
+                                       'Tottenham Hotspur FC', 'Aston Villa FC', 'Newcastle United FC',
+                                       'Brentford FC', 'Everton FC', 'Fulham FC'])]
+
+# (question, should be answered locally)
+QUESTIONS = [
+    ("What's the score in the Chelsea game right now?", True), ("Any live scores?", True),
+    ("Is Liverpool playing right now?", True), ("Show me the top 5", True), ("top four please", True),
+    ("Who's in the relegation zone?", True), ("Who's top of the table?", True),
+    ("Where are Spurs in the table?", True), ("How many points do Man City have?", True),
+    ("Show me the league table", True),
+    ("Will Arsenal win the league?", False), ("Who will finish in the top 4?", False),
+    ("What about them?", False), ("Tell me about the history of Arsenal", False),
+    ("Who scored the most goals this season?", False), ("Arsenal vs Chelsea prediction", False),
+    ("Any transfer news?", False), ("When does Liverpool play next?", False),
+    ("What was the score in Arsenal vs Chelsea yesterday", False), ("final score of the Arsenal game", False),
+    ("Did Arsenal score", False), ("How do I score a goal in FIFA", False),
+    ("Who is top of the table in La Liga", False), ("Show me the Serie A table", False),
+    ("Any live Champions League scores?", False),
+]
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    round_trip = 2.0
+    router = IntentRouter(lambda sources: {source: {'data': {'live': LIVE, 'standings': STANDINGS}[source]}
+                                           for source in sources}, ['Arsenal', 'Chelsea', 'Liverpool'])
+    rng = random.Random(5)
+
+    wrong = 0
+    local_seconds = 0.0
+    model_calls = 0
+    for _ in range(requests):
+        question, expected_local = rng.choice(QUESTIONS)
+        start = time.perf_counter()
+        answer = router.answer(question)
+        if answer is None:
+            model_calls += 1
+        else:
+            local_seconds += time.perf_counter() - start
+        if (answer is not None) != expected_local:
+            wrong += 1
+
+    metrics = router.metrics()
+    print(f"{requests} questions: {metrics['answer_rate']:.1%} answered without the model, {wrong} misrouted")
+    print(f"by intent: {metrics['intents']}")
+    print(f"{local_seconds / max(metrics['answered'], 1) * 1000:.3f} ms per local answer; "
+          f"model time {model_calls * round_trip:.0f}s instead of {requests * round_trip:.0f}s "
+          f"at {round_trip:.0f}s per call")
+
+
+if __name__ == "__main__":
+    main()
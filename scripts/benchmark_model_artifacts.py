@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Compare the pickled sklearn models with the compact .npz artifacts
+
+Reports artifact size, load time and resident memory for each format.
+Every load runs in a fresh interpreter so imports and RSS aren't shared.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(PROJECT_ROOT, 'data', 'models')
+
+PICKLE_FILES = ['match_winner_model.pkl', 'fthg_model.pkl', 'ftag_model.pkl',
+                'home_team_encoder.pkl', 'away_team_encoder.pkl']
+COMPACT_FILES = ['match_winner_model.npz', 'fthg_model.npz', 'ftag_model.npz', 'team_encoders.npz']
+
+# Runs in the child process, prints one JSON line with the measurements
+LOADER_SNIPPET = """
+import json, resource, sys, time, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {root!r})
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {fmt!r} == 'pickle':
+    import joblib
+    models = [joblib.load({model_dir!r} + '/' + name) for name in {files!r}]
+else:
+    from app.models.compact_forest import load_all
+    models = load_all({model_dir!r})
+load_seconds = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+    'load_ms': load_seconds * 1000,
+    'rss_delta_kb': rss_after - rss_before,
+    'rss_total_kb': rss_after,
+    'sklearn_imported': 'sklearn' in sys.modules,
+}}))
+"""
+
+
+def measure(fmt, files, runs=5):
+    """Load one artifact format in fresh interpreters and keep the best run"""
+    snippet = LOADER_SNIPPET.format(root=PROJECT_ROOT, model_dir=MODEL_DIR, fmt=fmt, files=files)
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', snippet], capture_output=True, text=True, check=True)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    best = min(results, key=lambda r: r['load_ms'])
+    best['size_kb'] = sum(os.path.getsize(os.path.join(MODEL_DIR, name)) for name in files) / 1024
+    return best
+
+
+def main():
+    missing = [name for name in COMPACT_FILES if not os.path.exists(os.path.join(MODEL_DIR, name))]
+    if missing:
+        print(f"Compact artifacts missing: {missing}")
+        print("Run 'python model_training.py export data/models' first")
+        return
+
+    print(f"{'Format':<10} {'Size (KB)':>10} {'Load (ms)':>10} {'RSS +KB':>10} {'RSS KB':>10}  sklearn imported")
+    print("=" * 72)
+    for fmt, files in (('pickle', PICKLE_FILES), ('compact', COMPACT_FILES)):
+        r = measure(fmt, files)
+        print(f"{fmt:<10} {r['size_kb']:>10.1f} {r['load_ms']:>10.1f} {r['rss_delta_kb']:>10} "
+              f"{r['rss_total_kb']:>10}  {r['sklearn_imported']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Hit rate and latency saved by the AI assistant response cache
+
+Replays a mix of typical chat questions, with several phrasings of each,
+through ResponseCache in front of the local stub model. Halfway through,
+the standings snapshot changes, so answers that used it must be
+regenerated. Reports hit rate, latency saved and anything answered
+wrongly (a cached answer to a different question).
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.context import select_sources
+from app.chat.llm import StubChatModel
+from app.chat.response_cache import ResponseCache, team_terms
+
+TEAMS = ['Arsenal', 'Chelsea', 'Liverpool', 'Man City', 'Tottenham', 'Everton']
+
+# Each intent has several phrasings; answers must never cross intents
+INTENTS = {
+    'top': ["Who's top of the table?", "who is top of the league table", "Which team is leading the standings?",
+            "who is first in the table right now"],
+    'top5': ["Show me the top 5", "show me the top 5 teams", "top 5 in the table?"],
+    'news': ["Any transfer news?", "latest transfer news", "What's the latest transfer news"],
+    'live': ["Any live scores?", "what are the live scores", "live scores please"],
+}
+for team in TEAMS:
+    INTENTS[f'next-{team}'] = [f"When does {team} play next?", f"when do {team} play next",
+                               f"{team} next fixture?"]
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rng = random.Random(7)
+    model = StubChatModel(first_token_delay=0, chunk_delay=0)
+    cache = ResponseCache(team_terms(TEAMS))
+    versions = {'live': 'l1', 'upcoming': 'u1', 'standings': 's1', 'news': 'n1'}
+
+    wrong = 0
+    generated_seconds = cached_seconds = 0.0
+    for i in range(requests):
+        if i == requests // 2:
+            versions['standings'] = 's2'
+        intent = rng.choice(list(INTENTS))
+        prompt = rng.choice(INTENTS[intent])
+        used = {source: versions[source] for source in select_sources(prompt)}
+
+        start = time.perf_counter()
+        answer = cache.lookup(prompt, used)
+        if answer is None:
+            # Stand-in for a Gemini round trip
+            simulated = 2.0
+            answer = f"{intent}:{used}:{model.generate_content(prompt).text}"
+            cache.store(prompt, used, False, answer, simulated)
+            generated_seconds += simulated
+        else:
+            cached_seconds += time.perf_counter() - start
+            if not answer.startswith(f"{intent}:{used}:"):
+                wrong += 1
+                print(f"Wrong answer for {prompt!r}: {answer[:60]!r}")
+
+    metrics = cache.metrics()
+    hits = metrics['exact_hits'] + metrics['similar_hits']
+    print(f"{requests} questions over {len(INTENTS)} intents, standings changed after {requests // 2}")
+    print(f"hit rate {metrics['hit_rate']:.1%} ({metrics['exact_hits']} exact, {metrics['similar_hits']} similar), "
+          f"{metrics['invalidated']} entries invalidated, {wrong} wrong answers")
+    print(f"model time {generated_seconds:.0f}s at 2s per call, "
+          f"saved {metrics['saved_seconds']:.0f}s, {cached_seconds / max(hits, 1) * 1e6:.0f} us per cached answer")
+
+
+if __name__ == "__main__":
+    main()
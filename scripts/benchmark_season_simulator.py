@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Run time of the Monte Carlo season simulator per simulation count
+
+Uses a mid-season table of the teams our models know and a double
+round-robin of their remaining fixtures.
+"""
+
+import os
+import sys
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.models import predictor
+from app.models.season_simulator import simulate_season
+
+
+def build_league(seed=42):
+    """A 20-team table after 19 games and every reverse fixture still to play"""
+    rng = np.random.default_rng(seed)
+    teams = list(predictor.home_team_encoder.classes_)[:20] if predictor.models_loaded else \
+        [f"Team {i}" for i in range(20)]
+    standings = [{
+        'team': str(team),
+        'points': int(rng.integers(10, 45)),
+        'goal_difference': int(rng.integers(-20, 25)),
+        'played': 19
+    } for team in teams]
+    fixtures = [{'homeTeam': str(home), 'awayTeam': str(away)}
+                for i, home in enumerate(teams) for j, away in enumerate(teams) if i < j]
+    return standings, fixtures
+
+
+def main():
+    standings, fixtures = build_league()
+    print(f"{len(standings)} teams, {len(fixtures)} remaining fixtures, {os.cpu_count()} CPUs")
+    print(f"{'Simulations':>12} {'Workers':>8} {'Scoring ms':>11} {'Simulation ms':>14} {'Sims/s':>12}")
+    print("=" * 62)
+    for n_simulations in (1000, 10000, 50000, 100000):
+        for workers in sorted({1, os.cpu_count() or 1}):
+            result = simulate_season(standings, fixtures, n_simulations=n_simulations, workers=workers, seed=1)
+            timing = result['timing']
+            print(f"{n_simulations:>12} {timing['workers']:>8} {timing['scoring_ms']:>11.1f} "
+                  f"{timing['simulation_ms']:>14.1f} {timing['simulations_per_second']:>12}")
+
+
+if __name__ == "__main__":
+    main()
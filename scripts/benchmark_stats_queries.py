@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Latency and correctness of local answers to historical stats questions
+
+Asks the stats query engine about every team and season in the dataset
+and checks each answer against the same total computed directly with
+pandas, then times the engine against a direct pandas filter.
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.stats_queries import StatsQueryEngine, season_label
+from app.config import Config
+from app.data.columnar import read_unified_dataset
+
+QUESTIONS = [
+    ("How many goals did {team} score at home in {season}?", 'HomeTeam', 'FTHG'),
+    ("how many goals did {team} concede away in {season}", 'AwayTeam', 'FTHG'),
+    ("{team} away yellow cards {season}", 'AwayTeam', 'AY'),
+    ("How many corners did {team} win at home in {season}", 'HomeTeam', 'HC'),
+]
+
+
+def pandas_total(matches, team, season, team_column, stat_column):
+    rows = matches[(matches[team_column] == team) & (matches['Season'] == season)]
+    return int(rows[stat_column].sum())
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    matches = read_unified_dataset(Config.DATASET_PATH)
+    started = time.perf_counter()
+    engine = StatsQueryEngine(matches)
+    print(f"Built engine in {(time.perf_counter() - started) * 1000:.1f} ms: "
+          f"{len(engine.teams)} teams, {len(engine.seasons)} seasons, {len(engine.index)} phrases")
+
+    rng = random.Random(11)
+    cases = []
+    for _ in range(n):
+        template, team_column, stat_column = rng.choice(QUESTIONS)
+        season = rng.choice(engine.seasons)
+        teams = sorted(matches.loc[matches['Season'] == season, team_column].astype(str).unique())
+        cases.append((template.format(team=rng.choice(teams), season=season_label(season)),
+                      teams, season, team_column, stat_column))
+
+    wrong = 0
+    engine_seconds = pandas_seconds = 0.0
+    for question, teams, season, team_column, stat_column in cases:
+        start = time.perf_counter()
+        answer = engine.answer(question)
+        engine_seconds += time.perf_counter() - start
+        team = engine.parse(question)['teams'][0]
+        start = time.perf_counter()
+        expected = pandas_total(matches, team, season, team_column, stat_column)
+        pandas_seconds += time.perf_counter() - start
+        if answer is None or int(re.search(r'`(\d+)`', answer).group(1)) != expected:
+            wrong += 1
+            print(f"Mismatch for {question!r}: {answer!r}, expected {expected}")
+
+    print(f"{n} questions, {wrong} wrong")
+    print(f"engine {engine_seconds / n * 1000:.3f} ms per answer, "
+          f"pandas filter {pandas_seconds / n * 1000:.3f} ms per total")
+
+
+if __name__ == "__main__":
+    main()
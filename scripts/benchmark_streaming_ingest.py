@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Peak memory of streaming ingestion as the history grows
+
+Builds synthetic football-data.co.uk style archives from the raw season
+files: every season re-labelled as several divisions and repeated over
+more and more years. Each archive is ingested in a fresh process, once
+with the streaming mode and once by reading every file and concatenating
+them, and the peak resident memory of both is reported.
+"""
+
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from data_preprocessing import RAW_DIR
+
+LEAGUES = ['E0', 'E1', 'E2', 'E3', 'SP1', 'D1']
+
+# Run in a child process so every measurement starts from a clean peak
+STREAM_CODE = """
+import sys
+from data_preprocessing import stream_ingest
+result = stream_ingest(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+print('PEAK', result['peak_memory_mb'])
+"""
+CONCAT_CODE = """
+import glob, os, sys
+import pandas as pd
+from data_preprocessing import peak_memory_mb
+files = sorted(glob.glob(os.path.join(sys.argv[1], '**', '*.csv'), recursive=True))
+df = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+print('PEAK', peak_memory_mb())
+"""
+
+
+def build_archive(directory, repeats):
+    """Write repeats x 10 seasons x len(LEAGUES) files, returns the number of rows"""
+    rows = 0
+    raw = [pd.read_csv(path) for path in sorted(glob.glob(os.path.join(RAW_DIR, 'season-*.csv')))]
+    for repeat in range(repeats):
+        for offset, season in enumerate(raw):
+            start = 1900 + repeat * len(raw) + offset
+            for league in LEAGUES:
+                season_dir = os.path.join(directory, f"{start % 100:02d}{(start + 1) % 100:02d}")
+                os.makedirs(season_dir, exist_ok=True)
+                frame = season.assign(Div=league)
+                frame.to_csv(os.path.join(season_dir, f'{league}_{start}.csv'), index=False)
+                rows += len(frame)
+    return rows
+
+
+def peak_of(code, *args):
+    output = subprocess.run([sys.executable, '-c', code, *map(str, args)], cwd=PROJECT_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.rsplit('PEAK', 1)[1])
+
+
+def main():
+    chunksize = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"{'files':>6} {'rows':>9} {'stream peak MB':>15} {'concat peak MB':>15} {'stream s':>9}")
+    for repeats in (1, 3, 6):
+        workdir = tempfile.mkdtemp(prefix='score_sight_stream_')
+        try:
+            archive = os.path.join(workdir, 'raw')
+            rows = build_archive(archive, repeats)
+            files = len(glob.glob(os.path.join(archive, '**', '*.csv'), recursive=True))
+            start = time.perf_counter()
+            stream_peak = peak_of(STREAM_CODE, archive, os.path.join(workdir, 'partitions'), chunksize)
+            seconds = time.perf_counter() - start
+            concat_peak = peak_of(CONCAT_CODE, archive)
+            print(f"{files:>6} {rows:>9} {stream_peak:>15.1f} {concat_peak:>15.1f} {seconds:>9.1f}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for team logo lookups
+
+Compares the old linear-scan get_team_logo with the indexed resolver, both as
+raw lookups and inside a 500-match page render like the home page fixtures list.
+"""
+
+import os
+import random
+import sys
+import timeit
+
+# Add the project root to sys.path so we can import the app package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jinja2 import Template
+
+from app.utils.team_logos import TeamLogoResolver, team_logo_mapping
+
+# Names as they come back from football-data.org, including other competitions
+# that have no logo and always go through the fuzzy fallback
+API_TEAM_NAMES = [
+    'Arsenal FC', 'Aston Villa FC', 'AFC Bournemouth', 'Brentford FC',
+    'Brighton & Hove Albion FC', 'Burnley FC', 'Chelsea FC', 'Crystal Palace FC',
+    'Everton FC', 'Fulham FC', 'Leeds United FC', 'Liverpool FC',
+    'Manchester City FC', 'Manchester United FC', 'Newcastle United FC',
+    'Nottingham Forest FC', 'Sunderland AFC', 'Tottenham Hotspur FC',
+    'West Ham United FC', 'Wolverhampton Wanderers FC',
+    'FC Barcelona', 'Real Madrid CF', 'Club Atlético de Madrid', 'FC Bayern München',
+    'Borussia Dortmund', 'FC Internazionale Milano', 'AC Milan', 'Juventus FC',
+    'Paris Saint-Germain FC', 'Olympique de Marseille', 'SL Benfica', 'Sporting Clube de Portugal',
+    'arsenal', 'MAN CITY', 'Spurs', 'Wolves',
+]
+
+PAGE_TEMPLATE = Template("""
+{% for match in matches %}
+<div class="match-card">
+    <img src="/team_logos/{{ get_team_logo(match.homeTeam) }}" alt="{{ match.homeTeam }}" class="team-logo">
+    <span>{{ match.homeTeam }} vs {{ match.awayTeam }}</span>
+    <img src="/team_logos/{{ get_team_logo(match.awayTeam) }}" alt="{{ match.awayTeam }}" class="team-logo">
+</div>
+{% endfor %}
+""")
+
+
+def legacy_get_team_logo(team_name):
+    """The previous app.py implementation, kept here as the baseline"""
+    if team_name in team_logo_mapping:
+        return team_logo_mapping[team_name]
+    for key, value in team_logo_mapping.items():
+        if key.lower() == team_name.lower():
+            return value
+    for key, value in team_logo_mapping.items():
+        if (key.lower() in team_name.lower() and len(key) > 3) or \
+           (team_name.lower() in key.lower() and len(team_name) > 3):
+            return value
+    return 'score_sight_logo2.png'
+
+
+def build_matches(count=500, seed=42):
+    """Build a realistic fixtures list for one page render"""
+    rng = random.Random(seed)
+    return [
+        {'homeTeam': rng.choice(API_TEAM_NAMES), 'awayTeam': rng.choice(API_TEAM_NAMES)}
+        for _ in range(count)
+    ]
+
+
+def report(label, seconds, runs):
+    print(f"{label:<40} {seconds / runs * 1000:8.3f} ms per run")
+
+
+def main():
+    matches = build_matches()
+    names = [team for match in matches for team in (match['homeTeam'], match['awayTeam'])]
+    runs = 50
+
+    # A fresh resolver gives a cold memo for the first render, like a new worker
+    resolver = TeamLogoResolver(team_logo_mapping)
+
+    mismatches = [name for name in API_TEAM_NAMES
+                  if legacy_get_team_logo(name) != resolver.resolve(name)]
+    if mismatches:
+        print(f"Names resolved differently from the old implementation: {mismatches}")
+
+    print(f"Lookups per page: {len(names)} ({len(set(names))} distinct names)")
+    print("=" * 60)
+
+    cold = timeit.timeit(lambda: PAGE_TEMPLATE.render(matches=matches, get_team_logo=resolver.resolve), number=1)
+    report("Indexed resolver, cold page render", cold, 1)
+
+    report("Legacy lookups only",
+           timeit.timeit(lambda: [legacy_get_team_logo(n) for n in names], number=runs), runs)
+    report("Indexed resolver lookups only",
+           timeit.timeit(lambda: [resolver.resolve(n) for n in names], number=runs), runs)
+    report("Legacy page render",
+           timeit.timeit(lambda: PAGE_TEMPLATE.render(matches=matches, get_team_logo=legacy_get_team_logo),
+                         number=runs), runs)
+    report("Indexed resolver page render",
+           timeit.timeit(lambda: PAGE_TEMPLATE.render(matches=matches, get_team_logo=resolver.resolve),
+                         number=runs), runs)
+
+    print(f"Fuzzy memo: {resolver.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Requests whose caller gave up are left out of the next batch"""
+
+import os
+import sys
+import threading
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.batching import MicroBatcher
+
+
+def test_timed_out_request_is_skipped():
+    started, release = threading.Event(), threading.Event()
+    scored = []
+
+    def predict_fn(features):
+        scored.append(features[:, 0].tolist())
+        started.set()
+        release.wait(5)
+        return features[:, 0], features[:, 0], features[:, 0]
+
+    batcher = MicroBatcher(predict_fn, max_wait_ms=50)
+    first = batcher.submit([1.0])
+    started.wait(5)
+    with pytest.raises(FuturesTimeoutError):
+        batcher.predict([2.0], timeout=0.05)
+    third = batcher.submit([3.0])
+    release.set()
+
+    assert first.result(5)[0].tolist() == [1.0]
+    assert third.result(5)[0].tolist() == [3.0]
+    assert scored == [[1.0], [3.0]]
+    assert batcher.metrics.snapshot()['cancelled'] == 1
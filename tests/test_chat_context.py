@@ -0,0 +1,32 @@
+"""A failed fetch keeps the previous snapshot and is retried soon"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.context import ChatContextBuilder
+
+
+def test_failed_fetch_keeps_previous_snapshot():
+    responses = [[{'team': 'Arsenal FC', 'points': 30}], RuntimeError('API down'),
+                 [{'team': 'Chelsea FC', 'points': 31}]]
+
+    def fetch():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    builder = ChatContextBuilder({'standings': fetch}, ttls={'standings': 600}, retry_seconds=0.05)
+    first = builder.snapshots(['standings'])['standings']
+    builder._snapshots['standings']['fetched_at'] -= 600
+    failed = builder.snapshots(['standings'])['standings']
+    assert failed['data'] == first['data'] and failed['version'] == first['version']
+
+    # Served from the kept snapshot until the retry is due, not for the whole TTL
+    assert builder.snapshots(['standings'])['standings']['data'] == first['data']
+    time.sleep(0.1)
+    assert builder.snapshots(['standings'])['standings']['data'] == [{'team': 'Chelsea FC', 'points': 31}]
+    assert builder.metrics()['fetch_failures'] == 1
@@ -0,0 +1,28 @@
+"""Appending to a columnar dataset keeps the team columns on one dictionary"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.columnar import append_columnar, load_dataframe, read_schema, write_columnar
+
+
+def _matches(rows):
+    return pd.DataFrame(rows, columns=['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG'])
+
+
+def test_new_teams_extend_both_team_columns_alike(tmp_path):
+    path = str(tmp_path / 'matches')
+    write_columnar(_matches([('Arsenal', 'Chelsea', 1, 0)]), path)
+    appended, rewritten = append_columnar(_matches([('Brentford', 'Arsenal', 2, 2), ('Chelsea', 'Fulham', 0, 1)]),
+                                          path)
+
+    assert (appended, rewritten) == (2, False)
+    columns = {column['name']: column for column in read_schema(path)['columns']}
+    assert columns['HomeTeam']['categories'] == columns['AwayTeam']['categories']
+    df = load_dataframe(path, mmap=False)
+    assert df['HomeTeam'].astype(str).tolist() == ['Arsenal', 'Brentford', 'Chelsea']
+    assert df['AwayTeam'].astype(str).tolist() == ['Chelsea', 'Arsenal', 'Fulham']
@@ -0,0 +1,38 @@
+"""Stored turns are bounded in length and number"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.conversations import ConversationStore
+
+
+def test_long_turns_are_cut():
+    store = ConversationStore(max_turn_chars=100)
+    store.append('chat', 'user', 'goal ' * 1000)
+    (role, text), = store.context('chat')['history']
+    assert role == 'user' and len(text) <= 100 and text.endswith('...')
+    assert store.metrics()['truncated_turns'] == 1
+
+
+def test_folded_turns_are_not_kept():
+    store = ConversationStore(history_budget=50, recent_turns=2)
+    for turn in range(100):
+        store.append('chat', 'user', f'Question {turn} about Arsenal and Chelsea this season')
+    context = store.context('chat')
+    assert context['turns'] == 100
+    assert len(store._conversations['chat'].turns) == len(context['history']) <= 10
+    assert context['summary'] is not None
+
+
+def test_retract_takes_back_an_unanswered_question():
+    store = ConversationStore()
+    store.append('chat', 'user', 'Who is top?')
+    store.append('chat', 'assistant', 'Arsenal.')
+    store.append('chat', 'user', 'And bottom?')
+    assert not store.retract('chat', 'user', 'Something else')
+    assert store.retract('chat', 'user', 'And bottom?')
+    context = store.context('chat')
+    assert context['history'] == [['user', 'Who is top?'], ['assistant', 'Arsenal.']]
+    assert context['turns'] == 2 and context['greeted']
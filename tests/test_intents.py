@@ -0,0 +1,32 @@
+"""Questions the intent router must leave to the model, and ones it answers"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.intents import IntentRouter
+
+router = IntentRouter(lambda sources: {}, ['Arsenal', 'Chelsea', 'Liverpool'])
+
+
+@pytest.mark.parametrize('question', [
+    "who is top of the table in la liga",
+    "show me the serie a table",
+    "where are Bayern in the Bundesliga table",
+    "who leads Ligue 1",
+    "any live Champions League scores?",
+])
+def test_declines_other_competitions(question):
+    assert router.classify(question) == (None, None)
+
+
+@pytest.mark.parametrize('question, intent', [
+    ("who is top of the table", 'leader'),
+    ("show me the league table", 'table'),
+    ("where are Arsenal in the table", 'team_position'),
+])
+def test_routes_premier_league_questions(question, intent):
+    assert router.classify(question)[0] == intent
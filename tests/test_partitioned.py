@@ -0,0 +1,24 @@
+"""Loading matches across partitions keeps missing categories missing"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.partitioned import load_matches, write_partitions
+
+
+def test_missing_category_codes_stay_missing(tmp_path):
+    df = pd.DataFrame({
+        'HomeTeam': ['Arsenal', 'Chelsea', 'Fulham'], 'AwayTeam': ['Chelsea', 'Arsenal', 'Arsenal'],
+        'FTHG': [1, 0, 2], 'FTAG': [0, 0, 1], 'HTR': ['H', None, 'A'],
+        'Season': ['2019-2020', '2019-2020', '2020-2021'],
+    })
+    root = str(tmp_path / 'partitions')
+    write_partitions(df, root)
+
+    loaded = load_matches(root=root)
+    assert loaded['HTR'].isna().tolist() == [False, True, False]
+    assert loaded['HTR'].dropna().astype(str).tolist() == ['H', 'A']
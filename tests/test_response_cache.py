@@ -0,0 +1,23 @@
+"""A slow answer stored after its data changed can't evict newer entries"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.response_cache import ResponseCache
+
+
+def test_stale_store_is_dropped():
+    cache = ResponseCache(protected_terms={'arsenal'})
+    old, new = {'standings': 'v1'}, {'standings': 'v2'}
+    assert cache.lookup("who is top of the table", old) is None
+
+    # Another request sees the new standings and caches its answer first
+    assert cache.lookup("show me the league table", new) is None
+    assert cache.store("show me the league table", new, False, 'new table', 1.0)
+
+    assert not cache.store("who is top of the table", old, False, 'old leader', 3.0)
+    assert cache.lookup("show me the league table", new) == 'new table'
+    assert cache.lookup("who is top of the table", new) is None
+    assert cache.metrics()['stale_stores'] == 1
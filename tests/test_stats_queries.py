@@ -0,0 +1,29 @@
+"""Questions the stats engine must leave to the model, and ones it answers"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.chat.stats_queries import get_stats_engine
+
+engine = get_stats_engine()
+pytestmark = pytest.mark.skipif(engine is None, reason="match dataset is not available")
+
+
+@pytest.mark.parametrize('question', [
+    "who scored the most goals for Arsenal in 2017-18",
+    "How many goals did Salah score in 2017-18 for Liverpool",
+    "did Man City win the league in 2017-18?",
+    "Which team conceded the fewest goals in 2017-18 Chelsea or Arsenal",
+    "Will Arsenal score more goals at home in 2017-18",
+])
+def test_declines_questions_the_totals_dont_answer(question):
+    assert engine.answer(question) is None
+
+
+def test_answers_team_season_totals():
+    answer = engine.answer("How many goals did Liverpool score at home in 2017-18?")
+    assert answer is not None and '**Liverpool**, 2017-18: goals scored' in answer
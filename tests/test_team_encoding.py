@@ -0,0 +1,53 @@
+"""Team names as football-data.org spells them reach the models and the pre-scoring store"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import predictor
+from app.models.prescoring import PredictionStore
+
+pytestmark = pytest.mark.skipif(not predictor.models_loaded, reason="prediction models are not available")
+
+# football-data.org name -> name in our dataset
+API_NAMES = {
+    'Manchester City FC': 'Man City',
+    'Manchester United FC': 'Man United',
+    'Tottenham Hotspur FC': 'Tottenham',
+    'Newcastle United FC': 'Newcastle',
+    'AFC Bournemouth': 'Bournemouth',
+    'Wolverhampton Wanderers FC': 'Wolves',
+    'Brighton & Hove Albion FC': 'Brighton',
+    'West Ham United FC': 'West Ham',
+    'Nottingham Forest FC': 'Nottingham Forest',
+    'Arsenal FC': 'Arsenal',
+}
+
+
+def known_pairs():
+    classes = set(predictor.home_team_encoder.classes_) & set(predictor.away_team_encoder.classes_)
+    return [(api, name) for api, name in API_NAMES.items() if name in classes]
+
+
+def test_encode_teams_accepts_api_spellings():
+    pairs = known_pairs()
+    assert pairs
+    for (home_api, home), (away_api, away) in zip(pairs, pairs[1:] + pairs[:1]):
+        assert predictor.encode_teams(home_api, away_api) == predictor.encode_teams(home, away)
+
+
+def test_encode_teams_rejects_unknown_teams():
+    assert predictor.encode_teams('Real Madrid CF', 'Arsenal FC') is None
+
+
+def test_prediction_store_scores_api_fixtures():
+    pairs = known_pairs()
+    matches = [{'id': i, 'homeTeam': home_api, 'awayTeam': away_api, 'date': '2025-01-01'}
+               for i, ((home_api, _), (away_api, _)) in enumerate(zip(pairs, pairs[1:] + pairs[:1]))]
+    store = PredictionStore()
+    assert store._score(matches) == len(matches)
+    for match in matches:
+        assert store.get(match)['match_result'] in ('Home Win', 'Draw', 'Away Win')